@@ -0,0 +1,401 @@
+import json
+import time
+import asyncio
+import hashlib
+from typing import List, Optional
+import numpy as np
+from app.backend.utils import (
+    get_hyperparameters_from_file,
+    get_optional_redis_client,
+    get_optional_async_redis_client,
+)
+from app.backend.embedding_cache import normalize_text
+from custom_logger import logger
+
+# Loading hyper parameters from the yaml file
+config = get_hyperparameters_from_file()
+answer_cache_config = config.get('ANSWER_CACHE', {})
+
+GENERATION_KEY = "answer_cache:generation"
+
+
+def invalidate_answer_cache(redis_client=None) -> Optional[int]:
+    """
+    Invalidate every cached answer by bumping the cache generation.
+
+    Keys of older generations are never read again and expire through their TTL.
+
+    Args:
+        redis_client (redis.Redis, optional): Client to use, defaults to the shared one.
+
+    Returns:
+        int or None: The new generation, or None when Redis is unavailable.
+    """
+    redis_client = redis_client or get_optional_redis_client()
+    if redis_client is None:
+        return None
+    try:
+        generation = redis_client.incr(GENERATION_KEY)
+        logger.info(f"Answer cache invalidated, generation is now {generation}")
+        return generation
+    except Exception as e:
+        logger.warning(f"Failed to invalidate the answer cache: {e}")
+        return None
+
+
+def answer_namespace(agent: str, corpora: Optional[List[str]] = None) -> str:
+    """
+    Return the cache namespace of an answer.
+
+    Answers restricted to explicit corpora are cached apart from routed answers.
+
+    Args:
+        agent (str): The agent pipeline, 'crew' or 'langraph'.
+        corpora (List[str], optional): Corpora requested explicitly.
+
+    Returns:
+        str: The namespace, e.g. 'crew' or 'crew:finance+policy'.
+    """
+    return f"{agent}:{'+'.join(sorted(corpora))}" if corpora else agent
+
+
+class AnswerCache:
+    """
+    Read-through cache of final answers stored in Redis.
+
+    Answers are looked up by exact match on the normalized question and,
+    optionally, by embedding similarity against previously cached questions.
+    Only answers of the SEMANTIC_AGENTS (the generic RAG pipelines) enter the
+    similarity index: project-specific reports differing in a unit count, amount
+    or date embed almost identically and must only be served on an exact match.
+    The index keeps the MAX_INDEX_ENTRIES most recently cached questions; each
+    process holds it as one normalized float32 matrix and only re-reads it from
+    Redis when the generation or the index version changes.
+
+    Attributes:
+        enabled (bool): Whether the cache is active.
+        semantic_lookup (bool): Whether near-duplicate lookups are performed.
+        semantic_agents (set): Agents whose answers can be served to near-duplicate questions.
+        similarity_threshold (float): Minimum cosine similarity for a semantic hit.
+        max_index_entries (int): Maximum number of questions in a similarity index.
+    """
+
+    def __init__(self, redis_client=None, async_redis_client=None):
+        """
+        Initialize the cache.
+
+        Args:
+            redis_client (redis.Redis, optional): Client to use, defaults to the shared one.
+            async_redis_client (redis.asyncio.Redis, optional): Client used by the async methods.
+        """
+        self.enabled = answer_cache_config.get('ENABLED', True)
+        self.semantic_lookup = answer_cache_config.get('SEMANTIC_LOOKUP', True)
+        self.semantic_agents = set(answer_cache_config.get('SEMANTIC_AGENTS', ["Crew AI RAG", "Langraph Graph RAG"]))
+        self.similarity_threshold = answer_cache_config.get('SIMILARITY_THRESHOLD', 0.97)
+        self.max_index_entries = answer_cache_config.get('MAX_INDEX_ENTRIES', 200)
+        self.default_ttl = answer_cache_config.get('DEFAULT_TTL_SECONDS', 86400)
+        self.agent_ttls = answer_cache_config.get('AGENT_TTL_SECONDS', {}) or {}
+        self.redis_client = redis_client or (get_optional_redis_client() if self.enabled else None)
+        self.async_redis_client = async_redis_client or (
+            get_optional_async_redis_client() if self.enabled else None
+        )
+        # namespace -> (generation, version, answer keys, normalized float32 matrix)
+        self._matrices = {}
+
+    def ttl_for(self, agent: str) -> int:
+        """
+        Return the expiry configured for answers produced by an agent.
+
+        Args:
+            agent (str): Name of the agent that produced the answer.
+
+        Returns:
+            int: The TTL in seconds.
+        """
+        return int(self.agent_ttls.get(agent, self.default_ttl))
+
+    def _index_ttl(self) -> int:
+        """Return the expiry of the semantic index, the longest configured TTL."""
+        return max([self.default_ttl, *map(int, self.agent_ttls.values())])
+
+    def _generation(self) -> int:
+        """Return the current cache generation."""
+        return int(self.redis_client.get(GENERATION_KEY) or 0)
+
+    async def _ageneration(self) -> int:
+        """Return the current cache generation without blocking the event loop."""
+        return int(await self.async_redis_client.get(GENERATION_KEY) or 0)
+
+    @staticmethod
+    def _answer_key(generation: int, namespace: str, query: str) -> str:
+        digest = hashlib.sha256(normalize_text(query).encode("utf-8")).hexdigest()
+        return f"answer:{generation}:{namespace}:{digest}"
+
+    @staticmethod
+    def _index_key(generation: int, namespace: str) -> str:
+        return f"answer_index:{generation}:{namespace}"
+
+    @staticmethod
+    def _recent_key(generation: int, namespace: str) -> str:
+        return f"answer_index_recent:{generation}:{namespace}"
+
+    @staticmethod
+    def _version_key(generation: int, namespace: str) -> str:
+        return f"answer_index_version:{generation}:{namespace}"
+
+    def _indexes(self, question_response) -> bool:
+        """Return whether an answer enters the similarity index."""
+        return self.semantic_lookup and question_response.agent in self.semantic_agents
+
+    def _index_entry(self, pipeline, generation: int, namespace: str, key: str, query_vector) -> None:
+        """Queue the writes adding a question embedding to the similarity index."""
+        index_key = self._index_key(generation, namespace)
+        recent_key = self._recent_key(generation, namespace)
+        pipeline.hset(index_key, key, np.asarray(query_vector, dtype=np.float32).tobytes())
+        pipeline.zadd(recent_key, {key: time.time()})
+        pipeline.zcard(recent_key)
+        pipeline.expire(index_key, self._index_ttl())
+        pipeline.expire(recent_key, self._index_ttl())
+        pipeline.incr(self._version_key(generation, namespace))
+        pipeline.expire(self._version_key(generation, namespace), self._index_ttl())
+
+    def _trim_entries(self, size: int) -> int:
+        """Return how many of the oldest index entries exceed MAX_INDEX_ENTRIES."""
+        return max(0, int(size) - self.max_index_entries)
+
+    def _trim_index(self, generation: int, namespace: str, size: int) -> None:
+        """Drop the oldest questions of a similarity index grown past MAX_INDEX_ENTRIES."""
+        excess = self._trim_entries(size)
+        if not excess:
+            return
+        recent_key = self._recent_key(generation, namespace)
+        stale = self.redis_client.zrange(recent_key, 0, excess - 1)
+        if stale:
+            pipeline = self.redis_client.pipeline()
+            pipeline.hdel(self._index_key(generation, namespace), *stale)
+            pipeline.zrem(recent_key, *stale)
+            pipeline.incr(self._version_key(generation, namespace))
+            pipeline.execute()
+
+    async def _atrim_index(self, generation: int, namespace: str, size: int) -> None:
+        """Drop the oldest questions of a similarity index without blocking the event loop."""
+        excess = self._trim_entries(size)
+        if not excess:
+            return
+        recent_key = self._recent_key(generation, namespace)
+        stale = await self.async_redis_client.zrange(recent_key, 0, excess - 1)
+        if stale:
+            async with self.async_redis_client.pipeline() as pipeline:
+                pipeline.hdel(self._index_key(generation, namespace), *stale)
+                pipeline.zrem(recent_key, *stale)
+                pipeline.incr(self._version_key(generation, namespace))
+                await pipeline.execute()
+
+    @staticmethod
+    def _embed(query: str):
+        # Imported lazily so that invalidation does not pull in the retrieval stack
+        from app.backend.retrieval import get_retrieval_resources
+        return get_retrieval_resources().embeddings.embed_query(normalize_text(query))
+
+    @staticmethod
+    async def _aembed(query: str):
+        from app.backend.retrieval import get_retrieval_resources
+        return await get_retrieval_resources().embeddings.aembed_query(normalize_text(query))
+
+    @staticmethod
+    def _pack(index: dict):
+        """
+        Pack a similarity index read from Redis into a key list and a row-normalized matrix.
+
+        Args:
+            index (dict): Mapping of answer keys to packed float32 question embeddings.
+
+        Returns:
+            tuple: The answer keys and the float32 matrix of their unit-length embeddings.
+        """
+        keys = list(index)
+        matrix = np.frombuffer(b"".join(index[key] for key in keys), dtype=np.float32).reshape(len(keys), -1)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return keys, np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+    def _cached_matrix(self, generation: int, namespace: str, version: int):
+        """Return the in-process matrix of a namespace when it matches the generation and version."""
+        cached = self._matrices.get(namespace)
+        if cached is not None and cached[0] == generation and cached[1] == version:
+            return cached[2], cached[3]
+        return None
+
+    def _load_matrix(self, generation: int, namespace: str, version: int):
+        """Read a namespace's similarity index from Redis and keep it in process."""
+        index = self.redis_client.hgetall(self._index_key(generation, namespace))
+        keys, matrix = self._pack(index) if index else ([], None)
+        self._matrices[namespace] = (generation, version, keys, matrix)
+        return keys, matrix
+
+    async def _aload_matrix(self, generation: int, namespace: str, version: int):
+        """Read a namespace's similarity index using the asyncio Redis client and keep it in process."""
+        index = await self.async_redis_client.hgetall(self._index_key(generation, namespace))
+        keys, matrix = await asyncio.to_thread(self._pack, index) if index else ([], None)
+        self._matrices[namespace] = (generation, version, keys, matrix)
+        return keys, matrix
+
+    def _closest_key(self, keys: List[str], matrix, query_vector):
+        """
+        Find the cached question closest to the query above the similarity threshold.
+
+        Args:
+            keys (List[str]): Answer keys, one per matrix row.
+            matrix (np.ndarray): Unit-length float32 question embeddings.
+            query_vector (List[float]): Embedding of the incoming question.
+
+        Returns:
+            tuple: The matching answer key (or None) and its similarity.
+        """
+        vector = np.asarray(query_vector, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        if norm == 0:
+            return None, 0.0
+        scores = matrix @ (vector / norm)
+        best = int(scores.argmax())
+        best_score = float(scores[best])
+        if best_score < self.similarity_threshold:
+            return None, best_score
+        return keys[best], best_score
+
+    def get(self, query: str, namespace: str) -> Optional[dict]:
+        """
+        Look up a cached answer for a question.
+
+        Args:
+            query (str): The user question.
+            namespace (str): Endpoint the answer belongs to, e.g. 'crew' or 'langraph'.
+
+        Returns:
+            dict or None: The cached QuestionResponse payload, or None on a miss.
+        """
+        if self.redis_client is None:
+            return None
+        try:
+            generation = self._generation()
+            raw = self.redis_client.get(self._answer_key(generation, namespace, query))
+            if raw is not None:
+                logger.info("Answer cache exact hit for query: %s", query)
+                return json.loads(raw)
+
+            if not self.semantic_lookup:
+                return None
+            version = int(self.redis_client.get(self._version_key(generation, namespace)) or 0)
+            if not version:
+                return None
+            keys, matrix = (self._cached_matrix(generation, namespace, version)
+                            or self._load_matrix(generation, namespace, version))
+            if not keys:
+                return None
+            best_key, best_score = self._closest_key(keys, matrix, self._embed(query))
+            if best_key is not None:
+                raw = self.redis_client.get(best_key)
+                cached = json.loads(raw) if raw is not None else None
+                # Entries indexed before SEMANTIC_AGENTS existed may belong to a project-specific agent
+                if cached is not None and cached.get("agent") in self.semantic_agents:
+                    logger.info("Answer cache semantic hit (%.3f) for query: %s", best_score, query)
+                    return cached
+            return None
+        except Exception as e:
+            logger.warning(f"Answer cache lookup failed: {e}")
+            return None
+
+    def set(self, query: str, namespace: str, question_response) -> None:
+        """
+        Store an answer in the cache.
+
+        Args:
+            query (str): The user question.
+            namespace (str): Endpoint the answer belongs to, e.g. 'crew' or 'langraph'.
+            question_response (BaseModel): Model holding the question, response and agent.
+        """
+        if self.redis_client is None:
+            return
+        try:
+            ttl = self.ttl_for(question_response.agent)
+            generation = self._generation()
+            key = self._answer_key(generation, namespace, query)
+            indexed = self._indexes(question_response)
+            pipeline = self.redis_client.pipeline()
+            pipeline.set(key, question_response.json(), ex=ttl)
+            if indexed:
+                self._index_entry(pipeline, generation, namespace, key, self._embed(query))
+            results = pipeline.execute()
+            if indexed:
+                self._trim_index(generation, namespace, results[3])
+            logger.info("Successfully saved data to Redis")
+        except Exception as e:
+            logger.warning(f"Answer cache write failed: {e}")
+
+    async def aget(self, query: str, namespace: str) -> Optional[dict]:
+        """
+        Look up a cached answer using the asyncio Redis client.
+
+        Args:
+            query (str): The user question.
+            namespace (str): Endpoint the answer belongs to, e.g. 'crew' or 'langraph'.
+
+        Returns:
+            dict or None: The cached QuestionResponse payload, or None on a miss.
+        """
+        if self.async_redis_client is None:
+            return None
+        try:
+            generation = await self._ageneration()
+            raw = await self.async_redis_client.get(self._answer_key(generation, namespace, query))
+            if raw is not None:
+                logger.info("Answer cache exact hit for query: %s", query)
+                return json.loads(raw)
+
+            if not self.semantic_lookup:
+                return None
+            version = int(await self.async_redis_client.get(self._version_key(generation, namespace)) or 0)
+            if not version:
+                return None
+            keys, matrix = (self._cached_matrix(generation, namespace, version)
+                            or await self._aload_matrix(generation, namespace, version))
+            if not keys:
+                return None
+            query_vector = await self._aembed(query)
+            best_key, best_score = self._closest_key(keys, matrix, query_vector)
+            if best_key is not None:
+                raw = await self.async_redis_client.get(best_key)
+                cached = json.loads(raw) if raw is not None else None
+                if cached is not None and cached.get("agent") in self.semantic_agents:
+                    logger.info("Answer cache semantic hit (%.3f) for query: %s", best_score, query)
+                    return cached
+            return None
+        except Exception as e:
+            logger.warning(f"Answer cache lookup failed: {e}")
+            return None
+
+    async def aset(self, query: str, namespace: str, question_response) -> None:
+        """
+        Store an answer in the cache using the asyncio Redis client.
+
+        Args:
+            query (str): The user question.
+            namespace (str): Endpoint the answer belongs to, e.g. 'crew' or 'langraph'.
+            question_response (BaseModel): Model holding the question, response and agent.
+        """
+        if self.async_redis_client is None:
+            return
+        try:
+            ttl = self.ttl_for(question_response.agent)
+            generation = await self._ageneration()
+            key = self._answer_key(generation, namespace, query)
+            query_vector = await self._aembed(query) if self._indexes(question_response) else None
+            async with self.async_redis_client.pipeline() as pipeline:
+                pipeline.set(key, question_response.json(), ex=ttl)
+                if query_vector is not None:
+                    self._index_entry(pipeline, generation, namespace, key, query_vector)
+                results = await pipeline.execute()
+            if query_vector is not None:
+                await self._atrim_index(generation, namespace, results[3])
+            logger.info("Successfully saved data to Redis")
+        except Exception as e:
+            logger.warning(f"Answer cache write failed: {e}")
@@ -1,11 +1,23 @@
-import redis
-from fastapi import FastAPI, HTTPException
+import json
+import shutil
+import uuid
+import threading
+from typing import List, Literal, Optional
+from fastapi import FastAPI, HTTPException, File, Form, UploadFile
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
-from app.backend.main import CrewManager, LangraphManager
+from app.backend.main import CrewManager, LangraphManager, prebuild_agents
 from custom_logger import logger
-from app.backend.database import redis_client
+from app.backend.answer_cache import AnswerCache, answer_namespace
+from app.backend.corpora import DEFAULT_CORPUS, known_corpora, resolve_corpora, validate_corpus
+from app.backend.load_docs import PDFProcessor
+from app.backend.jobs import get_job_queue
+from app.backend.models import QuestionResponse
 from custom_exceptions import CustomException
-from app.backend.utils import get_hyperparameters_from_file, OpenAIResponseModel,get_openai_response
+from app.backend.utils import get_hyperparameters_from_file, OpenAIResponseModel
+from app.backend.query_classifier import aclassify_query
+from app.backend.sparse_index import PROJECT_ROOT
 from dotenv import load_dotenv
 import os
 
@@ -13,11 +25,13 @@ app = FastAPI()
 
 class QueryModel(BaseModel):
     query: str
+    # Corpora to search, routed per query when omitted
+    corpora: Optional[List[str]] = None
 
-class QuestionResponse(BaseModel):
-    question: str
-    response: str
-    agent: str
+class JobRequest(BaseModel):
+    query: str
+    agent: Literal["crew", "langraph"] = "langraph"
+    corpora: Optional[List[str]] = None
 
 # Load environment variables
 load_dotenv()
@@ -29,9 +43,44 @@ config = get_hyperparameters_from_file()
 os.environ["OPENAI_API_KEY"] = os.getenv("OPENAI_API_KEY")
 os.environ["OPENAI_MODEL_NAME"] = config['LLM_NAME']
 
+# Read-through cache of final answers
+answer_cache = AnswerCache()
+
+# Uploads are written to the shared volume so that the ingestion workers can read them
+ingestion_config = config.get('INGESTION', {})
+upload_dir = ingestion_config.get('UPLOAD_DIR', "data/uploads")
+UPLOAD_DIR = upload_dir if os.path.isabs(upload_dir) else os.path.join(PROJECT_ROOT, upload_dir)
+UPLOAD_CHUNK_BYTES = ingestion_config.get('UPLOAD_CHUNK_BYTES', 1 << 20)
+
+# Lists and removes indexed documents for the frontend; indexing itself runs on the workers
+_pdf_processor = None
+_pdf_processor_lock = threading.Lock()
+
+
+@app.on_event("startup")
+async def prebuild_agent_templates():
+    """Build the shared crew template and LangGraph workflow before serving requests."""
+    await run_in_threadpool(prebuild_agents)
+
+
+def save_upload(upload: UploadFile, file_path: str) -> str:
+    """
+    Copy an uploaded file to disk chunk by chunk, without holding it in memory.
+
+    Args:
+        upload (UploadFile): The uploaded file.
+        file_path (str): Path the file is written to.
+
+    Returns:
+        str: Path of the written file.
+    """
+    with open(file_path, "wb") as destination:
+        shutil.copyfileobj(upload.file, destination, UPLOAD_CHUNK_BYTES)
+    return file_path
+
 @app.post("/process_query/")
 async def process_query(query: QueryModel):
-    """Endpoint to process a query using CrewManager and save the response to Redis.
+    """Endpoint to process a query using CrewManager, served from the Redis answer cache when possible.
 
     Args:
         query (QueryModel): The query model containing the user's query.
@@ -40,14 +89,23 @@ async def process_query(query: QueryModel):
         dict: A dictionary containing the result of the processed query.
 
     Raises:
-        HTTPException: If there is an error processing the query.
+        HTTPException: If a requested corpus does not exist or there is an error processing the query.
     """
     try:
-        manager = CrewManager(query.query)
-        openai_response = OpenAIResponseModel(is_generic=get_openai_response(query.query).is_generic)
+        corpora = await run_in_threadpool(resolve_corpora, query.corpora)
+    except CustomException as ce:
+        raise HTTPException(status_code=400, detail=str(ce))
+    try:
+        namespace = answer_namespace("crew", corpora)
+        cached = await answer_cache.aget(query.query, namespace)
+        if cached is not None:
+            return {"result": cached["response"]}
+
+        manager = CrewManager(query.query, corpora=corpora)
+        openai_response = OpenAIResponseModel(is_generic=(await aclassify_query(query.query)).is_generic)
         logger.info(f"OpenAI response: {openai_response}")
 
-        result = manager.start_crew(openai_response.is_generic)
+        result = await manager.astart_crew(openai_response.is_generic)
         
         agent_name = "Crew AI RAG" if openai_response.is_generic else "Crew AI AI agent"
         
@@ -57,14 +115,8 @@ async def process_query(query: QueryModel):
             agent=agent_name
         )
         
-        # Attempt to save the question and response to Redis
-        try:
-            redis_key = f"question:{query.query}"
-            redis_value = question_response.json()
-            redis_client.set(redis_key, redis_value)
-            logger.info("Successfully saved data to Redis")
-        except redis.ConnectionError as redis_error:
-            logger.exception("Redis error occurred while saving the response")
+        # Save the question and response to the answer cache
+        await answer_cache.aset(query.query, namespace, question_response)
         
         return {"result": result}
     
@@ -77,7 +129,7 @@ async def process_query(query: QueryModel):
 
 @app.post("/process_query_langraph/")
 async def process_query_langraph(query: QueryModel):
-    """Endpoint to process a query using LangraphManager and save the response to Redis.
+    """Endpoint to process a query using LangraphManager, served from the Redis answer cache when possible.
 
     Args:
         query (QueryModel): The query model containing the user's query.
@@ -86,12 +138,21 @@ async def process_query_langraph(query: QueryModel):
         dict: A dictionary containing the result of the processed query.
 
     Raises:
-        HTTPException: If there is an error processing the query.
+        HTTPException: If a requested corpus does not exist or there is an error processing the query.
     """
     try:
-        print(f"Received query: {query.query}")
-        langraph_manager = LangraphManager(query.query)
-        result = langraph_manager.run_workflow()
+        corpora = await run_in_threadpool(resolve_corpora, query.corpora)
+    except CustomException as ce:
+        raise HTTPException(status_code=400, detail=str(ce))
+    try:
+        logger.info(f"Received query: {query.query}")
+        namespace = answer_namespace("langraph", corpora)
+        cached = await answer_cache.aget(query.query, namespace)
+        if cached is not None:
+            return {"result": cached["response"]}
+
+        langraph_manager = await LangraphManager.acreate(query.query, corpora=corpora)
+        result = await langraph_manager.arun_workflow()
         if result is None:
             raise ValueError("Langraph workflow returned None")
         
@@ -103,14 +164,8 @@ async def process_query_langraph(query: QueryModel):
             agent=agent_name
         )
         
-        # Attempt to save the question and response to Redis
-        try:
-            redis_key = f"question:{query.query}"
-            redis_value = question_response.json()
-            redis_client.set(redis_key, redis_value)
-            logger.info("Successfully saved data to Redis")
-        except redis.ConnectionError as redis_error:
-            logger.exception("Redis error occurred while saving the response")
+        # Save the question and response to the answer cache
+        await answer_cache.aset(query.query, namespace, question_response)
         
         return {"result": result}
     
@@ -120,3 +175,304 @@ async def process_query_langraph(query: QueryModel):
     except Exception as e:
         logger.exception("Unexpected error occurred while processing the query")
         raise HTTPException(status_code=500, detail="Internal server error")
+
+
+def format_sse(event: str, data) -> str:
+    """Serialize an event in the server-sent events wire format."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def stream_query_events(query: str, namespace: str, agent_names: dict, start_events):
+    """
+    Stream a query's progress as server-sent events and cache the final answer.
+
+    Args:
+        query (str): The user's query.
+        namespace (str): Answer cache namespace of the endpoint.
+        agent_names (dict): Agent name for generic (True) and project-specific (False) queries.
+        start_events (callable): Coroutine returning the manager's event stream and classification.
+
+    Yields:
+        str: Encoded server-sent events.
+    """
+    try:
+        cached = await answer_cache.aget(query, namespace)
+        if cached is not None:
+            yield format_sse("agent", {"name": cached["agent"]})
+            yield format_sse("result", {"result": cached["response"]})
+            return
+
+        events, is_generic = await start_events()
+        agent_name = agent_names[is_generic]
+        yield format_sse("agent", {"name": agent_name})
+
+        result = None
+        async for event, data in events:
+            if event == "result":
+                result = data
+                yield format_sse(event, {"result": data})
+            elif event == "token":
+                yield format_sse(event, {"text": data})
+            else:
+                yield format_sse(event, data)
+
+        if result is None:
+            # Nothing to cache: the client gets an explicit error instead of a silent end of stream
+            logger.error(f"Event stream of '{agent_name}' ended without a result for query: {query}")
+            yield format_sse("error", {"detail": f"{agent_name} finished without producing an answer"})
+            return
+        question_response = QuestionResponse(question=query, response=result, agent=agent_name)
+        await answer_cache.aset(query, namespace, question_response)
+    except CustomException as ce:
+        logger.error(f"CustomException: {str(ce)}")
+        yield format_sse("error", {"detail": str(ce)})
+    except Exception:
+        logger.exception("Unexpected error occurred while streaming the query")
+        yield format_sse("error", {"detail": "Internal server error"})
+
+
+@app.post("/process_query/stream")
+async def process_query_stream(query: QueryModel):
+    """Endpoint streaming RAG tokens or crew task progress as server-sent events.
+
+    Args:
+        query (QueryModel): The query model containing the user's query.
+
+    Returns:
+        StreamingResponse: An event stream of ``agent``, ``token``/``task`` and ``result`` events.
+    """
+    try:
+        corpora = await run_in_threadpool(resolve_corpora, query.corpora)
+    except CustomException as ce:
+        raise HTTPException(status_code=400, detail=str(ce))
+
+    async def start_events():
+        openai_response = await aclassify_query(query.query)
+        manager = CrewManager(query.query, corpora=corpora)
+        return manager.astream_crew(openai_response.is_generic), openai_response.is_generic
+
+    return StreamingResponse(
+        stream_query_events(
+            query.query, answer_namespace("crew", corpora), {True: "Crew AI RAG", False: "Crew AI AI agent"},
+            start_events,
+        ),
+        media_type="text/event-stream",
+    )
+
+
+@app.post("/process_query_langraph/stream")
+async def process_query_langraph_stream(query: QueryModel):
+    """Endpoint streaming RAG tokens or LangGraph node events as server-sent events.
+
+    Args:
+        query (QueryModel): The query model containing the user's query.
+
+    Returns:
+        StreamingResponse: An event stream of ``agent``, ``token``/``node`` and ``result`` events.
+    """
+    try:
+        corpora = await run_in_threadpool(resolve_corpora, query.corpora)
+    except CustomException as ce:
+        raise HTTPException(status_code=400, detail=str(ce))
+
+    async def start_events():
+        langraph_manager = await LangraphManager.acreate(query.query, corpora=corpora)
+        is_generic = langraph_manager.openai_response.is_generic
+        return langraph_manager.astream_workflow(), is_generic
+
+    return StreamingResponse(
+        stream_query_events(
+            query.query, answer_namespace("langraph", corpora),
+            {True: "Langraph Graph RAG", False: "Langraph AI agent"}, start_events,
+        ),
+        media_type="text/event-stream",
+    )
+
+
+@app.post("/jobs/")
+async def submit_job(job_request: JobRequest):
+    """Endpoint to queue a query for a background worker and return its job id immediately.
+
+    Args:
+        job_request (JobRequest): The query and the agent pipeline to run it with.
+
+    Returns:
+        dict: A dictionary containing the job id and its initial status.
+
+    Raises:
+        HTTPException: If a requested corpus does not exist or the job queue is unavailable.
+    """
+    try:
+        corpora = await run_in_threadpool(resolve_corpora, job_request.corpora)
+    except CustomException as ce:
+        raise HTTPException(status_code=400, detail=str(ce))
+    try:
+        job_queue = get_job_queue()
+        job_id = await run_in_threadpool(
+            job_queue.submit, job_request.agent, {"query": job_request.query, "corpora": corpora}
+        )
+        return {"job_id": job_id, "status": "queued"}
+    except Exception as e:
+        logger.exception("Unexpected error occurred while submitting the job")
+        raise HTTPException(status_code=503, detail=f"Job queue unavailable: {e}")
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Endpoint returning a job's status, partial node outputs and final report.
+
+    Args:
+        job_id (str): The id returned by ``/jobs/``.
+
+    Returns:
+        dict: The job status, its ``events`` so far, and ``result`` or ``error`` once finished.
+
+    Raises:
+        HTTPException: If the job does not exist or the job queue is unavailable.
+    """
+    try:
+        job = await run_in_threadpool(get_job_queue().get, job_id)
+    except Exception as e:
+        logger.exception("Unexpected error occurred while reading the job")
+        raise HTTPException(status_code=503, detail=f"Job queue unavailable: {e}")
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@app.post("/ingest/")
+async def ingest_documents(files: List[UploadFile] = File(default=[]), urls: List[str] = Form(default=[]),
+                           corpus: Optional[str] = Form(default=None)):
+    """Endpoint to store uploaded PDFs and URLs and queue their indexing on a background worker.
+
+    Uploads are streamed to the shared upload directory in chunks. The worker reports a
+    ``document`` event per finished document on the job and removes the files afterwards.
+
+    Args:
+        files (List[UploadFile]): The PDF files to index, recorded under their file names.
+        urls (List[str]): URLs of PDFs to index.
+        corpus (str, optional): Corpus the documents are indexed in, defaults to the default corpus.
+
+    Returns:
+        dict: A dictionary containing the job id, its initial status, the corpus and the queued documents.
+
+    Raises:
+        HTTPException: If nothing was sent, the corpus name is invalid, the uploads cannot be stored
+            or the job queue is unavailable.
+    """
+    try:
+        corpus = validate_corpus(corpus.strip() if corpus else None)
+    except CustomException as ce:
+        raise HTTPException(status_code=400, detail=str(ce))
+    urls = [url.strip() for url in urls if url.strip()]
+    if not files and not urls:
+        raise HTTPException(status_code=400, detail="No files or URLs to ingest")
+    directory = os.path.join(UPLOAD_DIR, uuid.uuid4().hex)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        sources = []
+        for index, upload in enumerate(files):
+            file_name = os.path.basename(upload.filename or "") or f"upload-{index}.pdf"
+            # Prefixed so that two uploads with the same name do not overwrite each other
+            file_path = await run_in_threadpool(save_upload, upload, os.path.join(directory, f"{index}-{file_name}"))
+            await upload.close()
+            sources.append({"kind": "file", "location": file_path, "source": file_name})
+        sources.extend({"kind": "url", "location": url, "source": url} for url in urls)
+    except Exception as e:
+        shutil.rmtree(directory, ignore_errors=True)
+        logger.exception("Unexpected error occurred while storing the uploads")
+        raise HTTPException(status_code=500, detail=f"Could not store the uploads: {e}")
+    try:
+        job_queue = get_job_queue()
+        job_id = await run_in_threadpool(
+            job_queue.submit, "ingest", {"sources": sources, "upload_dir": directory, "corpus": corpus}
+        )
+        return {
+            "job_id": job_id, "status": "queued", "corpus": corpus,
+            "documents": [source["source"] for source in sources],
+        }
+    except Exception as e:
+        shutil.rmtree(directory, ignore_errors=True)
+        logger.exception("Unexpected error occurred while submitting the ingestion job")
+        raise HTTPException(status_code=503, detail=f"Job queue unavailable: {e}")
+
+
+
+def get_pdf_processor() -> PDFProcessor:
+    """
+    Return the PDF processor used to list and remove indexed documents, created on first use.
+
+    Returns:
+        PDFProcessor: The shared processor.
+    """
+    global _pdf_processor
+    if _pdf_processor is None:
+        with _pdf_processor_lock:
+            if _pdf_processor is None:
+                _pdf_processor = PDFProcessor(
+                    os.getenv("OPENAI_API_KEY"), os.getenv("QDRANT_URL"), os.getenv("QDRANT_API_KEY")
+                )
+    return _pdf_processor
+
+
+@app.get("/corpora/")
+async def list_corpora():
+    """Endpoint listing the corpora that can be searched.
+
+    Returns:
+        dict: The corpus names, the default corpus always included, and the default corpus.
+    """
+    return {"corpora": await run_in_threadpool(known_corpora), "default": DEFAULT_CORPUS}
+
+
+@app.get("/documents/")
+async def list_documents(corpus: Optional[str] = None):
+    """Endpoint listing the documents indexed in a corpus.
+
+    Args:
+        corpus (str, optional): The corpus, defaults to the default corpus.
+
+    Returns:
+        dict: The corpus and its documents with their chunk counts.
+
+    Raises:
+        HTTPException: If the corpus name is invalid or the indexes cannot be read.
+    """
+    try:
+        corpus = validate_corpus(corpus.strip() if corpus else None)
+    except CustomException as ce:
+        raise HTTPException(status_code=400, detail=str(ce))
+    try:
+        documents = await run_in_threadpool(get_pdf_processor().indexed_sources, corpus)
+        return {"corpus": corpus, "documents": documents}
+    except Exception:
+        logger.exception("Unexpected error occurred while listing the documents")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@app.delete("/documents/")
+async def remove_document(source: str, corpus: Optional[str] = None):
+    """Endpoint removing every chunk of a document from the indexes of a corpus.
+
+    Args:
+        source (str): The document source, as listed by ``/documents/``.
+        corpus (str, optional): The corpus, defaults to the default corpus.
+
+    Returns:
+        dict: The corpus, the source and the number of removed chunks.
+
+    Raises:
+        HTTPException: If the corpus name is invalid, the document is not indexed or it cannot be removed.
+    """
+    try:
+        corpus = validate_corpus(corpus.strip() if corpus else None)
+    except CustomException as ce:
+        raise HTTPException(status_code=400, detail=str(ce))
+    try:
+        removed = await run_in_threadpool(get_pdf_processor().remove_document, source, corpus)
+    except CustomException as ce:
+        logger.error(f"CustomException: {str(ce)}")
+        raise HTTPException(status_code=500, detail=str(ce))
+    if not removed:
+        raise HTTPException(status_code=404, detail=f"{source} is not indexed in corpus {corpus}")
+    return {"corpus": corpus, "source": source, "removed": removed}
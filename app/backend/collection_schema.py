@@ -0,0 +1,233 @@
+import os
+import sys
+import argparse
+from typing import Callable, Optional, Union
+from dotenv import load_dotenv
+from qdrant_client import models
+from app.backend.utils import get_hyperparameters_from_file
+from custom_logger import logger
+from custom_exceptions import CustomException
+
+# Loading hyper parameters from the yaml file
+config = get_hyperparameters_from_file()
+collection_config = config.get('COLLECTION', {})
+
+DISTANCES = {"cosine": models.Distance.COSINE, "dot": models.Distance.DOT, "euclid": models.Distance.EUCLID}
+PAYLOAD_SCHEMAS = {
+    "keyword": models.PayloadSchemaType.KEYWORD,
+    "integer": models.PayloadSchemaType.INTEGER,
+    "float": models.PayloadSchemaType.FLOAT,
+    "text": models.PayloadSchemaType.TEXT,
+}
+RANGE_OPERATORS = ("gt", "gte", "lt", "lte")
+# Chunk metadata is nested under this payload key by the LangChain Qdrant vectorstore
+METADATA_KEY = "metadata"
+
+
+def hnsw_config(settings: Optional[dict] = None) -> models.HnswConfigDiff:
+    """
+    Build the HNSW index parameters of the collection.
+
+    Args:
+        settings (dict, optional): A COLLECTION-like section, defaults to the configured one.
+
+    Returns:
+        models.HnswConfigDiff: The graph degree, construction beam and placement of the index.
+    """
+    hnsw = (settings if settings is not None else collection_config).get('HNSW', {}) or {}
+    return models.HnswConfigDiff(
+        m=hnsw.get('M', 16),
+        ef_construct=hnsw.get('EF_CONSTRUCT', 100),
+        full_scan_threshold=hnsw.get('FULL_SCAN_THRESHOLD'),
+        on_disk=hnsw.get('ON_DISK', False),
+    )
+
+
+def quantization_config(settings: Optional[dict] = None):
+    """
+    Build the quantization parameters of the collection.
+
+    Args:
+        settings (dict, optional): A COLLECTION-like section, defaults to the configured one.
+
+    Returns:
+        models.ScalarQuantization, models.BinaryQuantization or None: None when quantization is off.
+
+    Raises:
+        CustomException: If the quantization type is unknown.
+    """
+    quantization = (settings if settings is not None else collection_config).get('QUANTIZATION', {}) or {}
+    kind = str(quantization.get('TYPE') or "none").lower()
+    always_ram = quantization.get('ALWAYS_RAM', True)
+    if kind == "none":
+        return None
+    if kind == "scalar":
+        return models.ScalarQuantization(scalar=models.ScalarQuantizationConfig(
+            type=models.ScalarType.INT8,
+            quantile=quantization.get('QUANTILE', 0.99),
+            always_ram=always_ram,
+        ))
+    if kind == "binary":
+        return models.BinaryQuantization(binary=models.BinaryQuantizationConfig(always_ram=always_ram))
+    raise CustomException(f"Unknown quantization type: {kind}", sys)
+
+
+def search_params(settings: Optional[dict] = None) -> models.SearchParams:
+    """
+    Build the search-time parameters matching the collection layout.
+
+    Args:
+        settings (dict, optional): A COLLECTION-like section, defaults to the configured one.
+
+    Returns:
+        models.SearchParams: The HNSW beam width and, with quantization, the rescoring policy.
+    """
+    settings = settings if settings is not None else collection_config
+    quantization = settings.get('QUANTIZATION', {}) or {}
+    quantized = str(quantization.get('TYPE') or "none").lower() != "none"
+    return models.SearchParams(
+        hnsw_ef=settings.get('SEARCH_EF', 128),
+        quantization=models.QuantizationSearchParams(
+            rescore=quantization.get('RESCORE', True),
+            oversampling=quantization.get('OVERSAMPLING', 2.0),
+        ) if quantized else None,
+    )
+
+
+def build_filter(filters: Optional[dict]) -> Optional[models.Filter]:
+    """
+    Translate a metadata filter into a Qdrant filter.
+
+    A filter maps metadata fields to a value, a list of accepted values, or a
+    range such as ``{"gte": 2, "lte": 10}``, e.g.
+    ``{"source": ["a.pdf", "b.pdf"], "page": {"lte": 10}}``.
+
+    Args:
+        filters (dict, optional): The metadata filter.
+
+    Returns:
+        models.Filter or None: A filter matching every condition, or None when there are none.
+    """
+    if not filters:
+        return None
+    conditions = []
+    for field, value in filters.items():
+        key = f"{METADATA_KEY}.{field}"
+        if isinstance(value, dict):
+            conditions.append(models.FieldCondition(
+                key=key, range=models.Range(**{op: value[op] for op in RANGE_OPERATORS if op in value})
+            ))
+        elif isinstance(value, (list, tuple, set)):
+            conditions.append(models.FieldCondition(key=key, match=models.MatchAny(any=list(value))))
+        else:
+            conditions.append(models.FieldCondition(key=key, match=models.MatchValue(value=value)))
+    return models.Filter(must=conditions)
+
+
+def ensure_payload_indexes(client, collection_name: str, settings: Optional[dict] = None) -> None:
+    """
+    Create the configured payload indexes that the collection does not have yet.
+
+    Args:
+        client (QdrantClient): Qdrant client.
+        collection_name (str): The collection.
+        settings (dict, optional): A COLLECTION-like section, defaults to the configured one.
+    """
+    settings = settings if settings is not None else collection_config
+    indexes = settings.get('PAYLOAD_INDEXES', {}) or {}
+    existing = client.get_collection(collection_name).payload_schema or {}
+    for field, schema in indexes.items():
+        if field in existing:
+            continue
+        client.create_payload_index(
+            collection_name=collection_name,
+            field_name=field,
+            field_schema=PAYLOAD_SCHEMAS[str(schema).lower()],
+            wait=True,
+        )
+        logger.info(f"Created {schema} payload index on {field} in {collection_name}")
+
+
+def ensure_collection(client, collection_name: str, vector_size: Union[int, Callable[[], int]],
+                      settings: Optional[dict] = None, recreate: bool = False) -> bool:
+    """
+    Create the collection with the configured layout if it does not exist, then add its payload indexes.
+
+    Args:
+        client (QdrantClient): Qdrant client.
+        collection_name (str): The collection.
+        vector_size (int or Callable): Embedding size, or a callable returning it, only
+            called when the collection has to be created.
+        settings (dict, optional): A COLLECTION-like section, defaults to the configured one.
+        recreate (bool): Drop the collection first if it exists.
+
+    Returns:
+        bool: True if the collection was created.
+
+    Raises:
+        CustomException: If the collection cannot be created.
+    """
+    settings = settings if settings is not None else collection_config
+    try:
+        exists = client.collection_exists(collection_name)
+        if exists and recreate:
+            client.delete_collection(collection_name)
+            exists = False
+        if not exists:
+            size = vector_size() if callable(vector_size) else vector_size
+            client.create_collection(
+                collection_name=collection_name,
+                vectors_config=models.VectorParams(
+                    size=size,
+                    distance=DISTANCES[str(settings.get('DISTANCE', "cosine")).lower()],
+                    on_disk=settings.get('ON_DISK', False),
+                ),
+                hnsw_config=hnsw_config(settings),
+                quantization_config=quantization_config(settings),
+            )
+            logger.info(f"Created collection {collection_name} with {size}-dimensional vectors")
+        ensure_payload_indexes(client, collection_name, settings)
+        return not exists
+    except Exception as e:
+        logger.error(f"Error preparing collection {collection_name}: {str(e)}")
+        raise CustomException(f"Error preparing collection {collection_name}: {str(e)}", sys)
+
+
+def apply_collection_layout(client, collection_name: str, settings: Optional[dict] = None) -> None:
+    """
+    Bring an existing collection to the configured layout; Qdrant rebuilds the index in the background.
+
+    Args:
+        client (QdrantClient): Qdrant client.
+        collection_name (str): The collection.
+        settings (dict, optional): A COLLECTION-like section, defaults to the configured one.
+
+    Raises:
+        CustomException: If the collection cannot be updated.
+    """
+    settings = settings if settings is not None else collection_config
+    try:
+        quantization = quantization_config(settings)
+        client.update_collection(
+            collection_name=collection_name,
+            vectors_config={"": models.VectorParamsDiff(on_disk=settings.get('ON_DISK', False))},
+            hnsw_config=hnsw_config(settings),
+            quantization_config=quantization if quantization is not None else models.Disabled.DISABLED,
+        )
+        ensure_payload_indexes(client, collection_name, settings)
+        logger.info(f"Applied the configured layout to collection {collection_name}")
+    except Exception as e:
+        logger.error(f"Error updating collection {collection_name}: {str(e)}")
+        raise CustomException(f"Error updating collection {collection_name}: {str(e)}", sys)
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Apply the COLLECTION layout to an existing Qdrant collection.")
+    parser.add_argument("--collection", default=config.get('RETRIEVAL', {}).get('COLLECTION_NAME', "policy-agent"))
+    args = parser.parse_args()
+
+    from qdrant_client import QdrantClient
+    qdrant_client = QdrantClient(url=os.getenv("QDRANT_URL"), api_key=os.getenv("QDRANT_API_KEY"))
+    apply_collection_layout(qdrant_client, args.collection)
+    print(f"Applied the configured layout to {args.collection}")
@@ -0,0 +1,314 @@
+import os
+import re
+import sys
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+from app.backend.utils import get_hyperparameters_from_file
+from app.backend.sparse_index import SparseIndex, PROJECT_ROOT, hybrid_config
+from app.backend.ingestion_manifest import IngestionManifest, ingestion_config
+from custom_logger import logger
+from custom_exceptions import CustomException
+
+# Loading hyper parameters from the yaml file
+config = get_hyperparameters_from_file()
+corpora_config = config.get('CORPORA', {})
+routing_config = corpora_config.get('ROUTING', {}) or {}
+retrieval_config = config.get('RETRIEVAL', {})
+
+DEFAULT_CORPUS = corpora_config.get('DEFAULT', "policy")
+CORPUS_NAME_PATTERN = re.compile(r"^[a-z0-9][a-z0-9_-]{0,63}$")
+
+
+def validate_corpus(corpus: Optional[str]) -> str:
+    """
+    Check a corpus name, defaulting to the configured default corpus.
+
+    Args:
+        corpus (str, optional): The corpus name.
+
+    Returns:
+        str: The corpus name.
+
+    Raises:
+        CustomException: If the name is not lowercase letters, digits, '-' or '_'.
+    """
+    corpus = corpus or DEFAULT_CORPUS
+    if not CORPUS_NAME_PATTERN.match(corpus):
+        raise CustomException(f"Invalid corpus name: {corpus}", sys)
+    return corpus
+
+
+def collection_for(corpus: Optional[str]) -> str:
+    """
+    Return the Qdrant collection holding a corpus.
+
+    The default corpus keeps RETRIEVAL.COLLECTION_NAME, other corpora use
+    CORPORA.COLLECTIONS or '<COLLECTION_NAME>-<corpus>'.
+
+    Args:
+        corpus (str, optional): The corpus name.
+
+    Returns:
+        str: The collection name.
+    """
+    corpus = validate_corpus(corpus)
+    base = retrieval_config.get('COLLECTION_NAME', "policy-agent")
+    collections = corpora_config.get('COLLECTIONS', {}) or {}
+    if corpus in collections:
+        return collections[corpus]
+    return base if corpus == DEFAULT_CORPUS else f"{base}-{corpus}"
+
+
+def corpus_path(corpus: Optional[str], path: str) -> str:
+    """
+    Return the location of a per-corpus file.
+
+    The default corpus keeps the configured path, other corpora get the same file
+    name under CORPORA.DATA_DIR/<corpus>.
+
+    Args:
+        corpus (str, optional): The corpus name.
+        path (str): The configured path of the file.
+
+    Returns:
+        str: The absolute path.
+    """
+    corpus = validate_corpus(corpus)
+    if corpus != DEFAULT_CORPUS:
+        path = os.path.join(corpora_config.get('DATA_DIR', "data/corpora"), corpus, os.path.basename(path))
+    return path if os.path.isabs(path) else os.path.join(PROJECT_ROOT, path)
+
+
+class CorpusStorage:
+    """
+    The indexes of one corpus: its Qdrant collection, keyword index and ingestion manifest.
+
+    Attributes:
+        name (str): The corpus name.
+        collection_name (str): The Qdrant collection.
+        manifest (IngestionManifest): Chunks already indexed per source document.
+        sparse_index (SparseIndex): Keyword index used by hybrid search.
+    """
+
+    def __init__(self, corpus: Optional[str] = None):
+        """
+        Open the indexes of a corpus, creating them on first use.
+
+        Args:
+            corpus (str, optional): The corpus name, defaults to the default corpus.
+        """
+        self.name = validate_corpus(corpus)
+        self.collection_name = collection_for(self.name)
+        self.manifest = IngestionManifest(corpus_path(
+            self.name, ingestion_config.get('MANIFEST_PATH', "data/ingestion_manifest.sqlite")
+        ))
+        self.sparse_index = SparseIndex(corpus_path(
+            self.name, hybrid_config.get('INDEX_PATH', "data/sparse_index.sqlite")
+        ))
+
+
+class CorpusIndex:
+    """
+    Document-level embedding centroids of every corpus, stored in SQLite.
+
+    Each document keeps the sum and count of its chunk embeddings, so routing a
+    query costs one matrix product against a few hundred document centroids
+    instead of a search in every collection.
+
+    Attributes:
+        path (str): Location of the SQLite database.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Open the index, creating the database on first use.
+
+        Args:
+            path (str, optional): Database path, defaults to CORPORA.INDEX_PATH.
+        """
+        path = path or corpora_config.get('INDEX_PATH', "data/corpus_index.sqlite")
+        self.path = path if os.path.isabs(path) else os.path.join(PROJECT_ROOT, path)
+        self._lock = threading.Lock()
+        self._snapshot = None
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS documents (corpus TEXT NOT NULL, source TEXT NOT NULL, "
+                "count INTEGER NOT NULL, vector_sum BLOB NOT NULL, PRIMARY KEY (corpus, source))"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _accumulate(self, corpus: str, source: str, vectors: Sequence[Sequence[float]], sign: int) -> None:
+        if not len(vectors):
+            return
+        delta = np.asarray(vectors, dtype=np.float32)
+        with self._lock, self._connect() as connection:
+            row = connection.execute(
+                "SELECT count, vector_sum FROM documents WHERE corpus = ? AND source = ?", (corpus, source)
+            ).fetchone()
+            count, total = (row[0], np.frombuffer(row[1], dtype=np.float32)) if row else (0, 0.0)
+            count += sign * len(delta)
+            total = total + sign * delta.sum(axis=0)
+            if count <= 0:
+                connection.execute("DELETE FROM documents WHERE corpus = ? AND source = ?", (corpus, source))
+            else:
+                connection.execute(
+                    "INSERT OR REPLACE INTO documents (corpus, source, count, vector_sum) VALUES (?, ?, ?, ?)",
+                    (corpus, source, count, np.asarray(total, dtype=np.float32).tobytes()),
+                )
+
+    def add(self, corpus: str, source: str, vectors: Sequence[Sequence[float]]) -> None:
+        """
+        Add the embeddings of new chunks to a document's centroid.
+
+        Args:
+            corpus (str): The corpus name.
+            source (str): The document source.
+            vectors (Sequence): The chunk embeddings.
+        """
+        self._accumulate(corpus, source, vectors, 1)
+
+    def subtract(self, corpus: str, source: str, vectors: Sequence[Sequence[float]]) -> None:
+        """
+        Remove the embeddings of deleted chunks from a document's centroid.
+
+        Args:
+            corpus (str): The corpus name.
+            source (str): The document source.
+            vectors (Sequence): The embeddings of the deleted chunks.
+        """
+        self._accumulate(corpus, source, vectors, -1)
+
+    def remove(self, corpus: str, source: str) -> None:
+        """
+        Forget a document.
+
+        Args:
+            corpus (str): The corpus name.
+            source (str): The document source.
+        """
+        with self._lock, self._connect() as connection:
+            connection.execute("DELETE FROM documents WHERE corpus = ? AND source = ?", (corpus, source))
+
+    def corpora(self) -> Dict[str, int]:
+        """
+        Return the corpora with their number of documents.
+
+        Returns:
+            dict: Corpus name to number of documents.
+        """
+        with self._connect() as connection:
+            rows = connection.execute("SELECT corpus, COUNT(*) FROM documents GROUP BY corpus ORDER BY corpus")
+            return dict(rows.fetchall())
+
+    def _centroids(self):
+        """Return the normalized document centroids and their corpora, reloaded when the database changes."""
+        stamp = os.stat(self.path).st_mtime_ns
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot[0] == stamp:
+            return snapshot[1], snapshot[2]
+        with self._connect() as connection:
+            rows = connection.execute("SELECT corpus, vector_sum FROM documents ORDER BY corpus").fetchall()
+        corpora = np.array([corpus for corpus, _ in rows])
+        if rows:
+            matrix = np.stack([np.frombuffer(raw, dtype=np.float32) for _, raw in rows])
+            matrix = matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+        else:
+            matrix = np.zeros((0, 0), dtype=np.float32)
+        self._snapshot = (stamp, matrix, corpora)
+        return matrix, corpora
+
+    def route(self, vectors: Sequence[Sequence[float]], max_corpora: Optional[int] = None,
+              margin: Optional[float] = None, min_similarity: Optional[float] = None) -> List[List[str]]:
+        """
+        Pick the corpora to search for each query by similarity to their document centroids.
+
+        A corpus scores the similarity of its closest document. The best corpus is
+        kept along with those within ``margin`` of it; when even the best score is
+        below ``min_similarity`` the query is too unspecific and every corpus is searched.
+
+        Args:
+            vectors (Sequence): Query embeddings.
+            max_corpora (int, optional): Overrides CORPORA.ROUTING.MAX_CORPORA.
+            margin (float, optional): Overrides CORPORA.ROUTING.MARGIN.
+            min_similarity (float, optional): Overrides CORPORA.ROUTING.MIN_SIMILARITY.
+
+        Returns:
+            List[List[str]]: The corpora of each query, best first.
+        """
+        max_corpora = max_corpora or routing_config.get('MAX_CORPORA', 2)
+        margin = routing_config.get('MARGIN', 0.03) if margin is None else margin
+        min_similarity = routing_config.get('MIN_SIMILARITY', 0.75) if min_similarity is None else min_similarity
+        matrix, corpora = self._centroids()
+        names = sorted(set(corpora.tolist()))
+        if len(names) <= 1:
+            return [names or [DEFAULT_CORPUS] for _ in vectors]
+        queries = np.asarray(vectors, dtype=np.float32)
+        queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+        similarities = queries @ matrix.T
+        routes = []
+        for row in similarities:
+            scores = {name: float(row[corpora == name].max()) for name in names}
+            ranked = sorted(scores, key=scores.get, reverse=True)
+            best = scores[ranked[0]]
+            if best < min_similarity:
+                routes.append(ranked)
+            else:
+                routes.append([name for name in ranked if scores[name] >= best - margin][:max_corpora])
+        return routes
+
+
+_corpus_index = None
+_corpus_index_lock = threading.Lock()
+
+
+def get_corpus_index() -> CorpusIndex:
+    """
+    Return the process-wide corpus index.
+
+    Returns:
+        CorpusIndex: The shared index.
+    """
+    global _corpus_index
+    if _corpus_index is None:
+        with _corpus_index_lock:
+            if _corpus_index is None:
+                _corpus_index = CorpusIndex()
+    return _corpus_index
+
+
+def known_corpora() -> List[str]:
+    """
+    Return the corpora that have indexed documents, always including the default corpus.
+
+    Returns:
+        List[str]: The corpus names.
+    """
+    return sorted(set(get_corpus_index().corpora()) | {DEFAULT_CORPUS})
+
+
+def resolve_corpora(corpora: Optional[Sequence[str]]) -> Optional[List[str]]:
+    """
+    Validate the corpora requested explicitly.
+
+    Args:
+        corpora (Sequence[str], optional): The requested corpora, None or empty to route automatically.
+
+    Returns:
+        List[str] or None: The validated corpora, or None to route.
+
+    Raises:
+        CustomException: If a corpus does not exist.
+    """
+    if not corpora:
+        return None
+    known = set(known_corpora())
+    unknown = [corpus for corpus in corpora if validate_corpus(corpus) not in known]
+    if unknown:
+        logger.error(f"Unknown corpora requested: {unknown}")
+        raise CustomException(f"Unknown corpora: {', '.join(unknown)}", sys)
+    return list(dict.fromkeys(corpora))
@@ -28,10 +28,13 @@ class ReportAgents:
         )
 
     @staticmethod
-    def policy_agent():
+    def policy_agent(corpora=None):
         """
         Creates an agent specialized in extracting answers for policy-related queries.
 
+        Args:
+            corpora (list, optional): Corpora searched by the report tool, routed per query when omitted.
+
         Returns:
             Agent: The policy expert agent.
         """
@@ -45,15 +48,18 @@ class ReportAgents:
                 answers to generic policy-related questions. Your expertise helps ensure 
                 that the user receives reliable information for their queries.
             """),
-            tools=[ReportTool()],
+            tools=[ReportTool(corpora=corpora)],
             allow_delegation=False
         )
 
     @staticmethod
-    def financial_agent():
+    def financial_agent(corpora=None):
         """
         Creates an agent specialized in extracting financial data for queries.
 
+        Args:
+            corpora (list, optional): Corpora searched by the report tool, routed per query when omitted.
+
         Returns:
             Agent: The financial expert agent.
         """
@@ -67,7 +73,7 @@ class ReportAgents:
                 answers to generic finance questions. Your expertise helps ensure 
                 that the user receives reliable information for their queries.
             """),
-            tools=[ReportTool()],
+            tools=[ReportTool(corpora=corpora)],
             allow_delegation=False
         )
 
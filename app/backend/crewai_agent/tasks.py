@@ -31,17 +31,20 @@ class ReportTasks:
             agent=agent
         )
 
-    def policy_task(self, agent):
+    def policy_task(self, agent, corpora=None, context=None, async_execution=False):
         """
         Creates a policy extraction task.
 
         Args:
             agent (Agent): The agent responsible for extracting policy-related information.
+            corpora (list, optional): Corpora searched by the report tool, routed per query when omitted.
+            context (list, optional): Tasks whose output the task reads, the previous task when omitted.
+            async_execution (bool): Run concurrently with the following tasks.
 
         Returns:
             Task: The policy task.
         """
-        return Task(
+        task = Task(
             description=dedent("""
                     "You have the following tasks"
                     "1.Create a single comprehensive question from the summary provided by summary agent which includes all financial, date, and project-related data"
@@ -57,21 +60,29 @@ class ReportTasks:
             expected_output=dedent("""
                 A detailed and comprehensive document containing all the relevant eligibility criteria, compliance criteria, and application procedure, fees about the project.
             """),
-            tools=[ReportTool()],
+            tools=[ReportTool(corpora=corpora)],
             agent=agent,
+            async_execution=async_execution,
         )
+        if context is not None:
+            # Unset context means the previous task's output, an explicit one replaces it
+            task.context = context
+        return task
 
-    def financial_task(self, agent):
+    def financial_task(self, agent, corpora=None, context=None, async_execution=False):
         """
         Creates a financial options extraction task.
 
         Args:
             agent (Agent): The agent responsible for extracting financial options.
+            corpora (list, optional): Corpora searched by the report tool, routed per query when omitted.
+            context (list, optional): Tasks whose output the task reads, the previous task when omitted.
+            async_execution (bool): Run concurrently with the following tasks.
 
         Returns:
             Task: The financial task.
         """
-        return Task(
+        task = Task(
             description=dedent("""
                     "You have the following tasks"
                     "1.Create a single comprehensive question from the summary provided by summary agent which includes all financial, date, and project-related data"
@@ -86,21 +97,26 @@ class ReportTasks:
             expected_output=dedent("""
                 Use the retrieved docs to formulate all the financial options, subsidies, grants, and their benefits related to the project.
             """),
-            tools=[ReportTool()],
-            agent=agent
+            tools=[ReportTool(corpora=corpora)],
+            agent=agent,
+            async_execution=async_execution,
         )
+        if context is not None:
+            task.context = context
+        return task
 
-    def report_task(self, agent):
+    def report_task(self, agent, context=None):
         """
         Creates a report generation task.
 
         Args:
             agent (Agent): The agent responsible for generating the report.
+            context (list, optional): Tasks whose output the report is built from, the previous task when omitted.
 
         Returns:
             Task: The report task.
         """
-        return Task(
+        task = Task(
             description=dedent("""
                     "You have the following tasks"
                     "1.Collect the answers generated by policy_agenst and financial agent"
@@ -113,3 +129,6 @@ class ReportTasks:
             """),
             agent=agent
         )
+        if context is not None:
+            task.context = context
+        return task
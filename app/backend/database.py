@@ -1,5 +1,6 @@
 import os
 import redis
+import redis.asyncio
 import logging
 from dotenv import load_dotenv
 
@@ -46,6 +47,21 @@ def get_redis_client():
         logger.error("Unexpected error:", exc_info=True)
         raise ValueError(f"An unexpected error occurred: {e}")
 
+def get_async_redis_client():
+    """
+    Create an asyncio Redis client sharing the connection settings of the sync client.
+
+    Returns:
+        redis.asyncio.Redis: A reference to the asyncio Redis client.
+    """
+    if not REDIS_HOST or not REDIS_PORT or not REDIS_PASSWORD:
+        raise ValueError("Redis connection details are not set in environment variables.")
+    return redis.asyncio.Redis(
+        host=REDIS_HOST,
+        port=REDIS_PORT,
+        password=REDIS_PASSWORD
+    )
+
 # Get Redis client
 redis_client = get_redis_client()
 
@@ -59,4 +75,4 @@ if __name__ == "__main__":
     except Exception as e:
         logger.error(f"Failed to use Redis client: {e}")
 
-__all__ = ["redis_client"]
+__all__ = ["redis_client", "get_async_redis_client"]
@@ -0,0 +1,316 @@
+import hashlib
+import threading
+import unicodedata
+from array import array
+from collections import OrderedDict
+from typing import List, Optional
+from langchain_core.embeddings import Embeddings
+from app.backend.utils import (
+    get_hyperparameters_from_file,
+    get_optional_async_redis_client,
+    get_optional_redis_client,
+)
+from custom_logger import logger
+
+# Loading hyper parameters from the yaml file
+config = get_hyperparameters_from_file()
+cache_config = config.get('EMBEDDING_CACHE', {})
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize text so trivially different spellings share a cache entry.
+
+    Args:
+        text (str): The raw text.
+
+    Returns:
+        str: Unicode-normalized, lower-cased text with collapsed whitespace.
+    """
+    return " ".join(unicodedata.normalize("NFKC", text).lower().split())
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper with an in-process LRU tier and an optional Redis tier.
+
+    Entries are keyed by model name and normalized text, so repeated questions
+    skip the embedding round trip entirely.
+
+    Attributes:
+        embeddings (Embeddings): The wrapped embeddings client.
+        model_name (str): Model name used in the cache key.
+        max_entries (int): Capacity of the in-process LRU tier.
+        hits_memory (int): Lookups served from the in-process tier.
+        hits_redis (int): Lookups served from the Redis tier.
+        misses (int): Lookups that required an embedding call.
+    """
+
+    def __init__(self, embeddings: Embeddings, model_name: str, max_entries: Optional[int] = None,
+                 use_redis: Optional[bool] = None, redis_ttl: Optional[int] = None,
+                 async_redis_client=None):
+        """
+        Initialize the cache around an embeddings client.
+
+        Args:
+            embeddings (Embeddings): The wrapped embeddings client.
+            model_name (str): Model name used in the cache key.
+            max_entries (int, optional): Capacity of the in-process tier.
+            use_redis (bool, optional): Whether to use the Redis tier.
+            redis_ttl (int, optional): Expiry of Redis entries in seconds.
+            async_redis_client (redis.asyncio.Redis, optional): Client used by the async methods.
+        """
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.max_entries = max_entries or cache_config.get('MAX_ENTRIES', 4096)
+        self.redis_ttl = redis_ttl or cache_config.get('REDIS_TTL_SECONDS', 7 * 24 * 3600)
+        if use_redis is None:
+            use_redis = cache_config.get('USE_REDIS', True)
+        self._redis = get_optional_redis_client() if use_redis else None
+        self._async_redis = async_redis_client or (get_optional_async_redis_client() if use_redis else None)
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits_memory = 0
+        self.hits_redis = 0
+        self.misses = 0
+
+    def _key(self, text: str) -> str:
+        """
+        Build the cache key for a text.
+
+        Args:
+            text (str): The text to embed.
+
+        Returns:
+            str: The cache key.
+        """
+        digest = hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+        return f"embedding:{self.model_name}:{digest}"
+
+    def _remember(self, key: str, vector: List[float]):
+        """
+        Store a vector in the in-process tier, evicting the least recently used entry.
+        """
+        with self._lock:
+            self._memory[key] = vector
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _lookup_memory(self, keys: List[str]) -> List[Optional[List[float]]]:
+        """
+        Look keys up in the in-process tier.
+
+        Args:
+            keys (List[str]): Cache keys.
+
+        Returns:
+            List[Optional[List[float]]]: Cached vectors, None for misses.
+        """
+        vectors = [None] * len(keys)
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    vectors[i] = vector
+                    self.hits_memory += 1
+        return vectors
+
+    def _fill_from_redis(self, keys: List[str], vectors: List[Optional[List[float]]], pending: List[int],
+                         raw_values: List[Optional[bytes]]):
+        """
+        Decode the Redis values of pending keys into vectors and promote them to the in-process tier.
+        """
+        for i, raw in zip(pending, raw_values):
+            if raw is not None:
+                vector = array('f', raw).tolist()
+                vectors[i] = vector
+                self._remember(keys[i], vector)
+                with self._lock:
+                    self.hits_redis += 1
+
+    def _lookup(self, keys: List[str]) -> List[Optional[List[float]]]:
+        """
+        Look keys up in the in-process tier, then in Redis.
+
+        Args:
+            keys (List[str]): Cache keys.
+
+        Returns:
+            List[Optional[List[float]]]: Cached vectors, None for misses.
+        """
+        vectors = self._lookup_memory(keys)
+        pending = [i for i, vector in enumerate(vectors) if vector is None]
+        if pending and self._redis is not None:
+            try:
+                raw_values = self._redis.mget([keys[i] for i in pending])
+            except Exception as e:
+                logger.warning(f"Redis embedding cache lookup failed: {e}")
+                raw_values = [None] * len(pending)
+            self._fill_from_redis(keys, vectors, pending, raw_values)
+        return vectors
+
+    async def _alookup(self, keys: List[str]) -> List[Optional[List[float]]]:
+        """
+        Async variant of _lookup using the asyncio Redis client.
+
+        Args:
+            keys (List[str]): Cache keys.
+
+        Returns:
+            List[Optional[List[float]]]: Cached vectors, None for misses.
+        """
+        vectors = self._lookup_memory(keys)
+        pending = [i for i, vector in enumerate(vectors) if vector is None]
+        if pending and self._async_redis is not None:
+            try:
+                raw_values = await self._async_redis.mget([keys[i] for i in pending])
+            except Exception as e:
+                logger.warning(f"Redis embedding cache lookup failed: {e}")
+                raw_values = [None] * len(pending)
+            self._fill_from_redis(keys, vectors, pending, raw_values)
+        return vectors
+
+    def _store(self, keys: List[str], vectors: List[List[float]]):
+        """
+        Write freshly computed vectors to both tiers.
+        """
+        for key, vector in zip(keys, vectors):
+            self._remember(key, vector)
+        if self._redis is not None:
+            try:
+                pipeline = self._redis.pipeline()
+                for key, vector in zip(keys, vectors):
+                    pipeline.set(key, array('f', vector).tobytes(), ex=self.redis_ttl)
+                pipeline.execute()
+            except Exception as e:
+                logger.warning(f"Redis embedding cache write failed: {e}")
+
+    async def _astore(self, keys: List[str], vectors: List[List[float]]):
+        """
+        Async variant of _store using the asyncio Redis client.
+        """
+        for key, vector in zip(keys, vectors):
+            self._remember(key, vector)
+        if self._async_redis is not None:
+            try:
+                pipeline = self._async_redis.pipeline()
+                for key, vector in zip(keys, vectors):
+                    pipeline.set(key, array('f', vector).tobytes(), ex=self.redis_ttl)
+                await pipeline.execute()
+            except Exception as e:
+                logger.warning(f"Redis embedding cache write failed: {e}")
+
+    @staticmethod
+    def _missing(keys: List[str], texts: List[str], vectors: List[Optional[List[float]]]) -> OrderedDict:
+        """
+        Collect the texts that missed both tiers, deduplicated by cache key.
+
+        Returns:
+            OrderedDict: Cache key to text, so repeated texts in one batch are embedded once.
+        """
+        missing = OrderedDict()
+        for i, vector in enumerate(vectors):
+            if vector is None:
+                missing.setdefault(keys[i], texts[i])
+        return missing
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed a list of texts, calling the wrapped client only for cache misses.
+
+        Args:
+            texts (List[str]): Texts to embed.
+
+        Returns:
+            List[List[float]]: One vector per text.
+        """
+        keys = [self._key(text) for text in texts]
+        vectors = self._lookup(keys)
+        missing = self._missing(keys, texts, vectors)
+        if missing:
+            with self._lock:
+                self.misses += len(missing)
+            computed = self.embeddings.embed_documents(list(missing.values()))
+            self._store(list(missing.keys()), computed)
+            by_key = dict(zip(missing.keys(), computed))
+            vectors = [vector if vector is not None else by_key[key] for key, vector in zip(keys, vectors)]
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        """
+        Embed a single query, serving it from the cache when possible.
+
+        Args:
+            text (str): The query to embed.
+
+        Returns:
+            List[float]: The query vector.
+        """
+        key = self._key(text)
+        (vector,) = self._lookup([key])
+        if vector is None:
+            with self._lock:
+                self.misses += 1
+            vector = self.embeddings.embed_query(text)
+            self._store([key], [vector])
+        return vector
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        Async variant of embed_documents using the async Redis and embeddings clients.
+
+        Args:
+            texts (List[str]): Texts to embed.
+
+        Returns:
+            List[List[float]]: One vector per text.
+        """
+        keys = [self._key(text) for text in texts]
+        vectors = await self._alookup(keys)
+        missing = self._missing(keys, texts, vectors)
+        if missing:
+            with self._lock:
+                self.misses += len(missing)
+            computed = await self.embeddings.aembed_documents(list(missing.values()))
+            await self._astore(list(missing.keys()), computed)
+            by_key = dict(zip(missing.keys(), computed))
+            vectors = [vector if vector is not None else by_key[key] for key, vector in zip(keys, vectors)]
+        return vectors
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """
+        Async variant of embed_query using the async Redis and embeddings clients.
+
+        Args:
+            text (str): The query to embed.
+
+        Returns:
+            List[float]: The query vector.
+        """
+        key = self._key(text)
+        (vector,) = await self._alookup([key])
+        if vector is None:
+            with self._lock:
+                self.misses += 1
+            vector = await self.embeddings.aembed_query(text)
+            await self._astore([key], [vector])
+        return vector
+
+    def stats(self) -> dict:
+        """
+        Return the cache counters.
+
+        Returns:
+            dict: Hit and miss counters plus the current in-process size.
+        """
+        with self._lock:
+            lookups = self.hits_memory + self.hits_redis + self.misses
+            return {
+                "hits_memory": self.hits_memory,
+                "hits_redis": self.hits_redis,
+                "misses": self.misses,
+                "hit_rate": (self.hits_memory + self.hits_redis) / lookups if lookups else 0.0,
+                "size": len(self._memory),
+            }
@@ -0,0 +1,286 @@
+import os
+import re
+import sys
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import List, Optional
+import openai
+from openai import OpenAI
+from langchain_core.embeddings import Embeddings
+from app.backend.utils import get_hyperparameters_from_file
+from custom_logger import logger
+from custom_exceptions import CustomException
+
+# Loading hyper parameters from the yaml file
+config = get_hyperparameters_from_file()
+scheduler_config = config.get('EMBEDDING_SCHEDULER', {})
+
+DURATION_PATTERN = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+RETRYABLE_ERRORS = (openai.APIConnectionError, openai.APITimeoutError, openai.InternalServerError)
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a rate-limit reset duration such as '1s', '6m0s' or '20ms'.
+
+    Args:
+        value (str, optional): The header value.
+
+    Returns:
+        float or None: The duration in seconds, or None if it cannot be parsed.
+    """
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        parts = DURATION_PATTERN.findall(value)
+        return sum(float(amount) * DURATION_UNITS[unit] for amount, unit in parts) if parts else None
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate the token count of a text, about four characters per token."""
+    return max(1, len(text) // 4)
+
+
+class EmbeddingScheduler(Embeddings):
+    """
+    Embeddings client that runs several batches concurrently and adapts to rate limits.
+
+    Batch size and concurrency grow additively while requests are fast and the
+    rate-limit headers show headroom, and are halved on a 429. Failed requests
+    are retried with jittered exponential backoff, honoring ``retry-after``.
+
+    Attributes:
+        model (str): Embedding model name.
+        batch_size (int): Current number of texts per request.
+        concurrency (int): Current number of requests in flight.
+        chunks (int): Texts embedded so far.
+        tokens (int): Tokens embedded so far, as reported by the API.
+        requests (int): Successful requests.
+        retries (int): Retried requests.
+        rate_limited (int): Requests rejected with a 429.
+    """
+
+    def __init__(self, model: str, api_key: Optional[str] = None, base_url: Optional[str] = None):
+        """
+        Initialize the scheduler.
+
+        Args:
+            model (str): Embedding model name.
+            api_key (str, optional): OpenAI API key, defaults to OPENAI_API_KEY.
+            base_url (str, optional): API base URL, defaults to EMBEDDING_SCHEDULER.BASE_URL,
+                e.g. the local fake server in evals/fake_embeddings_server.py.
+        """
+        self.model = model
+        base_url = base_url or scheduler_config.get('BASE_URL') or None
+        # Retries are handled here so that rate limits also shrink the load
+        self.client = OpenAI(api_key=api_key or os.getenv("OPENAI_API_KEY"), base_url=base_url, max_retries=0)
+        self.min_batch_size = scheduler_config.get('MIN_BATCH_SIZE', 8)
+        self.max_batch_size = scheduler_config.get('MAX_BATCH_SIZE', 512)
+        self.max_concurrency = scheduler_config.get('MAX_CONCURRENCY', 8)
+        self.target_latency = scheduler_config.get('TARGET_LATENCY_SECONDS', 2.0)
+        self.max_retries = scheduler_config.get('MAX_RETRIES', 6)
+        self.backoff_base = scheduler_config.get('BACKOFF_BASE_SECONDS', 0.5)
+        self.backoff_max = scheduler_config.get('BACKOFF_MAX_SECONDS', 30.0)
+        self.batch_size = scheduler_config.get('INITIAL_BATCH_SIZE', 64)
+        self.concurrency = scheduler_config.get('INITIAL_CONCURRENCY', 2)
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self._paused_until = 0.0
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        """Reset the throughput counters."""
+        with self._condition:
+            self.chunks = 0
+            self.tokens = 0
+            self.requests = 0
+            self.retries = 0
+            self.rate_limited = 0
+            self._first_request = None
+            self._last_response = None
+
+    def _acquire(self) -> None:
+        """Wait for a request slot under the current concurrency and any rate-limit pause."""
+        with self._condition:
+            while True:
+                pause = self._paused_until - time.monotonic()
+                if pause <= 0 and self._in_flight < self.concurrency:
+                    break
+                self._condition.wait(timeout=pause if pause > 0 else None)
+            if self._first_request is None:
+                self._first_request = time.monotonic()
+            self._in_flight += 1
+
+    def _release(self) -> None:
+        with self._condition:
+            self._in_flight -= 1
+            self._last_response = time.monotonic()
+            self._condition.notify_all()
+
+    @staticmethod
+    def _headroom(headers) -> dict:
+        """
+        Read the remaining share of the request and token budgets from rate-limit headers.
+
+        Args:
+            headers (Mapping): Response headers.
+
+        Returns:
+            dict: 'requests' and 'tokens' fractions in [0, 1], 1.0 when a header is absent.
+        """
+        headroom = {}
+        for kind in ("requests", "tokens"):
+            limit = headers.get(f"x-ratelimit-limit-{kind}")
+            left = headers.get(f"x-ratelimit-remaining-{kind}")
+            headroom[kind] = float(left) / max(float(limit), 1.0) if limit and left else 1.0
+        return headroom
+
+    def _on_success(self, latency: float, headers, texts: List[str], usage_tokens: Optional[int]) -> None:
+        """Record a successful request and grow or shrink the load from its latency and headers."""
+        headroom = self._headroom(headers)
+        with self._condition:
+            self.chunks += len(texts)
+            self.tokens += usage_tokens or sum(estimate_tokens(text) for text in texts)
+            self.requests += 1
+            if headroom["tokens"] < 0.1:
+                # Close to the token budget: send less text at once
+                self.concurrency = max(1, self.concurrency - 1)
+                self.batch_size = max(self.min_batch_size, self.batch_size - self.min_batch_size)
+            elif headroom["requests"] < 0.1:
+                # Close to the request budget: fewer, larger requests
+                self.concurrency = max(1, self.concurrency - 1)
+                self.batch_size = min(self.max_batch_size, self.batch_size + self.min_batch_size)
+            elif min(headroom.values()) > 0.5 and latency < self.target_latency:
+                self.concurrency = min(self.max_concurrency, self.concurrency + 1)
+                self.batch_size = min(self.max_batch_size, self.batch_size + self.min_batch_size)
+            elif latency > 2 * self.target_latency:
+                self.batch_size = max(self.min_batch_size, self.batch_size // 2)
+            self._condition.notify_all()
+
+    def _on_rate_limited(self, retry_after: float, headers, texts: List[str]) -> None:
+        """Halve the concurrency and pause every request after a 429."""
+        headroom = self._headroom(headers)
+        with self._condition:
+            self.rate_limited += 1
+            self.concurrency = max(1, self.concurrency // 2)
+            if headroom["tokens"] <= headroom["requests"]:
+                self.batch_size = max(self.min_batch_size, min(self.batch_size, len(texts)) // 2)
+            else:
+                # Rejected for the request count: smaller batches would only make it worse
+                self.batch_size = min(self.max_batch_size, max(self.batch_size, len(texts)) * 2)
+            self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+            logger.warning(
+                f"Embedding rate limited, pausing {retry_after:.2f}s with concurrency "
+                f"{self.concurrency} and batch size {self.batch_size}"
+            )
+
+    def _backoff(self, attempt: int) -> float:
+        """Return an exponential backoff delay with full jitter."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed one batch, retrying rate-limited and transient failures.
+
+        Args:
+            texts (List[str]): The texts of the batch.
+
+        Returns:
+            List[List[float]]: One embedding per text.
+
+        Raises:
+            CustomException: If the batch still fails after MAX_RETRIES retries.
+        """
+        for attempt in range(self.max_retries + 1):
+            delay = 0.0
+            self._acquire()
+            start = time.perf_counter()
+            try:
+                raw = self.client.embeddings.with_raw_response.create(model=self.model, input=texts)
+                response = raw.parse()
+                self._on_success(time.perf_counter() - start, raw.headers, texts,
+                                 getattr(response.usage, "total_tokens", None))
+                return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+            except openai.RateLimitError as e:
+                headers = e.response.headers if e.response is not None else {}
+                retry_after = parse_duration(headers.get("retry-after")) or self._backoff(attempt)
+                self._on_rate_limited(retry_after + random.uniform(0, self.backoff_base), headers, texts)
+                error = e
+            except RETRYABLE_ERRORS as e:
+                delay = self._backoff(attempt)
+                error = e
+            except Exception as e:
+                logger.error(f"Error embedding batch: {str(e)}")
+                raise CustomException(f"Error embedding batch: {str(e)}", sys)
+            finally:
+                self._release()
+            # Transient failures back off without holding a request slot
+            time.sleep(delay)
+            with self._condition:
+                self.retries += 1
+        logger.error(f"Embedding batch failed after {self.max_retries} retries: {error}")
+        raise CustomException(f"Embedding batch failed after {self.max_retries} retries: {error}", sys)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed texts in adaptively sized batches, several at a time.
+
+        Args:
+            texts (List[str]): The texts to embed.
+
+        Returns:
+            List[List[float]]: One embedding per text, in input order.
+        """
+        results = [None] * len(texts)
+        next_index, in_flight = 0, {}
+        with ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="embed") as executor:
+            while next_index < len(texts) or in_flight:
+                while next_index < len(texts) and len(in_flight) < self.concurrency:
+                    stop = min(next_index + self.batch_size, len(texts))
+                    in_flight[executor.submit(self._embed_batch, texts[next_index:stop])] = (next_index, stop)
+                    next_index = stop
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    start, stop = in_flight.pop(future)
+                    results[start:stop] = future.result()
+        return results
+
+    def embed_query(self, text: str) -> List[float]:
+        """
+        Embed a single text.
+
+        Args:
+            text (str): The text to embed.
+
+        Returns:
+            List[float]: The embedding.
+        """
+        return self._embed_batch([text])[0]
+
+    def throughput(self) -> dict:
+        """
+        Return throughput since the first request, rate-limit pauses included.
+
+        Returns:
+            dict: chunks/s, tokens/s, and the request, retry and rate-limit counts.
+        """
+        with self._condition:
+            busy = 0.0
+            if self._first_request is not None:
+                busy = (self._last_response or time.monotonic()) - self._first_request
+            return {
+                "chunks_per_second": self.chunks / busy if busy else 0.0,
+                "tokens_per_second": self.tokens / busy if busy else 0.0,
+                "chunks": self.chunks,
+                "tokens": self.tokens,
+                "requests": self.requests,
+                "retries": self.retries,
+                "rate_limited": self.rate_limited,
+                "batch_size": self.batch_size,
+                "concurrency": self.concurrency,
+            }
@@ -0,0 +1,382 @@
+import os
+import re
+import sys
+import json
+import sqlite3
+import hashlib
+import argparse
+import threading
+from typing import Dict, Iterator, List, Optional
+import numpy as np
+from dotenv import load_dotenv
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from app.backend.utils import get_hyperparameters_from_file
+from app.backend.sparse_index import PROJECT_ROOT
+from app.backend.corpora import DEFAULT_CORPUS, collection_for, validate_corpus
+from custom_logger import logger
+from custom_exceptions import CustomException
+
+# Loading hyper parameters from the yaml file
+config = get_hyperparameters_from_file()
+store_config = config.get('EMBEDDING_STORE', {})
+retrieval_config = config.get('RETRIEVAL', {})
+
+MIN_CAPACITY = 1024
+QUERY_CHUNK = 500
+
+
+def content_hash(text: str) -> str:
+    """
+    Address an embedding by the exact text it was computed from.
+
+    Args:
+        text (str): The embedded text.
+
+    Returns:
+        str: The sha256 hex digest of the text.
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    """
+    Persistent embedding store keyed by (model, content hash).
+
+    Vectors live in one memory-mapped float32 matrix per model, and a SQLite
+    index maps hashes to matrix rows. Chunk payloads are kept alongside, per
+    corpus, so the collection of a corpus can be rebuilt without calling the
+    embedding API.
+
+    Attributes:
+        path (str): Directory holding the matrices and the index.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Open the store, creating it on first use.
+
+        Args:
+            path (str, optional): Store directory, defaults to EMBEDDING_STORE.PATH.
+        """
+        path = path or store_config.get('PATH', "data/embedding_store")
+        self.path = path if os.path.isabs(path) else os.path.join(PROJECT_ROOT, path)
+        os.makedirs(self.path, exist_ok=True)
+        self._lock = threading.Lock()
+        self._matrices = {}
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS matrices (model TEXT PRIMARY KEY, dim INTEGER NOT NULL, rows INTEGER NOT NULL)"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS vectors "
+                "(model TEXT NOT NULL, content_hash TEXT NOT NULL, row INTEGER NOT NULL, PRIMARY KEY (model, content_hash))"
+            )
+            columns = [row[1] for row in connection.execute("PRAGMA table_info(chunks)")]
+            if columns and "corpus" not in columns:
+                # Chunks recorded before corpora existed belong to the default corpus
+                connection.execute("ALTER TABLE chunks RENAME TO chunks_without_corpus")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS chunks (corpus TEXT NOT NULL, chunk_id TEXT NOT NULL, "
+                "content_hash TEXT NOT NULL, payload TEXT NOT NULL, PRIMARY KEY (corpus, chunk_id))"
+            )
+            if columns and "corpus" not in columns:
+                connection.execute(
+                    "INSERT OR IGNORE INTO chunks (corpus, chunk_id, content_hash, payload) "
+                    "SELECT ?, chunk_id, content_hash, payload FROM chunks_without_corpus",
+                    (DEFAULT_CORPUS,),
+                )
+                connection.execute("DROP TABLE chunks_without_corpus")
+
+    def _connect(self):
+        return sqlite3.connect(os.path.join(self.path, "index.sqlite"), timeout=30)
+
+    def _matrix_path(self, model: str) -> str:
+        return os.path.join(self.path, re.sub(r"[^A-Za-z0-9_.-]", "_", model) + ".f32")
+
+    def _matrix(self, model: str, dim: int, min_rows: int) -> np.memmap:
+        """
+        Map the matrix of a model with room for at least ``min_rows`` rows, growing the file if needed.
+
+        Files only ever grow, so several processes can share them.
+        """
+        matrix = self._matrices.get(model)
+        if matrix is not None and matrix.shape[0] >= min_rows:
+            return matrix
+        path = self._matrix_path(model)
+        row_bytes = dim * np.dtype(np.float32).itemsize
+        current_rows = os.path.getsize(path) // row_bytes if os.path.exists(path) else 0
+        if current_rows < min_rows:
+            capacity = max(MIN_CAPACITY, current_rows * 2, min_rows)
+            with open(path, "ab") as file:
+                file.truncate(capacity * row_bytes)
+            current_rows = capacity
+        matrix = np.memmap(path, dtype=np.float32, mode="r+", shape=(current_rows, dim))
+        self._matrices[model] = matrix
+        return matrix
+
+    def get(self, model: str, hashes: List[str]) -> Dict[str, List[float]]:
+        """
+        Look up stored embeddings.
+
+        Args:
+            model (str): Embedding model name.
+            hashes (List[str]): Content hashes to look up.
+
+        Returns:
+            Dict[str, List[float]]: The embeddings found, by content hash.
+        """
+        rows = {}
+        with self._connect() as connection:
+            info = connection.execute("SELECT dim FROM matrices WHERE model = ?", (model,)).fetchone()
+            if info is None:
+                return {}
+            unique = list(dict.fromkeys(hashes))
+            for start in range(0, len(unique), QUERY_CHUNK):
+                batch = unique[start:start + QUERY_CHUNK]
+                rows.update(connection.execute(
+                    f"SELECT content_hash, row FROM vectors WHERE model = ? AND content_hash IN ({','.join('?' * len(batch))})",
+                    (model, *batch),
+                ))
+        if not rows:
+            return {}
+        with self._lock:
+            matrix = self._matrix(model, info[0], max(rows.values()) + 1)
+            return {key: matrix[row].tolist() for key, row in rows.items()}
+
+    def put(self, model: str, vectors: Dict[str, List[float]]) -> int:
+        """
+        Store embeddings that are not stored yet.
+
+        Args:
+            model (str): Embedding model name.
+            vectors (Dict[str, List[float]]): Embeddings by content hash.
+
+        Returns:
+            int: Number of newly stored embeddings.
+        """
+        if not vectors:
+            return 0
+        try:
+            dim = len(next(iter(vectors.values())))
+            with self._lock:
+                connection = self._connect()
+                try:
+                    # Reserve rows in one write transaction so concurrent writers never share a row
+                    connection.execute("BEGIN IMMEDIATE")
+                    existing = set()
+                    keys = list(vectors)
+                    for start in range(0, len(keys), QUERY_CHUNK):
+                        batch = keys[start:start + QUERY_CHUNK]
+                        existing.update(row[0] for row in connection.execute(
+                            f"SELECT content_hash FROM vectors WHERE model = ? AND content_hash IN ({','.join('?' * len(batch))})",
+                            (model, *batch),
+                        ))
+                    new_keys = [key for key in keys if key not in existing]
+                    info = connection.execute("SELECT dim, rows FROM matrices WHERE model = ?", (model,)).fetchone()
+                    if info is not None and info[0] != dim:
+                        raise ValueError(f"Stored {model} embeddings have {info[0]} dimensions, got {dim}")
+                    first_row = info[1] if info else 0
+                    connection.execute(
+                        "INSERT OR REPLACE INTO matrices (model, dim, rows) VALUES (?, ?, ?)",
+                        (model, dim, first_row + len(new_keys)),
+                    )
+                    connection.commit()
+                    if not new_keys:
+                        return 0
+
+                    matrix = self._matrix(model, dim, first_row + len(new_keys))
+                    matrix[first_row:first_row + len(new_keys)] = np.asarray(
+                        [vectors[key] for key in new_keys], dtype=np.float32
+                    )
+                    matrix.flush()
+                    # Rows become visible only once their vectors are on disk
+                    connection.executemany(
+                        "INSERT OR IGNORE INTO vectors (model, content_hash, row) VALUES (?, ?, ?)",
+                        [(model, key, first_row + offset) for offset, key in enumerate(new_keys)],
+                    )
+                    connection.commit()
+                finally:
+                    connection.close()
+            return len(new_keys)
+        except Exception as e:
+            logger.error(f"Error writing to the embedding store: {str(e)}")
+            raise CustomException(f"Error writing to the embedding store: {str(e)}", sys)
+
+    def add_chunks(self, docs: List[Document], ids: List[str], corpus: Optional[str] = None) -> None:
+        """
+        Record the payloads of indexed chunks for later bulk loads.
+
+        Args:
+            docs (List[Document]): The chunks.
+            ids (List[str]): Their Qdrant point ids.
+            corpus (str, optional): The corpus the chunks are indexed in, defaults to the default corpus.
+        """
+        corpus = validate_corpus(corpus)
+        with self._connect() as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO chunks (corpus, chunk_id, content_hash, payload) VALUES (?, ?, ?, ?)",
+                [
+                    (corpus, cid, content_hash(doc.page_content),
+                     json.dumps({"page_content": doc.page_content, "metadata": doc.metadata}, default=str))
+                    for doc, cid in zip(docs, ids)
+                ],
+            )
+
+    def remove_chunks(self, ids: List[str], corpus: Optional[str] = None) -> None:
+        """
+        Forget the payloads of chunks deleted from a corpus; their vectors stay reusable.
+
+        Args:
+            ids (List[str]): Qdrant point ids of the deleted chunks.
+            corpus (str, optional): The corpus they were deleted from, defaults to the default corpus.
+        """
+        corpus = validate_corpus(corpus)
+        with self._connect() as connection:
+            connection.executemany(
+                "DELETE FROM chunks WHERE corpus = ? AND chunk_id = ?", [(corpus, cid) for cid in ids]
+            )
+
+    def iter_points(self, model: str, batch_size: int = 256, corpus: Optional[str] = None) -> Iterator[list]:
+        """
+        Iterate over the recorded chunks that have a stored embedding.
+
+        Args:
+            model (str): Embedding model name.
+            batch_size (int): Number of points per yielded batch.
+            corpus (str, optional): Only iterate over the chunks of this corpus, every corpus when omitted.
+
+        Yields:
+            list: (chunk_id, vector, payload) tuples.
+        """
+        with self._connect() as connection:
+            info = connection.execute("SELECT dim, rows FROM matrices WHERE model = ?", (model,)).fetchone()
+            if info is None:
+                return
+            query = (
+                "SELECT c.chunk_id, c.payload, v.row FROM chunks c "
+                "JOIN vectors v ON v.content_hash = c.content_hash AND v.model = ?"
+            )
+            params = (model,)
+            if corpus is not None:
+                query += " WHERE c.corpus = ?"
+                params += (validate_corpus(corpus),)
+            cursor = connection.execute(query + " ORDER BY v.row", params)
+            with self._lock:
+                matrix = self._matrix(model, info[0], info[1])
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield [(cid, matrix[row].tolist(), json.loads(payload)) for cid, payload, row in rows]
+
+    def bulk_load(self, client, collection_name: str, model: str, batch_size: int = 256,
+                  recreate: bool = False, corpus: Optional[str] = None) -> int:
+        """
+        Load the stored chunks of a corpus into a Qdrant collection without calling the embedding API.
+
+        Payloads use the 'page_content'/'metadata' layout of the LangChain Qdrant vectorstore.
+
+        Args:
+            client (QdrantClient): Target Qdrant client.
+            collection_name (str): Target collection, created with the COLLECTION layout if missing.
+            model (str): Embedding model whose vectors are loaded.
+            batch_size (int): Points per upsert request.
+            recreate (bool): Drop and recreate the collection first.
+            corpus (str, optional): Corpus whose chunks are loaded, defaults to the default corpus.
+
+        Returns:
+            int: Number of loaded points.
+
+        Raises:
+            CustomException: If the collection cannot be loaded.
+        """
+        from qdrant_client import models
+        from app.backend.collection_schema import ensure_collection
+        try:
+            loaded = 0
+            for batch in self.iter_points(model, batch_size, corpus=validate_corpus(corpus)):
+                if loaded == 0:
+                    ensure_collection(client, collection_name, len(batch[0][1]), recreate=recreate)
+                client.upsert(
+                    collection_name=collection_name,
+                    points=[models.PointStruct(id=cid, vector=vector, payload=payload) for cid, vector, payload in batch],
+                )
+                loaded += len(batch)
+            logger.info(f"Bulk loaded {loaded} point(s) into {collection_name} from the embedding store")
+            return loaded
+        except Exception as e:
+            logger.error(f"Error bulk loading {collection_name}: {str(e)}")
+            raise CustomException(f"Error bulk loading {collection_name}: {str(e)}", sys)
+
+
+class StoredEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that serves document embeddings from the EmbeddingStore when possible.
+
+    Attributes:
+        embeddings (Embeddings): The wrapped embeddings client, called for misses only.
+        model_name (str): Model name used in the store key.
+        hits (int): Texts served from the store.
+        misses (int): Texts sent to the wrapped client.
+    """
+
+    def __init__(self, embeddings: Embeddings, model_name: str, store: Optional[EmbeddingStore] = None):
+        """
+        Initialize the wrapper.
+
+        Args:
+            embeddings (Embeddings): The wrapped embeddings client.
+            model_name (str): Model name used in the store key.
+            store (EmbeddingStore, optional): The store, defaults to a new one at EMBEDDING_STORE.PATH.
+        """
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.store = store or EmbeddingStore()
+        self.hits = 0
+        self.misses = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed texts, calling the wrapped client only for texts missing from the store.
+
+        Args:
+            texts (List[str]): The texts to embed.
+
+        Returns:
+            List[List[float]]: One embedding per text.
+        """
+        hashes = [content_hash(text) for text in texts]
+        found = self.store.get(self.model_name, hashes)
+        missing = {key: text for key, text in zip(hashes, texts) if key not in found}
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            computed = dict(zip(missing, vectors))
+            self.store.put(self.model_name, computed)
+            found.update(computed)
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+        return [found[key] for key in hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query with the wrapped client; queries are not stored."""
+        return self.embeddings.embed_query(text)
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Bulk load a corpus's Qdrant collection from the embedding store.")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="Corpus whose chunks are loaded.")
+    parser.add_argument("--collection", help="Target collection, defaults to the corpus's collection.")
+    parser.add_argument("--model", default=retrieval_config.get('EMBEDDING_MODEL', "text-embedding-ada-002"))
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--recreate", action="store_true", help="Drop the collection before loading.")
+    args = parser.parse_args()
+
+    from qdrant_client import QdrantClient
+    qdrant_client = QdrantClient(url=os.getenv("QDRANT_URL"), api_key=os.getenv("QDRANT_API_KEY"))
+    collection = args.collection or collection_for(args.corpus)
+    count = EmbeddingStore().bulk_load(
+        qdrant_client, collection, args.model, args.batch_size, args.recreate, corpus=args.corpus
+    )
+    print(f"Loaded {count} point(s) of corpus {args.corpus} into {collection} with zero embedding API calls")
@@ -0,0 +1,115 @@
+import os
+import sys
+import uuid
+import sqlite3
+import threading
+from typing import Dict, List
+from langchain_core.documents import Document
+from app.backend.utils import get_hyperparameters_from_file
+from app.backend.sparse_index import chunk_key, PROJECT_ROOT
+from custom_logger import logger
+from custom_exceptions import CustomException
+
+# Loading hyper parameters from the yaml file
+config = get_hyperparameters_from_file()
+ingestion_config = config.get('INGESTION', {})
+
+CHUNK_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "policy_crew/chunks")
+
+
+def chunk_id(doc: Document) -> str:
+    """
+    Derive the Qdrant point id of a chunk from its content hash.
+
+    Args:
+        doc (Document): The chunk.
+
+    Returns:
+        str: A UUID that is identical every time the same chunk of the same source page is ingested.
+    """
+    return str(uuid.uuid5(CHUNK_NAMESPACE, chunk_key(doc)))
+
+
+class IngestionManifest:
+    """
+    Record of the chunks already indexed for every source document, stored in SQLite.
+
+    Attributes:
+        path (str): Location of the SQLite database.
+    """
+
+    def __init__(self, path: str = None):
+        """
+        Open the manifest, creating the database on first use.
+
+        Args:
+            path (str, optional): Database path, defaults to INGESTION.MANIFEST_PATH.
+        """
+        path = path or ingestion_config.get('MANIFEST_PATH', "data/ingestion_manifest.sqlite")
+        self.path = path if os.path.isabs(path) else os.path.join(PROJECT_ROOT, path)
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS chunks "
+                "(chunk_id TEXT PRIMARY KEY, chunk_key TEXT NOT NULL, source TEXT NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS chunks_source ON chunks (source)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def chunks(self, source: str) -> Dict[str, str]:
+        """
+        Return the indexed chunks of a source.
+
+        Args:
+            source (str): The document source.
+
+        Returns:
+            Dict[str, str]: Chunk id to chunk key.
+        """
+        with self._connect() as connection:
+            return dict(connection.execute(
+                "SELECT chunk_id, chunk_key FROM chunks WHERE source = ?", (source,)
+            ))
+
+    def sources(self) -> Dict[str, int]:
+        """
+        Return every indexed source with its chunk count.
+
+        Returns:
+            Dict[str, int]: Source to number of chunks.
+        """
+        with self._connect() as connection:
+            return dict(connection.execute(
+                "SELECT source, COUNT(*) FROM chunks GROUP BY source ORDER BY source"
+            ))
+
+    def add(self, source: str, docs: List[Document]) -> None:
+        """
+        Record chunks as indexed.
+
+        Args:
+            source (str): The document source.
+            docs (List[Document]): The indexed chunks.
+        """
+        try:
+            with self._lock, self._connect() as connection:
+                connection.executemany(
+                    "INSERT OR IGNORE INTO chunks (chunk_id, chunk_key, source) VALUES (?, ?, ?)",
+                    [(chunk_id(doc), chunk_key(doc), source) for doc in docs],
+                )
+        except Exception as e:
+            logger.error(f"Error updating the ingestion manifest: {str(e)}")
+            raise CustomException(f"Error updating the ingestion manifest: {str(e)}", sys)
+
+    def remove(self, chunk_ids: List[str]) -> None:
+        """
+        Forget chunks that were deleted from the indexes.
+
+        Args:
+            chunk_ids (List[str]): Ids of the deleted chunks.
+        """
+        with self._lock, self._connect() as connection:
+            connection.executemany("DELETE FROM chunks WHERE chunk_id = ?", [(cid,) for cid in chunk_ids])
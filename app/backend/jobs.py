@@ -0,0 +1,243 @@
+import sys
+import json
+import time
+import uuid
+from typing import Optional
+from app.backend.utils import get_hyperparameters_from_file
+from custom_logger import logger
+from custom_exceptions import CustomException
+
+# Loading hyper parameters from the yaml file
+config = get_hyperparameters_from_file()
+jobs_config = config.get('JOBS', {})
+
+QUEUE_KEY = "jobs:queue"
+PROCESSING_PREFIX = "jobs:processing:"
+HEARTBEAT_PREFIX = "jobs:heartbeat:"
+
+
+def _decode(value):
+    """Decode a bytes value returned by Redis."""
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+
+class JobQueue:
+    """
+    Reliable job queue stored in Redis.
+
+    Jobs are pushed onto a shared list and atomically moved to a per-worker
+    processing list when reserved, so a job held by a crashed or restarted
+    worker is put back on the queue instead of being lost. Every run of a job
+    is counted, so a job that keeps crashing its worker is eventually failed.
+
+    Attributes:
+        redis_client (redis.Redis): Client used for every queue operation.
+        job_ttl (int): Expiry of finished jobs in seconds.
+        heartbeat_ttl (int): Seconds after which a silent worker is considered dead.
+        max_attempts (int): Runs of a job before it is failed instead of run again.
+    """
+
+    def __init__(self, redis_client=None):
+        """
+        Initialize the queue.
+
+        Args:
+            redis_client (redis.Redis, optional): Client to use, defaults to the shared one.
+        """
+        if redis_client is None:
+            from app.backend.database import redis_client
+        self.redis_client = redis_client
+        self.job_ttl = jobs_config.get('JOB_TTL_SECONDS', 7 * 24 * 3600)
+        self.heartbeat_ttl = jobs_config.get('HEARTBEAT_TTL_SECONDS', 30)
+        self.max_attempts = jobs_config.get('MAX_ATTEMPTS', 3)
+
+    @staticmethod
+    def _job_key(job_id: str) -> str:
+        return f"job:{job_id}"
+
+    @staticmethod
+    def _events_key(job_id: str) -> str:
+        return f"job:{job_id}:events"
+
+    def submit(self, kind: str, payload: dict) -> str:
+        """
+        Create a job and push it onto the queue.
+
+        Args:
+            kind (str): The job type understood by the workers, e.g. 'crew' or 'langraph'.
+            payload (dict): JSON-serializable job input.
+
+        Returns:
+            str: The job id.
+        """
+        try:
+            job_id = uuid.uuid4().hex
+            now = time.time()
+            pipeline = self.redis_client.pipeline()
+            pipeline.hset(self._job_key(job_id), mapping={
+                "id": job_id,
+                "kind": kind,
+                "payload": json.dumps(payload),
+                "status": "queued",
+                "created_at": now,
+                "updated_at": now,
+            })
+            pipeline.lpush(QUEUE_KEY, job_id)
+            pipeline.execute()
+            logger.info(f"Job {job_id} of kind '{kind}' queued")
+            return job_id
+        except Exception as e:
+            logger.error(f"Error submitting job: {str(e)}")
+            raise CustomException(f"Error submitting job: {e}", sys)
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """
+        Return the status, partial outputs and result of a job.
+
+        Args:
+            job_id (str): The job id.
+
+        Returns:
+            dict or None: The job, or None if it does not exist.
+        """
+        raw_job = self.redis_client.hgetall(self._job_key(job_id))
+        if not raw_job:
+            return None
+        job = {_decode(key): _decode(value) for key, value in raw_job.items()}
+        job["payload"] = json.loads(job.get("payload") or "{}")
+        job["events"] = [
+            json.loads(_decode(event))
+            for event in self.redis_client.lrange(self._events_key(job_id), 0, -1)
+        ]
+        return job
+
+    def update(self, job_id: str, **fields):
+        """
+        Update fields of a job.
+
+        Args:
+            job_id (str): The job id.
+            **fields: Fields to set on the job hash.
+        """
+        fields["updated_at"] = time.time()
+        self.redis_client.hset(self._job_key(job_id), mapping=fields)
+
+    def add_event(self, job_id: str, event: str, data: dict):
+        """
+        Append a partial output to a running job.
+
+        Args:
+            job_id (str): The job id.
+            event (str): Event name, e.g. 'node' or 'task'.
+            data (dict): JSON-serializable event payload.
+        """
+        self.redis_client.rpush(self._events_key(job_id), json.dumps({"event": event, **data}))
+        self.update(job_id)
+
+    def clear_events(self, job_id: str):
+        """
+        Drop the partial outputs of a job, e.g. before a requeued job is rerun.
+
+        Args:
+            job_id (str): The job id.
+        """
+        self.redis_client.delete(self._events_key(job_id))
+
+    def reserve(self, worker_id: str, timeout: int = 5) -> Optional[str]:
+        """
+        Block until a job is available and move it to the worker's processing list.
+
+        Args:
+            worker_id (str): Stable id of the reserving worker.
+            timeout (int): Seconds to wait for a job.
+
+        Returns:
+            str or None: The reserved job id, or None on timeout.
+        """
+        job_id = self.redis_client.brpoplpush(QUEUE_KEY, PROCESSING_PREFIX + worker_id, timeout)
+        return _decode(job_id) if job_id else None
+
+    def record_attempt(self, job_id: str) -> int:
+        """
+        Count a new run of a job.
+
+        Args:
+            job_id (str): The job id.
+
+        Returns:
+            int: Number of runs of the job so far, including this one.
+        """
+        return int(self.redis_client.hincrby(self._job_key(job_id), "attempts", 1))
+
+    def finish(self, worker_id: str, job_id: str, status: str, **fields):
+        """
+        Record the outcome of a job and release it from the worker's processing list.
+
+        Args:
+            worker_id (str): Id of the worker holding the job.
+            job_id (str): The job id.
+            status (str): Final status, 'completed' or 'failed'.
+            **fields: Extra fields such as the result or the error message.
+        """
+        self.update(job_id, status=status, **fields)
+        pipeline = self.redis_client.pipeline()
+        pipeline.expire(self._job_key(job_id), self.job_ttl)
+        pipeline.expire(self._events_key(job_id), self.job_ttl)
+        pipeline.lrem(PROCESSING_PREFIX + worker_id, 0, job_id)
+        pipeline.execute()
+
+    def heartbeat(self, worker_id: str):
+        """
+        Mark a worker as alive.
+
+        Args:
+            worker_id (str): Id of the worker.
+        """
+        self.redis_client.set(HEARTBEAT_PREFIX + worker_id, time.time(), ex=self.heartbeat_ttl)
+
+    def requeue(self, worker_id: str) -> int:
+        """
+        Put every job held by a worker back on the queue.
+
+        Args:
+            worker_id (str): Id of the worker whose jobs are recovered.
+
+        Returns:
+            int: Number of requeued jobs.
+        """
+        count = 0
+        while self.redis_client.rpoplpush(PROCESSING_PREFIX + worker_id, QUEUE_KEY):
+            count += 1
+        if count:
+            logger.warning(f"Requeued {count} job(s) held by worker {worker_id}")
+        return count
+
+    def requeue_orphans(self) -> int:
+        """
+        Requeue jobs held by workers whose heartbeat has expired.
+
+        Returns:
+            int: Number of requeued jobs.
+        """
+        count = 0
+        for key in self.redis_client.scan_iter(match=PROCESSING_PREFIX + "*"):
+            worker_id = _decode(key)[len(PROCESSING_PREFIX):]
+            if not self.redis_client.exists(HEARTBEAT_PREFIX + worker_id):
+                count += self.requeue(worker_id)
+        return count
+
+
+_job_queue = None
+
+
+def get_job_queue() -> JobQueue:
+    """
+    Return the process-wide job queue, connecting to Redis on first use.
+
+    Returns:
+        JobQueue: The shared queue.
+    """
+    global _job_queue
+    if _job_queue is None:
+        _job_queue = JobQueue()
+    return _job_queue
@@ -0,0 +1,94 @@
+import json
+from typing import List, Sequence
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+from app.backend.utils import get_hyperparameters_from_file
+from custom_logger import logger
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Loading hyper parameters from the yaml file
+config = get_hyperparameters_from_file()
+compaction_config = config.get('CONTEXT_COMPACTION', {})
+
+_encoding = None
+
+
+def _get_encoding():
+    """Return the tiktoken encoding used for counting, or None to estimate from characters."""
+    global _encoding
+    if _encoding is None and tiktoken is not None:
+        try:
+            _encoding = tiktoken.get_encoding(compaction_config.get('TOKEN_ENCODING', "cl100k_base"))
+        except Exception as e:
+            logger.warning(f"Falling back to character-based token estimates: {e}")
+    return _encoding
+
+
+def count_tokens(messages: Sequence[BaseMessage]) -> int:
+    """
+    Count the tokens of the message contents and tool calls sent to the LLM.
+
+    Args:
+        messages (Sequence[BaseMessage]): The messages.
+
+    Returns:
+        int: The token count, estimated as characters / 4 without tiktoken.
+    """
+    text = []
+    for message in messages:
+        text.append(message.content if isinstance(message.content, str) else json.dumps(message.content))
+        if getattr(message, "tool_calls", None):
+            text.append(json.dumps([call.get("args") for call in message.tool_calls], default=str))
+    joined = "\n".join(text)
+    encoding = _get_encoding()
+    if encoding is None:
+        return len(joined) // 4
+    return len(encoding.encode(joined, disallowed_special=()))
+
+
+def _truncate(message: ToolMessage, max_chars: int) -> ToolMessage:
+    """Shorten the content of a tool result, keeping its tool call id."""
+    content = message.content
+    if not isinstance(content, str) or len(content) <= max_chars:
+        return message
+    dropped = len(content) - max_chars
+    return message.copy(update={
+        "content": f"{content[:max_chars]}\n[... {dropped} characters of earlier tool output truncated]"
+    })
+
+
+def compact_messages(messages: Sequence[BaseMessage], keep_tool_messages: bool = True) -> List[BaseMessage]:
+    """
+    Reduce the history to what the next agent needs.
+
+    Agents running a tool loop keep their own tool calls, but tool results older
+    than the latest KEEP_LAST_TOOL_RESULTS are truncated to MAX_TOOL_CHARS. Agents
+    that only read the other agents' work get the user message, the summary and
+    each agent's final document, without any tool call or raw tool result.
+
+    Args:
+        messages (Sequence[BaseMessage]): The accumulated history.
+        keep_tool_messages (bool): Whether the agent needs its tool calls and results.
+
+    Returns:
+        List[BaseMessage]: The compacted history, the original one when compaction is disabled.
+    """
+    if not compaction_config.get('ENABLED', True):
+        return list(messages)
+    if not keep_tool_messages:
+        return [
+            message for message in messages
+            if not isinstance(message, ToolMessage)
+            and not (isinstance(message, AIMessage) and message.tool_calls)
+        ]
+    max_chars = compaction_config.get('MAX_TOOL_CHARS', 4000)
+    keep_last = compaction_config.get('KEEP_LAST_TOOL_RESULTS', 1)
+    tool_positions = [index for index, message in enumerate(messages) if isinstance(message, ToolMessage)]
+    stale = set(tool_positions[:max(0, len(tool_positions) - keep_last)])
+    return [
+        _truncate(message, max_chars) if index in stale else message
+        for index, message in enumerate(messages)
+    ]
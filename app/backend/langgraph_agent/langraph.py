@@ -6,9 +6,6 @@ project_root = "D:/policy_crew"
 sys.path.insert(0, project_root)
 from dotenv import load_dotenv  # noqa: E402
 from typing import List, Optional, Type, Literal  # noqa: E402
-from qdrant_client import QdrantClient  # noqa: E402
-from langchain_community.embeddings import OpenAIEmbeddings
-from langchain_community.vectorstores import Qdrant
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import (
     BaseMessage,
@@ -20,11 +17,16 @@ from langgraph.graph import END, StateGraph
 from langgraph.prebuilt import ToolNode
 from langchain.pydantic_v1 import BaseModel, Field
 from langchain_core.tools import BaseTool
+from langchain_core.runnables import RunnableConfig
 import functools
 from langchain_core.messages import AIMessage
 import operator
 from typing import Annotated, Sequence, TypedDict
-from app.backend.utils import get_hyperparameters_from_file
+from app.backend.utils import get_hyperparameters_from_file, log_latency
+from app.backend.retrieval import get_retrieval_resources, retrieval_config
+from app.backend.tool_memo import new_tool_memo
+from app.backend.langgraph_agent.speculative_prefetch import start_prefetch
+from app.backend.langgraph_agent.context_compaction import compact_messages, count_tokens
 # Import custom logger and exceptions
 from custom_logger import logger
 from custom_exceptions import CustomException
@@ -32,14 +34,24 @@ from custom_exceptions import CustomException
 load_dotenv()
 config=get_hyperparameters_from_file()
 
+# Generators run in parallel after the Summarizer, each as a tool-loop subgraph
+GENERATOR_BRANCHES = ("policy_generator", "finance_generator")
+
+def last_sender(current: str, update: str) -> str:
+    """Keep the latest sender; the parallel generators both write it in the same step."""
+    return update
+
+
 class AgentState(TypedDict):
     messages: Annotated[Sequence[BaseMessage], operator.add]
-    sender: str
+    sender: Annotated[str, last_sender]
 
 class WorkflowManager:
-    def __init__(self, openai_api_key: str):
+    def __init__(self, openai_api_key: str, corpora: Optional[List[str]] = None):
         try:
             self.openai_api_key = openai_api_key
+            # Corpora searched by the report tool, routed per query when None
+            self.corpora = corpora
             self.llm = ChatOpenAI(model=config['LLM_NAME'], api_key=openai_api_key)
             self.report_tool_instance = self._create_report_tool()
             self.workflow = StateGraph(AgentState)
@@ -54,27 +66,45 @@ class WorkflowManager:
         try:
             class ReportToolInput(BaseModel):
                 query: List[str] = Field(description="A list of inputs for the RAG pipeline")
+                filters: Optional[dict] = Field(
+                    default=None,
+                    description='Optional metadata filter, e.g. {"source": "file.pdf"} or {"page": {"gte": 3, "lte": 10}}',
+                )
 
             class ReportTool(BaseTool):
                 name: str = "report_tool"
                 description: str = "Tool to retrieve relevant documents from the vector database using a list of user queries and return a response."
                 args_schema: Optional[Type[BaseModel]] = ReportToolInput
                 return_direct: bool = True
+                corpora: Optional[List[str]] = None
 
-                def _run(self, query: List[str]) -> str:
+                def _run(self, query: List[str], config: RunnableConfig, filters: Optional[dict] = None) -> str:
                     try:
-                        qdrant_end = os.getenv('QDRANT_URL')
-                        qdrant_api_key = os.getenv('QDRANT_API_KEY')
-                        openai_api_key = os.getenv('OPENAI_API_KEY')
-
-                        embeddings_model = OpenAIEmbeddings(model='text-embedding-ada-002', openai_api_key=openai_api_key)
-                        qdrant_client = QdrantClient(url=qdrant_end, api_key=qdrant_api_key)
-                        qdrant = Qdrant(client=qdrant_client, collection_name="policy-agent", embeddings=embeddings_model)
-                        retriever = qdrant.as_retriever(search_kwargs={"k": 3})
-                        responses = []
-                        for q in query:
-                            response = retriever.invoke(q)
-                            responses.append((response))
+                        k = retrieval_config.get('GRAPH_REPORT_TOP_K', 3)
+
+                        def retrieve(batch):
+                            return get_retrieval_resources().batch_retrieve(
+                                batch, k, rerank=False, filters=filters, corpora=self.corpora,
+                            )
+
+                        # The run's memo and prefetch travel in the config, the tool itself is shared by all runs
+                        configurable = (config or {}).get("configurable", {})
+                        memo = configurable.get("tool_memo")
+                        prefetch = configurable.get("prefetch")
+
+                        def fetch(batch):
+                            # The prefetch is unfiltered, so filtered calls always retrieve
+                            if prefetch is not None and not filters:
+                                return prefetch.serve(batch, retrieve)
+                            return retrieve(batch)
+
+                        with log_latency("report_tool._run (%d queries)", len(query)):
+                            if memo is None:
+                                responses = fetch(query)
+                            else:
+                                responses = memo.retrieve(
+                                    query, k, fetch, rerank=False, filters=filters, corpora=self.corpora
+                                )
 
                         return responses
 
@@ -83,7 +113,7 @@ class WorkflowManager:
                         raise CustomException(e, sys)
 
             logger.info("Report tool created successfully.")
-            return ReportTool()
+            return ReportTool(corpora=self.corpora)
         except Exception as e:
             logger.error("Error during report tool creation.")
             raise CustomException(e, sys)
@@ -117,10 +147,15 @@ class WorkflowManager:
             logger.error("Error during agent creation.")
             raise CustomException(e, sys)
 
-    def agent_node(self, state, agent, name):
+    def agent_node(self, state, agent, name, keep_tool_messages=True):
         try:
             logger.info(f"Agent '{name}' is processing the state.")
-            result = agent.invoke(state)
+            messages = compact_messages(state["messages"], keep_tool_messages)
+            logger.info(
+                f"Prompt history of '{name}': {count_tokens(state['messages'])} tokens, "
+                f"{count_tokens(messages)} after compaction."
+            )
+            result = agent.invoke({**state, "messages": messages})
             logger.info(f"Result from agent '{name}': {result}")
 
             if isinstance(result, ToolMessage):
@@ -137,6 +172,49 @@ class WorkflowManager:
             logger.error(f"Error in agent node '{name}'.")
             raise CustomException(e, sys)
 
+    def _create_branch(self, node, name: str):
+        """
+        Compile the tool loop of one generator into a node of the main workflow.
+
+        The generator calls report_tool until it answers without tool calls. Each
+        branch works on its own copy of the history, so parallel branches never see
+        each other's tool calls, and only the messages it added are returned.
+
+        Args:
+            node (callable): The generator's agent node.
+            name (str): The generator's node name.
+
+        Returns:
+            callable: The branch node.
+        """
+        try:
+            branch = StateGraph(AgentState)
+            branch.add_node(name, node)
+            branch.add_node("call_tool", ToolNode([self.report_tool_instance]))
+
+            def router(state) -> Literal["call_tool", "__end__"]:
+                last_message = state["messages"][-1]
+                if last_message.tool_calls:
+                    logger.info(f"Router directing {name} to call_tool.")
+                    return "call_tool"
+                logger.info(f"{name} finished its document.")
+                return "__end__"
+
+            branch.add_conditional_edges(name, router, {"call_tool": "call_tool", "__end__": END})
+            branch.add_edge("call_tool", name)
+            branch.set_entry_point(name)
+            graph = branch.compile()
+
+            def branch_node(state, config):
+                history = list(state["messages"])
+                result = graph.invoke({"messages": history, "sender": name}, config)
+                return {"messages": result["messages"][len(history):], "sender": name}
+
+            return branch_node
+        except Exception as e:
+            logger.error(f"Error during {name} branch setup.")
+            raise CustomException(e, sys)
+
     def _setup_workflow(self):
         try:
             summary_agent = self.create_agent(
@@ -189,66 +267,51 @@ class WorkflowManager:
                     "5.prefix your response with FINAL ANSWER so the team knows to stop."
                 ),
             )
-            report_node = functools.partial(self.agent_node, agent=report_agent, name="report_generator")
-
-            tools = [self.report_tool_instance]
-            tool_node = ToolNode(tools)
-
-            def router(state) -> Literal["call_tool", "__end__", "continue"]:
-                messages = state["messages"]
-                last_message = messages[-1]
-                logger.info(f"Router checking the last message from sender '{state['sender']}': {last_message}")
+            # The report only needs the summary and the two final documents, not the raw tool results
+            report_node = functools.partial(
+                self.agent_node, agent=report_agent, name="report_generator", keep_tool_messages=False
+            )
 
-                if last_message.tool_calls:
-                    logger.info("Router directing to call_tool.")
-                    return "call_tool"
+            def summary_router(state):
+                last_message = state["messages"][-1]
                 if "FINAL ANSWER" in last_message.content:
                     logger.info("Router directing to __end__.")
-                    return "__end__"
-                logger.info("Router directing to continue.")
-                return "continue"
+                    return END
+                # Policy and finance extraction only depend on the summary, so both start at once
+                logger.info("Router fanning out to policy_generator and finance_generator.")
+                return list(GENERATOR_BRANCHES)
 
             self.workflow.add_node("Summarizer", summary_node)
-            self.workflow.add_node("policy_generator", policy_node)
-            self.workflow.add_node("finance_generator", finance_node)
+            self.workflow.add_node("policy_generator", self._create_branch(policy_node, "policy_generator"))
+            self.workflow.add_node("finance_generator", self._create_branch(finance_node, "finance_generator"))
             self.workflow.add_node("report_generator", report_node)
-            self.workflow.add_node("call_tool", tool_node)
 
             self.workflow.add_conditional_edges(
                 "Summarizer",
-                router,
-                {"continue": "policy_generator", "call_tool": "call_tool", "__end__": END},
-            )
-            self.workflow.add_conditional_edges(
-                "policy_generator",
-                router,
-                {"continue": "finance_generator", "call_tool": "call_tool", "__end__": END},
-            )
-            self.workflow.add_conditional_edges(
-                "finance_generator",
-                router,
-                {"continue": "report_generator", "call_tool": "call_tool", "__end__": END},
-            )
-            self.workflow.add_conditional_edges(
-                "report_generator",
-                router,
-                {"continue": "__end__", "call_tool": "__end__", "__end__": END},
-            )
-            self.workflow.add_conditional_edges(
-                "call_tool",
-                lambda x: x["sender"],
-                {
-                    "Summarizer": "Summarizer",
-                    "policy_generator": "policy_generator",
-                    "finance_generator": "finance_generator"
-                },
+                summary_router,
+                [*GENERATOR_BRANCHES, END],
             )
+            # report_generator waits for both branches
+            self.workflow.add_edge(list(GENERATOR_BRANCHES), "report_generator")
+            self.workflow.add_edge("report_generator", END)
             self.workflow.set_entry_point("Summarizer")
             logger.info("Workflow setup completed successfully.")
         except Exception as e:
             logger.error("Error during workflow setup.")
             raise CustomException(e, sys)
 
+    def _run_config(self, initial_message: str) -> dict:
+        """
+        Return the config of one run, carrying a fresh report tool memo and the facet prefetch.
+
+        The prefetch starts retrieving the generators' facet questions from the raw
+        message right away, overlapping the Summarizer call.
+        """
+        prefetch = start_prefetch(
+            initial_message, retrieval_config.get('GRAPH_REPORT_TOP_K', 3), rerank=False, corpora=self.corpora
+        )
+        return {"recursion_limit": 150, "configurable": {"tool_memo": new_tool_memo(), "prefetch": prefetch}}
+
     def run(self, initial_message: str) -> str:
         try:
             final_state = self.graph.invoke(
@@ -257,7 +320,7 @@ class WorkflowManager:
                         HumanMessage(content=initial_message)
                     ]
                 },
-                {"recursion_limit": 150}
+                self._run_config(initial_message),
             )
             final_response = final_state["messages"][-1]
             logger.info("Workflow run completed successfully.")
@@ -266,6 +329,41 @@ class WorkflowManager:
         except Exception as e:
             logger.error("Error during workflow run.")
             raise CustomException(e, sys)
+
+    def stream(self, initial_message: str):
+        """
+        Run the workflow, yielding the message produced by every node as it completes.
+
+        The generator branches are streamed step by step from inside their tool
+        loops, so every tool call and tool result is reported as it happens.
+
+        Args:
+            initial_message (str): The user query.
+
+        Yields:
+            tuple: The node name and the message it produced.
+        """
+        try:
+            for namespace, update in self.graph.stream(
+                {
+                    "messages": [
+                        HumanMessage(content=initial_message)
+                    ]
+                },
+                self._run_config(initial_message),
+                stream_mode="updates",
+                subgraphs=True,
+            ):
+                for node_name, node_output in update.items():
+                    # A branch's final update repeats the messages already streamed from inside it
+                    if not namespace and node_name in GENERATOR_BRANCHES:
+                        continue
+                    for message in (node_output or {}).get("messages", []):
+                        yield node_name, message
+            logger.info("Workflow stream completed successfully.")
+        except Exception as e:
+            logger.error("Error during workflow stream.")
+            raise CustomException(e, sys)
         
 
 if __name__ == "__main__":
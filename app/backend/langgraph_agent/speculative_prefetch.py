@@ -0,0 +1,160 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from typing import Callable, List, Optional
+import numpy as np
+from langchain_core.documents import Document
+from app.backend.utils import get_hyperparameters_from_file
+from app.backend.retrieval import get_retrieval_resources
+from custom_logger import logger
+
+# Loading hyper parameters from the yaml file
+config = get_hyperparameters_from_file()
+prefetch_config = config.get('PREFETCH', {})
+
+# Fixed question prefixes of the policy and finance generators, see WorkflowManager._setup_workflow
+DEFAULT_FACET_PREFIXES = [
+    "What are the compliance criteria, eligibility criteria, fees",
+    "What are the financing options, subsidies, grants, and incentives available",
+]
+
+# Dedicated pool, so a prefetch never waits behind, or blocks, the retrieval executor it fans out to
+prefetch_executor = ThreadPoolExecutor(
+    max_workers=prefetch_config.get('MAX_WORKERS', 4),
+    thread_name_prefix="prefetch",
+)
+
+
+def facet_queries(message: str) -> List[str]:
+    """
+    Build the facet questions the generators are expected to ask about a user message.
+
+    Args:
+        message (str): The raw user message.
+
+    Returns:
+        List[str]: One question per configured facet prefix.
+    """
+    prefixes = prefetch_config.get('FACET_PREFIXES') or DEFAULT_FACET_PREFIXES
+    return [f"{prefix} {message}" for prefix in prefixes]
+
+
+class SpeculativePrefetch:
+    """
+    Retrieval for the expected facet questions, started before the agents ask for it.
+
+    The facet questions are built from the raw user message and retrieved in the
+    background while the Summarizer runs. A later tool call is served from the
+    prefetched documents when its query embedding is close enough to a facet
+    question, and retrieved normally otherwise.
+
+    Attributes:
+        queries (List[str]): The facet questions.
+        k (int): Number of documents retrieved per question.
+        rerank (bool): Whether the retrieval reranks, like the tool it stands in for.
+        corpora (List[str]): Corpora searched, routed per question when None.
+        threshold (float): Minimum cosine similarity to serve a tool query from the prefetch.
+        hits (int): Tool queries served from the prefetch.
+        misses (int): Tool queries retrieved normally.
+    """
+
+    def __init__(self, queries: List[str], k: int, rerank: bool = False, corpora: Optional[List[str]] = None,
+                 threshold: Optional[float] = None):
+        """
+        Start retrieving the facet questions in the background.
+
+        Args:
+            queries (List[str]): The facet questions.
+            k (int): Number of documents retrieved per question.
+            rerank (bool): Whether the retrieval reranks.
+            corpora (List[str], optional): Corpora searched, routed per question when omitted.
+            threshold (float, optional): Overrides PREFETCH.SIMILARITY_THRESHOLD.
+        """
+        self.queries = queries
+        self.k = k
+        self.rerank = rerank
+        self.corpora = corpora
+        self.threshold = threshold if threshold is not None else prefetch_config.get('SIMILARITY_THRESHOLD', 0.97)
+        self.wait_seconds = prefetch_config.get('WAIT_SECONDS', 30)
+        self.hits = 0
+        self.misses = 0
+        # The parallel generator branches share the prefetch of their run
+        self._lock = threading.Lock()
+        self._future = prefetch_executor.submit(self._prefetch)
+
+    def _prefetch(self):
+        """Embed and retrieve the facet questions; the embeddings are reused when matching."""
+        resources = get_retrieval_resources()
+        vectors = np.asarray(resources.embeddings.embed_documents(self.queries), dtype=np.float32)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        docs = resources.batch_retrieve(self.queries, self.k, rerank=self.rerank, corpora=self.corpora)
+        logger.info(f"Prefetched {len(self.queries)} facet question(s)")
+        return vectors, docs
+
+    def match(self, queries: List[str]) -> List[Optional[List[Document]]]:
+        """
+        Find the prefetched documents of every query close enough to a facet question.
+
+        Args:
+            queries (List[str]): The tool's queries.
+
+        Returns:
+            List[Optional[List[Document]]]: The prefetched documents, None where no facet question is close enough.
+        """
+        try:
+            facet_vectors, facet_docs = self._future.result(timeout=self.wait_seconds)
+        except TimeoutError:
+            logger.warning("Prefetch still running, retrieving the tool queries directly")
+            return [None] * len(queries)
+        except Exception as e:
+            logger.warning(f"Prefetch failed, retrieving the tool queries directly: {e}")
+            return [None] * len(queries)
+        vectors = np.asarray(get_retrieval_resources().embeddings.embed_documents(queries), dtype=np.float32)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        similarities = vectors @ facet_vectors.T
+        matches = []
+        for query, row in zip(queries, similarities):
+            best = int(row.argmax())
+            if row[best] >= self.threshold:
+                logger.info(f"Serving '{query}' from the prefetch of '{self.queries[best]}' ({row[best]:.3f})")
+                matches.append(list(facet_docs[best]))
+            else:
+                matches.append(None)
+        return matches
+
+    def serve(self, queries: List[str], fetch: Callable[[List[str]], List[List[Document]]]) -> List[List[Document]]:
+        """
+        Return the documents of every query, from the prefetch where possible.
+
+        Args:
+            queries (List[str]): The tool's queries.
+            fetch (Callable): Retrieves the documents of the queries the prefetch cannot serve.
+
+        Returns:
+            List[List[Document]]: The documents, one list per query.
+        """
+        matches = self.match(queries)
+        missing = [query for query, docs in zip(queries, matches) if docs is None]
+        fetched = iter(fetch(missing) if missing else [])
+        with self._lock:
+            self.hits += len(queries) - len(missing)
+            self.misses += len(missing)
+        return [docs if docs is not None else next(fetched) for docs in matches]
+
+
+def start_prefetch(message: str, k: int, rerank: bool = False,
+                   corpora: Optional[List[str]] = None) -> Optional[SpeculativePrefetch]:
+    """
+    Start prefetching the facet questions of a user message.
+
+    Args:
+        message (str): The raw user message.
+        k (int): Number of documents retrieved per question.
+        rerank (bool): Whether the retrieval reranks.
+        corpora (List[str], optional): Corpora searched, routed per question when omitted.
+
+    Returns:
+        SpeculativePrefetch or None: The running prefetch, or None if PREFETCH is disabled.
+    """
+    if not prefetch_config.get('ENABLED', True):
+        return None
+    return SpeculativePrefetch(facet_queries(message), k, rerank=rerank, corpora=corpora)
@@ -0,0 +1,522 @@
+import sys
+import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Ensure the backend module is found
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from custom_logger import logger
+from custom_exceptions import CustomException
+from app.backend.answer_cache import invalidate_answer_cache
+from app.backend.ingestion_manifest import chunk_id
+from app.backend.utils import get_hyperparameters_from_file
+from app.backend.embedding_scheduler import EmbeddingScheduler, scheduler_config
+from app.backend.embedding_store import EmbeddingStore, StoredEmbeddings, store_config
+from app.backend.parsed_cache import get_parsed_cache
+from app.backend.collection_schema import ensure_collection
+from app.backend.corpora import CorpusStorage, DEFAULT_CORPUS, get_corpus_index, validate_corpus
+from app.backend.pdf_parsing import ParallelPDFParser, parser_for, download_pdf, ingestion_config
+from langchain_community.document_loaders import PDFPlumberLoader, PyPDFLoader
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain.embeddings.openai import OpenAIEmbeddings
+from qdrant_client import QdrantClient, models
+
+# Loading hyper parameters from the yaml file
+config = get_hyperparameters_from_file()
+retrieval_config = config.get('RETRIEVAL', {})
+
+LOADERS = {"pypdf": PyPDFLoader, "pdfplumber": PDFPlumberLoader}
+
+class PDFProcessor:
+    """
+    A class to process PDF files and create a retrieval-augmented generation (RAG) system.
+    
+    Attributes:
+        openai_api_key (str): API key for OpenAI.
+        qdrant_url (str): URL for Qdrant vector store.
+        qdrant_api_key (str): API key for Qdrant vector store.
+    """
+
+    def __init__(self, openai_api_key, qdrant_url, qdrant_api_key):
+        """
+        Initialize the PDFProcessor with necessary API keys and URLs.
+
+        Args:
+            openai_api_key (str): API key for OpenAI.
+            qdrant_url (str): URL for Qdrant vector store.
+            qdrant_api_key (str): API key for Qdrant vector store.
+        """
+        self.openai_api_key = openai_api_key
+        self.qdrant_url = qdrant_url
+        self.qdrant_api_key = qdrant_api_key
+        # Chunks split since the last create_rag_system call, grouped by source document
+        self.pending_docs = {}
+        # Collection, keyword index and manifest of every corpus used so far
+        self._corpora = {}
+        self._corpora_lock = threading.Lock()
+        self.corpus_index = get_corpus_index()
+        default_corpus = self.corpus(DEFAULT_CORPUS)
+        self.sparse_index = default_corpus.sparse_index
+        self.manifest = default_corpus.manifest
+        # Persistent (model, content hash) -> embedding store consulted before the embedding API
+        self.embedding_store = EmbeddingStore() if store_config.get('ENABLED', True) else None
+        self.collection_name = default_corpus.collection_name
+        self._qdrant_client = None
+        self._embeddings = None
+        # Collections already created or checked by this processor
+        self._ready_collections = set()
+        self.text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=2000,
+            chunk_overlap=250
+        )
+        self.embed_batch_size = ingestion_config.get('EMBED_BATCH_SIZE', 64)
+        self.max_in_flight_batches = ingestion_config.get('MAX_IN_FLIGHT_BATCHES', 2)
+        # Embeds and upserts batches while the next pages are parsed
+        self.upsert_executor = ThreadPoolExecutor(
+            max_workers=self.max_in_flight_batches, thread_name_prefix="pdf-upsert"
+        )
+        # Page-level process pool, or None to parse serially with the LangChain loaders
+        self.parser = ParallelPDFParser() if ingestion_config.get('PARALLEL', True) else None
+        # Extracted pages keyed by file content hash, or None to parse every time
+        self.parsed_cache = get_parsed_cache()
+
+    def corpus(self, name=None):
+        """
+        Return the indexes of a corpus, opening them on first use.
+
+        Args:
+            name (str, optional): The corpus name, defaults to the default corpus.
+
+        Returns:
+            CorpusStorage: The collection, keyword index and manifest of the corpus.
+        """
+        name = validate_corpus(name)
+        with self._corpora_lock:
+            if name not in self._corpora:
+                self._corpora[name] = CorpusStorage(name)
+            return self._corpora[name]
+
+    def load_from_url(self, url):
+        """
+        Load PDF documents from a URL.
+
+        Args:
+            url (str): The URL of the PDF document.
+
+        Returns:
+            data: Loaded data from the PDF.
+
+        Raises:
+            CustomException: If there is an error loading the URL.
+        """
+        try:
+            logger.info(f"Loading from URL: {url}")
+            if not isinstance(url, str):
+                raise CustomException("URL must be a string", sys)
+            data = list(self.iter_pages("url", url))
+            if not data:
+                raise CustomException(f"No data loaded from URL {url}", sys)
+            return data
+        except Exception as e:
+            logger.error(f"Error loading URL {url}: {str(e)}")
+            raise CustomException(f"Error loading URL {url}: {str(e)}", sys)
+
+    def load_from_file(self, file_path, source=None):
+        """
+        Load PDF documents from a file path.
+
+        Args:
+            file_path (str): The file path of the PDF document.
+            source (str, optional): Stable document name recorded as the source, e.g. the
+                original upload name, defaults to the file path.
+
+        Returns:
+            data: Loaded data from the PDF.
+
+        Raises:
+            CustomException: If there is an error loading the file.
+        """
+        try:
+            logger.info(f"Loading from file: {file_path}")
+            if not isinstance(file_path, str):
+                raise CustomException("File path must be a string", sys)
+            data = list(self.iter_pages("file", file_path, source))
+            if not data:
+                raise CustomException(f"No data loaded from file {file_path}", sys)
+            return data
+        except Exception as e:
+            logger.error(f"Error loading file {file_path}: {str(e)}")
+            raise CustomException(f"Error loading file {file_path}: {str(e)}", sys)
+
+    def _parse_pages(self, backend, kind, location, source):
+        """
+        Parse a PDF lazily with the configured parser, one page at a time.
+
+        Args:
+            backend (str): 'pypdf' or 'pdfplumber'.
+            kind (str): 'file' or 'url'.
+            location (str): File path or URL of the PDF.
+            source (str): Document name recorded as the source.
+
+        Yields:
+            Document: The next page.
+        """
+        if self.parser is not None:
+            if kind == "url":
+                pages = self.parser.iter_parse_url(location, backend)
+            else:
+                pages = self.parser.iter_parse(location, backend, source=source)
+        else:
+            pages = LOADERS[backend](location).lazy_load()
+        for page in pages:
+            page.metadata["source"] = source
+            if "file_path" in page.metadata:
+                page.metadata["file_path"] = source
+            yield page
+
+    def iter_pages(self, kind, location, source=None):
+        """
+        Load a PDF lazily, one page at a time, from the parsed-document cache when possible.
+
+        Args:
+            kind (str): 'file' or 'url'.
+            location (str): File path or URL of the PDF.
+            source (str, optional): Document name recorded as the source, defaults to the location.
+
+        Yields:
+            Document: The next page.
+        """
+        backend = parser_for(kind)
+        source = source or location
+        if self.parsed_cache is None:
+            yield from self._parse_pages(backend, kind, location, source)
+            return
+        # The cache is keyed by content, so URLs are downloaded before the lookup
+        file_path = download_pdf(location) if kind == "url" else location
+        try:
+            yield from self.parsed_cache.iter_pages(
+                file_path,
+                backend,
+                lambda: self._parse_pages(backend, "file", file_path, source),
+                source=source,
+            )
+        finally:
+            if kind == "url":
+                os.remove(file_path)
+
+    def ingest(self, kind, location, source=None, corpus=None):
+        """
+        Stream a PDF into the indexes: lazy page load, split, batched embed and upsert.
+
+        Chunks become searchable batch by batch and peak memory does not depend on
+        the document size.
+
+        Args:
+            kind (str): 'file' or 'url'.
+            location (str): File path or URL of the PDF.
+            source (str, optional): Document name recorded as the source, defaults to the location.
+            corpus (str, optional): Corpus the document is indexed in, defaults to the default corpus.
+
+        Returns:
+            dict: Number of embedded, skipped and removed chunks.
+
+        Raises:
+            CustomException: If the document cannot be ingested.
+        """
+        source = source or location
+        try:
+            storage = self.corpus(corpus)
+            logger.info(f"Ingesting {kind} into corpus {storage.name}: {location}")
+            chunks = (
+                chunk
+                for page in self.iter_pages(kind, location, source)
+                for chunk in self.text_splitter.split_documents([page])
+            )
+            stats = self._index_stream(storage, source, chunks)
+            if stats["embedded"] or stats["removed"]:
+                # Cached answers may be stale now that the corpus has changed
+                invalidate_answer_cache()
+            return stats
+        except Exception as e:
+            logger.error(f"Error ingesting {location}: {str(e)}")
+            raise CustomException(f"Error ingesting {location}: {str(e)}", sys)
+
+    def ingest_sources(self, sources, corpus=None):
+        """
+        Ingest several files and URLs concurrently.
+
+        Args:
+            sources (list): (kind, location, source) triples where kind is 'file' or 'url'
+                and source is the document name recorded in the indexes.
+            corpus (str, optional): Corpus the documents are indexed in, defaults to the default corpus.
+
+        Yields:
+            tuple: (location, stats, error) as each source finishes, with either stats or error set.
+        """
+        max_workers = max(1, min(len(sources), ingestion_config.get('CONCURRENT_SOURCES', 4)))
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pdf-ingest") as executor:
+            futures = {
+                executor.submit(self.ingest, kind, location, source, corpus): location
+                for kind, location, source in sources
+            }
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result(), None
+                except Exception as e:
+                    yield futures[future], None, e
+
+    def split_and_store(self, data):
+        """
+        Split and store the documents.
+
+        Args:
+            data: The data to split and store.
+
+        Raises:
+            CustomException: If there is no data to split and store.
+        """
+        try:
+            if not data:
+                raise CustomException("No data to split and store", sys)
+
+            docs = self.text_splitter.split_documents(data)
+            for doc in docs:
+                self.pending_docs.setdefault(str(doc.metadata.get("source", "")), []).append(doc)
+            logger.info("Documents split and stored successfully.")
+        except Exception as e:
+            logger.error(f"Error splitting and storing documents: {str(e)}")
+            raise CustomException(f"Error splitting and storing documents: {str(e)}", sys)
+
+    @property
+    def qdrant_client(self):
+        """Client used to create the collection and to upsert and delete its points."""
+        if self._qdrant_client is None:
+            self._qdrant_client = QdrantClient(
+                url=self.qdrant_url,
+                api_key=self.qdrant_api_key,
+                prefer_grpc=retrieval_config.get('PREFER_GRPC', True),
+            )
+        return self._qdrant_client
+
+    def _delete_chunks(self, storage, source, chunks):
+        """
+        Delete chunks from Qdrant, the keyword index, the manifest and the document centroid.
+
+        Args:
+            storage (CorpusStorage): The corpus holding the chunks.
+            source (str): The document source.
+            chunks (dict): Chunk id to chunk key of the chunks to delete.
+        """
+        if not chunks:
+            return
+        ids = list(chunks)
+        points = self.qdrant_client.retrieve(
+            collection_name=storage.collection_name, ids=ids, with_vectors=True, with_payload=False
+        )
+        self.qdrant_client.delete(
+            collection_name=storage.collection_name,
+            points_selector=models.PointIdsList(points=ids),
+        )
+        self.corpus_index.subtract(storage.name, source, [point.vector for point in points])
+        storage.sparse_index.delete_chunks(list(chunks.values()))
+        storage.manifest.remove(ids)
+        if self.embedding_store is not None:
+            self.embedding_store.remove_chunks(ids, storage.name)
+
+    @property
+    def embeddings(self):
+        """Embeddings client used at ingestion, the rate-limit-aware scheduler unless disabled."""
+        if self._embeddings is None:
+            model = retrieval_config.get('EMBEDDING_MODEL', 'text-embedding-ada-002')
+            if scheduler_config.get('ENABLED', True):
+                embeddings = EmbeddingScheduler(model, api_key=self.openai_api_key)
+            else:
+                embeddings = OpenAIEmbeddings(model=model, openai_api_key=self.openai_api_key)
+            if self.embedding_store is not None:
+                embeddings = StoredEmbeddings(embeddings, model, self.embedding_store)
+            self._embeddings = embeddings
+        return self._embeddings
+
+    def _upsert_batch(self, storage, source, docs, ids):
+        """
+        Embed and upsert one batch of new chunks, then record it in the keyword index, manifest and centroid.
+
+        Args:
+            storage (CorpusStorage): The corpus the chunks are indexed in.
+            source (str): The document source.
+            docs (list): The new chunks.
+            ids (list): Their content-derived ids.
+
+        Returns:
+            int: Number of upserted chunks.
+        """
+        vectors = self.embeddings.embed_documents([doc.page_content for doc in docs])
+        with self._corpora_lock:
+            if storage.collection_name not in self._ready_collections:
+                # The first batch creates the collection with the configured layout when it does not exist yet
+                ensure_collection(self.qdrant_client, storage.collection_name, len(vectors[0]))
+                self._ready_collections.add(storage.collection_name)
+        # Same payload layout as the LangChain Qdrant vectorstore used at retrieval
+        self.qdrant_client.upsert(
+            collection_name=storage.collection_name,
+            points=[
+                models.PointStruct(
+                    id=cid, vector=vector, payload={"page_content": doc.page_content, "metadata": doc.metadata}
+                )
+                for cid, vector, doc in zip(ids, vectors, docs)
+            ],
+        )
+        # Keep the keyword index used by hybrid search in step with the chunks
+        storage.sparse_index.add_documents(docs)
+        storage.manifest.add(source, docs)
+        self.corpus_index.add(storage.name, source, vectors)
+        if self.embedding_store is not None:
+            self.embedding_store.add_chunks(docs, ids, storage.name)
+        return len(docs)
+
+    def _index_stream(self, storage, source, chunks):
+        """
+        Index the chunks of one source incrementally, in fixed-size batches.
+
+        Only chunks missing from the ingestion manifest are embedded and upserted, under
+        ids derived from their content. At most ``max_in_flight_batches`` batches are
+        being embedded at any time, and chunks that disappeared from a re-ingested
+        document are deleted once the whole document has been seen.
+
+        Args:
+            storage (CorpusStorage): The corpus the document is indexed in.
+            source (str): The document source.
+            chunks (Iterable[Document]): The chunks of the document, possibly lazy.
+
+        Returns:
+            dict: Number of embedded, skipped and removed chunks.
+        """
+        indexed = storage.manifest.chunks(source)
+        seen = set()
+        stats = {"embedded": 0, "skipped": 0, "removed": 0}
+        batch_docs, batch_ids, in_flight = [], [], deque()
+
+        def submit_batch():
+            in_flight.append(self.upsert_executor.submit(self._upsert_batch, storage, source, batch_docs, batch_ids))
+            while len(in_flight) >= self.max_in_flight_batches:
+                stats["embedded"] += in_flight.popleft().result()
+
+        try:
+            for doc in chunks:
+                cid = chunk_id(doc)
+                if cid in seen:
+                    continue
+                seen.add(cid)
+                if cid in indexed:
+                    stats["skipped"] += 1
+                    continue
+                batch_docs.append(doc)
+                batch_ids.append(cid)
+                if len(batch_docs) >= self.embed_batch_size:
+                    submit_batch()
+                    batch_docs, batch_ids = [], []
+            if batch_docs:
+                submit_batch()
+        finally:
+            while in_flight:
+                stats["embedded"] += in_flight.popleft().result()
+
+        stale = {cid: key for cid, key in indexed.items() if cid not in seen}
+        self._delete_chunks(storage, source, stale)
+        stats["removed"] = len(stale)
+        embeddings = self._embeddings
+        if stats["embedded"] and isinstance(embeddings, StoredEmbeddings):
+            logger.info(
+                f"Embedding store served {embeddings.hits} chunk(s), {embeddings.misses} sent to the API so far"
+            )
+            embeddings = embeddings.embeddings
+        if stats["embedded"] and isinstance(embeddings, EmbeddingScheduler):
+            logger.info(f"Embedding throughput: {embeddings.throughput()}")
+        logger.info(
+            f"Ingestion of {source} embedded {stats['embedded']} new chunk(s), skipped "
+            f"{stats['skipped']} already indexed chunk(s) and removed {stats['removed']} stale chunk(s)."
+        )
+        return stats
+
+    @staticmethod
+    def describe(stats):
+        """
+        Summarize ingestion statistics for display.
+
+        Args:
+            stats (dict): Number of embedded, skipped and removed chunks.
+
+        Returns:
+            str: The summary.
+        """
+        return (
+            f"{stats['embedded']} new chunk(s) embedded, {stats['skipped']} embedding(s) skipped "
+            f"for unchanged chunks, {stats['removed']} stale chunk(s) removed."
+        )
+
+    def create_rag_system(self):
+        """
+        Index the documents split by split_and_store incrementally.
+
+        Returns:
+            str: Summary of the embedded, skipped and removed chunks.
+        """
+        try:
+            totals = {"embedded": 0, "skipped": 0, "removed": 0}
+            pending_docs, self.pending_docs = self.pending_docs, {}
+            storage = self.corpus(DEFAULT_CORPUS)
+            for source, docs in pending_docs.items():
+                for key, value in self._index_stream(storage, source, docs).items():
+                    totals[key] += value
+
+            if totals["embedded"] or totals["removed"]:
+                # Cached answers may be stale now that the corpus has changed
+                invalidate_answer_cache()
+
+            logger.info("RAG system created successfully.")
+            return f"RAG system updated: {self.describe(totals)}"
+
+        except Exception as e:
+            logger.error(f"Error creating RAG system: {str(e)}")
+            raise CustomException(f"Error creating RAG system: {str(e)}", sys)
+
+    def indexed_sources(self, corpus=None):
+        """
+        Return the indexed source documents of a corpus with their chunk counts.
+
+        Args:
+            corpus (str, optional): The corpus, defaults to the default corpus.
+
+        Returns:
+            dict: Source to number of chunks.
+        """
+        return self.corpus(corpus).manifest.sources()
+
+    def remove_document(self, source, corpus=None):
+        """
+        Delete every chunk of a source document from the indexes of a corpus.
+
+        Args:
+            source (str): The document source.
+            corpus (str, optional): The corpus, defaults to the default corpus.
+
+        Returns:
+            int: Number of deleted chunks.
+
+        Raises:
+            CustomException: If the chunks cannot be deleted.
+        """
+        try:
+            storage = self.corpus(corpus)
+            chunks = storage.manifest.chunks(source)
+            self._delete_chunks(storage, source, chunks)
+            self.corpus_index.remove(storage.name, source)
+            if chunks:
+                invalidate_answer_cache()
+            logger.info(f"Removed {len(chunks)} chunk(s) of {source}")
+            return len(chunks)
+        except Exception as e:
+            logger.error(f"Error removing document {source}: {str(e)}")
+            raise CustomException(f"Error removing document {source}: {str(e)}", sys)
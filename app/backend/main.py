@@ -1,11 +1,16 @@
 import sys
 import os
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 # Directly set the project root directory
 project_root = "D:/policy_crew"
 # Ensure the project root is at the top of sys.path
 sys.path.insert(0, project_root)
 from crewai import Crew, Process
-from app.backend.tools import RAGTool, GraphRagTool
+from app.backend.tools import RAGTool, GraphRagTool, ReportTool
+from app.backend.tool_memo import new_tool_memo
 from app.backend.crewai_agent.agents import ReportAgents
 from app.backend.crewai_agent.tasks import ReportTasks
 from dotenv import load_dotenv
@@ -14,7 +19,8 @@ from custom_exceptions import CustomException
 from app.backend.langgraph_agent.langraph import WorkflowManager
 from app.backend.utils import get_hyperparameters_from_file 
 from pydantic import BaseModel
-from app.backend.utils import get_openai_response
+from typing import List, Optional
+from app.backend.query_classifier import classify_query, aclassify_query
 # Load environment variables
 load_dotenv()
 # Loading hyper parameters from the yaml file
@@ -22,6 +28,204 @@ config= get_hyperparameters_from_file()
 # Set the OpenAI API key
 os.environ["OPENAI_API_KEY"] = os.getenv("OPENAI_API_KEY")
 os.environ["OPENAI_MODEL_NAME"] = config['LLM_NAME']
+crew_config = config.get('CREW', {})
+serving_config = config.get('SERVING', {})
+CREW_PROCESSES = ("sequential", "parallel")
+
+# Bounded pool running the synchronous crew and graph workflows off the event loop
+agent_executor = ThreadPoolExecutor(
+    max_workers=serving_config.get('AGENT_WORKERS', 4),
+    thread_name_prefix="agent-run",
+)
+
+
+async def run_in_agent_executor(func, *args):
+    """
+    Run a blocking callable on the bounded agent executor.
+
+    Args:
+        func (callable): The blocking callable.
+        *args: Positional arguments for the callable.
+
+    Returns:
+        Any: The callable's result.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(agent_executor, func, *args)
+
+
+async def stream_from_agent_executor(func, *args):
+    """
+    Run a blocking callable on the agent executor, yielding the events it emits.
+
+    The callable receives an extra ``emit(event, data)`` argument it can call from
+    its worker thread. Its return value is yielded last as a ``result`` event.
+
+    Args:
+        func (callable): The blocking callable.
+        *args: Positional arguments for the callable.
+
+    Yields:
+        tuple: Event name and payload.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+
+    def emit(event, data):
+        loop.call_soon_threadsafe(queue.put_nowait, (event, data))
+
+    future = loop.run_in_executor(agent_executor, func, *args, emit)
+    while True:
+        next_event = asyncio.ensure_future(queue.get())
+        done, _ = await asyncio.wait({next_event, future}, return_when=asyncio.FIRST_COMPLETED)
+        if next_event in done:
+            yield next_event.result()
+            continue
+        next_event.cancel()
+        while not queue.empty():
+            yield queue.get_nowait()
+        break
+    yield "result", await future
+
+
+async def stream_rag_answer(rag_tool: RAGTool):
+    """
+    Stream a RAG answer as token events followed by the full answer.
+
+    Args:
+        rag_tool (RAGTool): The tool holding the query.
+
+    Yields:
+        tuple: Event name and payload.
+    """
+    chunks = []
+    async for chunk in rag_tool.astream_RAG():
+        chunks.append(chunk)
+        yield "token", chunk
+    yield "result", "".join(chunks)
+
+def build_crew_template(process: str, corpora: Optional[List[str]] = None) -> Crew:
+    """
+    Build the report crew with a '{query}' placeholder that kickoff fills with the query.
+
+    In the "parallel" process the policy and financial tasks both read the
+    summary and run concurrently, and the report task waits for both; in the
+    "sequential" process every task reads the previous one.
+
+    Args:
+        process (str): "sequential" or "parallel".
+        corpora (List[str], optional): Corpora searched by the report tools, routed per query when omitted.
+
+    Returns:
+        Crew: The crew template.
+    """
+    parallel = process == "parallel"
+    agents = ReportAgents()
+    tasks = ReportTasks()
+
+    # Create Agents
+    summary_agent = agents.summary_agent()
+    policy_agent = agents.policy_agent(corpora)
+    financial_agent = agents.financial_agent(corpora)
+    report_agent = agents.report_agent()
+
+    # Create Tasks
+    summary_task = tasks.summary_task(summary_agent, "{query}")
+    branch_context = [summary_task] if parallel else None
+    policy_task = tasks.policy_task(policy_agent, corpora, context=branch_context, async_execution=parallel)
+    financial_task = tasks.financial_task(
+        financial_agent, corpora, context=branch_context, async_execution=parallel
+    )
+    report_task = tasks.report_task(report_agent, context=[policy_task, financial_task] if parallel else None)
+
+    # Form the crew; async tasks run concurrently until a task that depends on them
+    return Crew(
+        agents=[summary_agent, policy_agent, financial_agent, report_agent],
+        tasks=[summary_task, policy_task, financial_task, report_task],
+        process=Process.sequential,
+        verbose=True,
+        memory=True,
+    )
+
+
+# Crew templates and compiled LangGraph workflows, keyed by pipeline, process and corpora
+_agent_templates = {}
+_agent_templates_lock = threading.Lock()
+
+
+def _get_template(key: tuple, factory):
+    """Return the template stored under key, building it once on first use."""
+    template = _agent_templates.get(key)
+    if template is None:
+        with _agent_templates_lock:
+            template = _agent_templates.get(key)
+            if template is None:
+                start = time.perf_counter()
+                template = factory()
+                _agent_templates[key] = template
+                logger.info(f"Built agent template {key} in {(time.perf_counter() - start) * 1000:.0f} ms")
+    return template
+
+
+def _corpora_key(corpora: Optional[List[str]]) -> Optional[tuple]:
+    return tuple(sorted(corpora)) if corpora else None
+
+
+def get_crew_template(process: Optional[str] = None, corpora: Optional[List[str]] = None) -> Crew:
+    """
+    Return the shared report crew template; copy it before kicking it off.
+
+    Args:
+        process (str, optional): "sequential" or "parallel", defaults to CREW.PROCESS.
+        corpora (List[str], optional): Corpora searched by the report tools, routed per query when omitted.
+
+    Returns:
+        Crew: The template.
+
+    Raises:
+        CustomException: If the process is unknown.
+    """
+    process = process or crew_config.get('PROCESS', "sequential")
+    if process not in CREW_PROCESSES:
+        raise CustomException(f"Unknown crew process: {process}", sys)
+    return _get_template(("crew", process, _corpora_key(corpora)), lambda: build_crew_template(process, corpora))
+
+
+def get_workflow_manager(corpora: Optional[List[str]] = None) -> WorkflowManager:
+    """
+    Return the shared LangGraph workflow, compiled once and safe to run concurrently.
+
+    Args:
+        corpora (List[str], optional): Corpora searched by the report tool, routed per query when omitted.
+
+    Returns:
+        WorkflowManager: The workflow.
+
+    Raises:
+        ValueError: If OPENAI_API_KEY is not set.
+    """
+    def factory():
+        openai_api_key = os.getenv("OPENAI_API_KEY")
+        if not openai_api_key:
+            raise ValueError("OPENAI_API_KEY environment variable not set")
+        return WorkflowManager(openai_api_key, corpora=corpora)
+
+    return _get_template(("langraph", _corpora_key(corpora)), factory)
+
+
+def prebuild_agents() -> None:
+    """
+    Build the default crew template and LangGraph workflow so the first request does not pay for them.
+    """
+    if not serving_config.get('PREBUILD_AGENTS', True):
+        return
+    try:
+        get_crew_template()
+        get_workflow_manager()
+    except Exception as e:
+        # Requests build the templates on demand and surface the error themselves
+        logger.warning(f"Could not prebuild the agent templates: {e}")
+
 
 # Python class to differentiate between generic or project specific query
 class OpenAIResponseModel(BaseModel):
@@ -34,59 +238,68 @@ class CrewManager:
 
     Attributes:
         prompt (str): The user query or prompt.
+        corpora (List[str]): Corpora searched by the RAG and report tools, routed per query when None.
     """
 
-    def __init__(self, prompt: str):
+    def __init__(self, prompt: str, corpora: Optional[List[str]] = None):
         """
         Initializes the CrewManager with a user prompt.
 
         Args:
             prompt (str): The user query or prompt.
+            corpora (List[str], optional): Corpora to search, routed per query when omitted.
         """
         self.prompt = prompt
+        self.corpora = corpora
 
 
-    def start_crew(self, is_generic: bool) -> str:
+    def build_crew(self, task_callback=None, process=None) -> Crew:
+        """
+        Build the report crew for a project-specific query from the shared template.
+
+        Args:
+            task_callback (callable, optional): Called with each task output as the crew progresses.
+            process (str, optional): "sequential" or "parallel", defaults to CREW.PROCESS.
+
+        Returns:
+            Crew: A private copy of the template, ready to kick off with the query as input.
+
+        Raises:
+            CustomException: If the process is unknown.
+        """
+        # Agents and tasks keep per-run state, so every request works on its own copy
+        crew = get_crew_template(process, self.corpora).copy()
+        crew.task_callback = task_callback
+        memo = new_tool_memo()
+        if memo is not None:
+            # The copies share the template's tools, so the run gets report tools bound to its own memo
+            for member in [*crew.agents, *crew.tasks]:
+                if member.tools:
+                    member.tools = [
+                        tool.model_copy(update={"memo": memo}) if isinstance(tool, ReportTool) else tool
+                        for tool in member.tools
+                    ]
+        return crew
+
+    def start_crew(self, is_generic: bool, task_callback=None) -> str:
         """
         Start the crew based on the query classification.
 
         Args:
             is_generic (bool): Indicates if the query is generic.
+            task_callback (callable, optional): Called with each task output as the crew progresses.
 
         Returns:
             str: The result of the crew processing.
         """
         try:
             if is_generic:
-                rag = RAGTool(self.prompt)
+                rag = RAGTool(self.prompt, corpora=self.corpora)
                 rag_result = rag.qa_from_RAG()
                 logger.info(f"RAG result: {rag_result}")
                 return rag_result
             else:
-                agents = ReportAgents()
-                tasks = ReportTasks()
-
-                # Create Agents
-                summary_agent = agents.summary_agent()
-                policy_agent = agents.policy_agent()
-                financial_agent = agents.financial_agent()
-                report_agent = agents.report_agent()
-
-                # Create Tasks
-                summary_task = tasks.summary_task(summary_agent, self.prompt)
-                policy_task = tasks.policy_task(policy_agent)
-                financial_task = tasks.financial_task(financial_agent)
-                report_task = tasks.report_task(report_agent)
-
-                # Form the crew
-                crew = Crew(
-                    agents=[summary_agent, policy_agent, financial_agent, report_agent],
-                    tasks=[summary_task, policy_task, financial_task, report_task],
-                    process=Process.sequential,
-                    verbose=True,
-                    memory=True,
-                )
-
+                crew = self.build_crew(task_callback=task_callback)
                 inputs = {"query": self.prompt}
                 result = crew.kickoff(inputs=inputs)
                 logger.info(f"Crew kickoff result: {result}")
@@ -95,6 +308,57 @@ class CrewManager:
             logger.error(f"Error starting crew: {str(e)}")
             raise CustomException(f"Error starting crew: {e}", sys)
 
+    async def astart_crew(self, is_generic: bool) -> str:
+        """
+        Start the crew without blocking the event loop.
+
+        Generic queries use the native async RAG chain, while the crew itself
+        runs on the bounded agent executor.
+
+        Args:
+            is_generic (bool): Indicates if the query is generic.
+
+        Returns:
+            str: The result of the crew processing.
+        """
+        if is_generic:
+            rag_result = await RAGTool(self.prompt, corpora=self.corpora).aqa_from_RAG()
+            logger.info(f"RAG result: {rag_result}")
+            return rag_result
+        return await run_in_agent_executor(self.start_crew, False)
+
+    def run_crew_with_events(self, emit) -> str:
+        """
+        Run the project-specific crew, emitting a ``task`` event whenever a task finishes.
+
+        Args:
+            emit (Callable[[str, dict], None]): Receives the event name and payload.
+
+        Returns:
+            str: The result of the crew processing.
+        """
+        def task_callback(output):
+            emit("task", {"agent": str(getattr(output, "agent", "")), "output": str(output)})
+
+        return str(self.start_crew(False, task_callback=task_callback))
+
+    async def astream_crew(self, is_generic: bool):
+        """
+        Run the crew, yielding answer tokens or task-level progress events.
+
+        Args:
+            is_generic (bool): Indicates if the query is generic.
+
+        Yields:
+            tuple: Event name and payload, ending with a ``result`` event.
+        """
+        if is_generic:
+            events = stream_rag_answer(RAGTool(self.prompt, corpora=self.corpora))
+        else:
+            events = stream_from_agent_executor(self.run_crew_with_events)
+        async for event in events:
+            yield event
+
 
 
 
@@ -107,18 +371,23 @@ class LangraphManager:
 
     Attributes:
         crew_manager (CrewManager): An instance of CrewManager.
+        corpora (List[str]): Corpora searched by the RAG and report tools, routed per query when None.
     """
 
-    def __init__(self, prompt: str):
+    def __init__(self, prompt: str, openai_response: OpenAIResponseModel = None,
+                 corpora: Optional[List[str]] = None):
         """
         Initializes the LangraphManager with a user prompt.
 
         Args:
             prompt (str): The user query or prompt.
+            openai_response (OpenAIResponseModel, optional): Classification computed by the caller.
+            corpora (List[str], optional): Corpora to search, routed per query when omitted.
         """
-        self.openai_response=get_openai_response(prompt)
+        self.openai_response = openai_response or classify_query(prompt)
         self.prompt = prompt
-        self.rag_tool = RAGTool(prompt)
+        self.corpora = corpora
+        self.rag_tool = RAGTool(prompt, corpora=corpora)
         logger.info("LangraphManager initialized")
 
     def run_workflow(self) -> str:
@@ -142,6 +411,72 @@ class LangraphManager:
             logger.error(f"Error running conditional workflow: {str(e)}")
             raise CustomException(f"Error running conditional workflow: {e}", sys)
 
+    async def arun_workflow(self) -> str:
+        """
+        Run the conditional workflow without blocking the event loop.
+
+        Returns:
+            str: The result of the workflow processing.
+        """
+        try:
+            logger.info(f"OpenAI response: {self.openai_response}")
+            if self.openai_response.is_generic:
+                rag_result = await self.rag_tool.aqa_from_RAG()
+                logger.info(f"RAG result: {rag_result}")
+                return rag_result
+            return await run_in_agent_executor(self.run_langraph_workflow)
+        except Exception as e:
+            logger.error(f"Error running conditional workflow: {str(e)}")
+            raise CustomException(f"Error running conditional workflow: {e}", sys)
+
+    def run_langgraph_with_events(self, emit) -> str:
+        """
+        Run the langraph workflow, emitting a ``node`` event for every node update.
+
+        Args:
+            emit (Callable[[str, dict], None]): Receives the event name and payload.
+
+        Returns:
+            str: The final answer of the workflow.
+        """
+        workflow_manager = get_workflow_manager(self.corpora)
+        result = None
+        for node_name, message in workflow_manager.stream(self.prompt):
+            emit("node", {"name": node_name, "content": str(message.content)})
+            result = message.content
+        if not result:
+            raise ValueError("Langraph workflow returned None")
+        logger.info(f"Langraph workflow result: {result}")
+        return result
+
+    async def astream_workflow(self):
+        """
+        Run the conditional workflow, yielding answer tokens or node-level progress events.
+
+        Yields:
+            tuple: Event name and payload, ending with a ``result`` event.
+        """
+        if self.openai_response.is_generic:
+            events = stream_rag_answer(self.rag_tool)
+        else:
+            events = stream_from_agent_executor(self.run_langgraph_with_events)
+        async for event in events:
+            yield event
+
+    @classmethod
+    async def acreate(cls, prompt: str, corpora: Optional[List[str]] = None) -> "LangraphManager":
+        """
+        Classify the prompt asynchronously and build the manager.
+
+        Args:
+            prompt (str): The user query or prompt.
+            corpora (List[str], optional): Corpora to search, routed per query when omitted.
+
+        Returns:
+            LangraphManager: The initialized manager.
+        """
+        return cls(prompt, openai_response=await aclassify_query(prompt), corpora=corpora)
+
     def run_langraph_workflow(self) -> str:
         """
         Run the langraph workflow.
@@ -150,10 +485,7 @@ class LangraphManager:
             str: The result of the langraph workflow.
         """
         try:
-            openai_api_key = os.getenv("OPENAI_API_KEY")
-            if not openai_api_key:
-                raise ValueError("OPENAI_API_KEY environment variable not set")
-            workflow_manager = WorkflowManager(openai_api_key)
+            workflow_manager = get_workflow_manager(self.corpora)
             result = workflow_manager.run(self.prompt)
             if result:
                 logger.info(f"Langraph workflow result: {result}")
@@ -0,0 +1,7 @@
+from pydantic import BaseModel
+
+
+class QuestionResponse(BaseModel):
+    question: str
+    response: str
+    agent: str
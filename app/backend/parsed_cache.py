@@ -0,0 +1,199 @@
+import os
+import sys
+import gzip
+import json
+import hashlib
+import tempfile
+import threading
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+from langchain_core.documents import Document
+from app.backend.utils import get_hyperparameters_from_file
+from app.backend.sparse_index import PROJECT_ROOT
+from custom_logger import logger
+from custom_exceptions import CustomException
+
+# Loading hyper parameters from the yaml file
+config = get_hyperparameters_from_file()
+parsed_cache_config = config.get('PARSED_CACHE', {})
+
+HASH_BLOCK_BYTES = 1 << 20
+# Metadata that names the document rather than describing the page, set again on every read
+SOURCE_KEYS = ("source", "file_path")
+
+
+def file_hash(file_path: str) -> str:
+    """
+    Hash the content of a file without reading it into memory at once.
+
+    Args:
+        file_path (str): Path of the file.
+
+    Returns:
+        str: The sha256 hex digest of the file content.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for block in iter(lambda: file.read(HASH_BLOCK_BYTES), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ParsedDocumentCache:
+    """
+    Cache of the page text and metadata extracted from PDFs, keyed by file content hash.
+
+    Every parsed file is stored as one gzipped JSON-lines file of pages per parser
+    backend, so the same PDF uploaded under another name, downloaded again from a
+    URL, or loaded by the evals is never parsed twice.
+
+    Attributes:
+        path (str): Directory holding the cached documents.
+        hits (int): Documents served from the cache.
+        misses (int): Documents parsed and written to the cache.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Open the cache, creating its directory on first use.
+
+        Args:
+            path (str, optional): Cache directory, defaults to PARSED_CACHE.PATH.
+        """
+        path = path or parsed_cache_config.get('PATH', "data/parsed_cache")
+        self.path = path if os.path.isabs(path) else os.path.join(PROJECT_ROOT, path)
+        os.makedirs(self.path, exist_ok=True)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _entry_path(self, digest: str, backend: str) -> str:
+        return os.path.join(self.path, f"{digest}.{backend}.jsonl.gz")
+
+    def contains(self, digest: str, backend: str) -> bool:
+        """
+        Check whether a document has been cached.
+
+        Args:
+            digest (str): Content hash of the PDF.
+            backend (str): Parser backend the pages were extracted with.
+
+        Returns:
+            bool: True if the pages are cached.
+        """
+        return os.path.exists(self._entry_path(digest, backend))
+
+    def documents(self) -> Dict[str, List[str]]:
+        """
+        List the cached documents.
+
+        Returns:
+            Dict[str, List[str]]: Content hash of every cached PDF to the backends it was parsed with.
+        """
+        documents = {}
+        for name in sorted(os.listdir(self.path)):
+            if name.endswith(".jsonl.gz"):
+                digest, backend = name[:-len(".jsonl.gz")].split(".", 1)
+                documents.setdefault(digest, []).append(backend)
+        return documents
+
+    def read(self, digest: str, backend: str, source: str) -> Iterator[Document]:
+        """
+        Read the cached pages of a document lazily.
+
+        Args:
+            digest (str): Content hash of the PDF.
+            backend (str): Parser backend the pages were extracted with.
+            source (str): Source recorded in the metadata of the returned pages.
+
+        Yields:
+            Document: The next page.
+        """
+        with gzip.open(self._entry_path(digest, backend), "rt", encoding="utf-8") as entry:
+            for line in entry:
+                page = json.loads(line)
+                metadata = page["metadata"]
+                for key in SOURCE_KEYS:
+                    if key in metadata:
+                        metadata[key] = source
+                yield Document(page_content=page["page_content"], metadata=metadata)
+
+    def write_through(self, digest: str, backend: str, pages: Iterable[Document]) -> Iterator[Document]:
+        """
+        Pass pages through while writing them to the cache.
+
+        The entry is only published once every page has been consumed, so an
+        interrupted parse never leaves a truncated document behind.
+
+        Args:
+            digest (str): Content hash of the PDF.
+            backend (str): Parser backend the pages were extracted with.
+            pages (Iterable[Document]): The pages, possibly lazy.
+
+        Yields:
+            Document: The pages, unchanged.
+        """
+        handle, temp_path = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        try:
+            with os.fdopen(handle, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb") as entry:
+                for page in pages:
+                    metadata = {key: value for key, value in page.metadata.items() if key not in SOURCE_KEYS}
+                    metadata.update({key: "" for key in SOURCE_KEYS if key in page.metadata})
+                    entry.write(json.dumps(
+                        {"page_content": page.page_content, "metadata": metadata}, ensure_ascii=False
+                    ).encode("utf-8") + b"\n")
+                    yield page
+            os.replace(temp_path, self._entry_path(digest, backend))
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def iter_pages(self, file_path: str, backend: str, parse: Callable[[], Iterable[Document]],
+                   source: Optional[str] = None) -> Iterator[Document]:
+        """
+        Yield the pages of a PDF from the cache, parsing and caching them on a miss.
+
+        Args:
+            file_path (str): Path of the PDF on local disk.
+            backend (str): Parser backend, part of the cache key.
+            parse (Callable): Returns the pages of the PDF when it is not cached.
+            source (str, optional): Source recorded in the metadata, defaults to the file path.
+
+        Yields:
+            Document: The next page.
+
+        Raises:
+            CustomException: If the file cannot be hashed or read.
+        """
+        source = source or file_path
+        try:
+            digest = file_hash(file_path)
+        except Exception as e:
+            logger.error(f"Error hashing {file_path}: {str(e)}")
+            raise CustomException(f"Error hashing {file_path}: {str(e)}", sys)
+        if self.contains(digest, backend):
+            with self._lock:
+                self.hits += 1
+            logger.info(f"Parsed-document cache hit for {source}")
+            yield from self.read(digest, backend, source)
+            return
+        with self._lock:
+            self.misses += 1
+        yield from self.write_through(digest, backend, parse())
+
+
+_parsed_cache = None
+
+
+def get_parsed_cache() -> Optional[ParsedDocumentCache]:
+    """
+    Return the process-wide parsed-document cache.
+
+    Returns:
+        ParsedDocumentCache or None: The shared cache, or None if PARSED_CACHE is disabled.
+    """
+    global _parsed_cache
+    if not parsed_cache_config.get('ENABLED', True):
+        return None
+    if _parsed_cache is None:
+        _parsed_cache = ParsedDocumentCache()
+    return _parsed_cache
@@ -0,0 +1,248 @@
+import os
+import sys
+import tempfile
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional
+import requests
+from langchain_core.documents import Document
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from custom_logger import logger
+from custom_exceptions import CustomException
+from app.backend.utils import get_hyperparameters_from_file
+
+# Loading hyper parameters from the yaml file
+config = get_hyperparameters_from_file()
+ingestion_config = config.get('INGESTION', {})
+
+PARSER_BACKENDS = ("pypdf", "pdfplumber")
+
+
+def parser_for(source_kind: str) -> str:
+    """
+    Return the parser backend configured for a kind of source.
+
+    Args:
+        source_kind (str): 'file' or 'url'.
+
+    Returns:
+        str: 'pypdf' or 'pdfplumber'.
+    """
+    defaults = {"file": "pypdf", "url": "pdfplumber"}
+    backend = (ingestion_config.get('PARSERS', {}) or {}).get(source_kind, defaults.get(source_kind, "pypdf"))
+    if backend not in PARSER_BACKENDS:
+        raise CustomException(f"Unknown PDF parser backend: {backend}", sys)
+    return backend
+
+
+def count_pages(file_path: str) -> int:
+    """
+    Count the pages of a PDF without extracting any text.
+
+    Args:
+        file_path (str): Path of the PDF.
+
+    Returns:
+        int: Number of pages.
+    """
+    from pypdf import PdfReader
+    return len(PdfReader(file_path).pages)
+
+
+def download_pdf(url: str) -> str:
+    """
+    Stream a PDF to a temporary file; the caller removes it.
+
+    Args:
+        url (str): URL of the PDF.
+
+    Returns:
+        str: Path of the downloaded file.
+
+    Raises:
+        CustomException: If the PDF cannot be downloaded.
+    """
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmpfile:
+        temp_path = tmpfile.name
+        try:
+            response = requests.get(url, stream=True, timeout=60)
+            response.raise_for_status()
+            for chunk in response.iter_content(chunk_size=1 << 20):
+                tmpfile.write(chunk)
+        except Exception as e:
+            os.remove(temp_path)
+            raise CustomException(f"Error downloading {url}: {str(e)}", sys)
+    return temp_path
+
+
+def parse_page_range(file_path: str, backend: str, start: int, stop: int, source: str) -> List[Document]:
+    """
+    Extract the text of a range of pages, one Document per page.
+
+    Runs inside a worker process, so it only takes picklable arguments.
+
+    Args:
+        file_path (str): Path of the PDF on local disk.
+        backend (str): 'pypdf' or 'pdfplumber'.
+        start (int): First page index, inclusive.
+        stop (int): Last page index, exclusive.
+        source (str): Source recorded in the metadata, e.g. the original URL.
+
+    Returns:
+        List[Document]: The pages, with the same 'source' and 'page' metadata as the LangChain loaders.
+    """
+    documents = []
+    if backend == "pdfplumber":
+        import pdfplumber
+        with pdfplumber.open(file_path) as pdf:
+            total_pages = len(pdf.pages)
+            for page_number in range(start, stop):
+                text = pdf.pages[page_number].extract_text() or ""
+                documents.append(Document(
+                    page_content=text,
+                    metadata={"source": source, "file_path": source, "page": page_number, "total_pages": total_pages},
+                ))
+    else:
+        from pypdf import PdfReader
+        reader = PdfReader(file_path)
+        for page_number in range(start, stop):
+            text = reader.pages[page_number].extract_text() or ""
+            documents.append(Document(page_content=text, metadata={"source": source, "page": page_number}))
+    return documents
+
+
+class ParallelPDFParser:
+    """
+    Parses PDFs by fanning page ranges out over a process pool.
+
+    Attributes:
+        max_workers (int): Number of parser processes.
+        pages_per_task (int): Pages parsed by one pool task.
+        max_in_flight (int): Page ranges parsed ahead of the consumer.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, pages_per_task: Optional[int] = None,
+                 max_in_flight: Optional[int] = None):
+        """
+        Initialize the parser; the process pool is started on first use.
+
+        Args:
+            max_workers (int, optional): Overrides INGESTION.MAX_WORKERS.
+            pages_per_task (int, optional): Overrides INGESTION.PAGES_PER_TASK.
+            max_in_flight (int, optional): Overrides INGESTION.MAX_IN_FLIGHT_PAGE_TASKS,
+                defaults to twice the worker count.
+        """
+        self.max_workers = max_workers or ingestion_config.get('MAX_WORKERS', os.cpu_count() or 2)
+        self.pages_per_task = pages_per_task or ingestion_config.get('PAGES_PER_TASK', 8)
+        self.max_in_flight = max_in_flight or ingestion_config.get('MAX_IN_FLIGHT_PAGE_TASKS', 2 * self.max_workers)
+        self._pool = None
+        self._lock = threading.Lock()
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        """Process pool shared by every parse call."""
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    # Forking a threaded worker process is unsafe, spawn fresh interpreters instead
+                    context = multiprocessing.get_context(ingestion_config.get('START_METHOD', "spawn"))
+                    self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context)
+        return self._pool
+
+    def iter_parse(self, file_path: str, backend: str, source: Optional[str] = None) -> Iterator[Document]:
+        """
+        Parse a local PDF lazily, yielding one Document per page in page order.
+
+        At most ``max_in_flight`` page ranges are parsed ahead of the consumer, so
+        memory stays bounded however long the document is.
+
+        Args:
+            file_path (str): Path of the PDF on local disk.
+            backend (str): 'pypdf' or 'pdfplumber'.
+            source (str, optional): Source recorded in the metadata, defaults to the file path.
+
+        Yields:
+            Document: The next page.
+
+        Raises:
+            CustomException: If the PDF cannot be parsed.
+        """
+        source = source or file_path
+        try:
+            total_pages = count_pages(file_path)
+            ranges = [
+                (start, min(start + self.pages_per_task, total_pages))
+                for start in range(0, total_pages, self.pages_per_task)
+            ]
+            if self.max_workers <= 1 or len(ranges) <= 1:
+                for start, stop in ranges:
+                    yield from parse_page_range(file_path, backend, start, stop, source)
+                return
+            pending = deque()
+            for start, stop in ranges:
+                pending.append(self.pool.submit(parse_page_range, file_path, backend, start, stop, source))
+                if len(pending) >= self.max_in_flight:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+            logger.info(f"Parsed {total_pages} pages of {source} with {backend} over {len(ranges)} tasks")
+        except Exception as e:
+            logger.error(f"Error parsing PDF {source}: {str(e)}")
+            raise CustomException(f"Error parsing PDF {source}: {str(e)}", sys)
+
+    def parse(self, file_path: str, backend: str, source: Optional[str] = None) -> List[Document]:
+        """
+        Parse a local PDF, one Document per page in page order.
+
+        Args:
+            file_path (str): Path of the PDF on local disk.
+            backend (str): 'pypdf' or 'pdfplumber'.
+            source (str, optional): Source recorded in the metadata, defaults to the file path.
+
+        Returns:
+            List[Document]: The pages.
+
+        Raises:
+            CustomException: If the PDF cannot be parsed.
+        """
+        return list(self.iter_parse(file_path, backend, source=source))
+
+    def iter_parse_url(self, url: str, backend: str) -> Iterator[Document]:
+        """
+        Download a PDF to a temporary file and parse it lazily.
+
+        Args:
+            url (str): URL of the PDF.
+            backend (str): 'pypdf' or 'pdfplumber'.
+
+        Yields:
+            Document: The next page, with the URL as its source.
+        """
+        temp_path = download_pdf(url)
+        try:
+            yield from self.iter_parse(temp_path, backend, source=url)
+        finally:
+            os.remove(temp_path)
+
+    def parse_url(self, url: str, backend: str) -> List[Document]:
+        """
+        Download a PDF to a temporary file and parse it.
+
+        Args:
+            url (str): URL of the PDF.
+            backend (str): 'pypdf' or 'pdfplumber'.
+
+        Returns:
+            List[Document]: The pages, with the URL as their source.
+        """
+        return list(self.iter_parse_url(url, backend))
+
+    def shutdown(self) -> None:
+        """Stop the worker processes."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
@@ -0,0 +1,307 @@
+import os
+import re
+import json
+import math
+import time
+import zlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from app.backend.utils import (
+    get_hyperparameters_from_file,
+    get_openai_response,
+    aget_openai_response,
+    OpenAIResponseModel,
+)
+from app.backend.rerankers import tokenize
+from app.backend.embedding_cache import normalize_text
+from custom_logger import logger
+
+# Loading hyper parameters from the yaml file
+config = get_hyperparameters_from_file()
+classifier_config = config.get('QUERY_CLASSIFIER', {})
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+GENERIC_LABEL = "generic"
+PROJECT_LABEL = "project specific"
+FEATURE_DIM = 2048
+CUE_WEIGHT = 2.0
+
+_MONTH = (r"jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|"
+          r"sep(?:tember)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?|spring|summer|fall|autumn|winter|q[1-4]")
+
+# Details that describe a concrete project rather than ask about the documents
+PROJECT_CUES = {
+    "date": re.compile(
+        rf"\b(?:{_MONTH})\s+(?:of\s+)?20\d\d\b"
+        r"|\b(?:start\w*|begin\w*|break\w* ground|clos\w*)\b[^.?!]*\b(?:20\d\d|next|this year)\b",
+        re.IGNORECASE,
+    ),
+    "money": re.compile(r"\$\s?\d|\b\d+(?:\.\d+)?\s?(?:million|m|k)\b", re.IGNORECASE),
+    "quantity": re.compile(
+        r"\b\d[\d,]*[- ](?:units?|townhomes|homes|apartments|condos|stor(?:y|ies)|households|kw|sq ft)\b",
+        re.IGNORECASE,
+    ),
+    "named_project": re.compile(
+        r"\b(?:[A-Z][a-z]+\s+){1,3}(?:Project|Plaza|Apartments|Homes|Residences|Commons|Court|Place|"
+        r"Terrace|Gardens|Village|Lofts|Manor|Living)\b|\b[Pp]roject\s+[A-Z][a-z]+"
+    ),
+    "first_person": re.compile(
+        r"\b(?:we are|we have|we plan|our (?:\d+-unit |nonprofit |firm |developer |tenant |housing )?"
+        r"(?:project|property|building|team|nonprofit|firm|company|association|authority))\b",
+        re.IGNORECASE,
+    ),
+}
+
+
+def _hash_feature(feature: str) -> int:
+    return zlib.crc32(feature.encode("utf-8")) % FEATURE_DIM
+
+
+def extract_features(text: str) -> Dict[int, float]:
+    """
+    Turn a query into an L2-normalized sparse vector.
+
+    Hashed unigrams and bigrams capture wording, and one extra dimension per
+    matched project cue captures concrete project details.
+
+    Args:
+        text (str): The query.
+
+    Returns:
+        Dict[int, float]: Feature index to weight.
+    """
+    terms = tokenize(text)
+    vector = {}
+    for feature in terms + [f"{a} {b}" for a, b in zip(terms, terms[1:])]:
+        vector[_hash_feature(feature)] = 1.0
+    for offset, pattern in enumerate(PROJECT_CUES.values()):
+        if pattern.search(text):
+            vector[FEATURE_DIM + offset] = CUE_WEIGHT
+    norm = math.sqrt(sum(value * value for value in vector.values()))
+    return {index: value / norm for index, value in vector.items()} if norm else vector
+
+
+def _dot(a: Dict[int, float], b: Dict[int, float]) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(value * b.get(index, 0.0) for index, value in a.items())
+
+
+def load_examples(path: Optional[str] = None) -> List[Tuple[str, str]]:
+    """
+    Load labeled classification examples from a jsonl file.
+
+    Args:
+        path (str, optional): File of {"question", "label"} lines, defaults to
+            QUERY_CLASSIFIER.EXAMPLES_PATH.
+
+    Returns:
+        List[Tuple[str, str]]: The (question, label) pairs, empty if the file is missing.
+    """
+    path = path or classifier_config.get('EXAMPLES_PATH', "evals/classifier-set.jsonl")
+    path = path if os.path.isabs(path) else os.path.join(PROJECT_ROOT, path)
+    if not os.path.exists(path):
+        logger.warning(f"Query classifier examples not found at {path}")
+        return []
+    examples = []
+    with open(path, 'r') as file:
+        for line in file:
+            if line.strip():
+                record = json.loads(line)
+                examples.append((record["question"], record["label"]))
+    return examples
+
+
+class QueryClassifier:
+    """
+    Generic-vs-project-specific query classifier with a local fast path.
+
+    A nearest-centroid model over hashed n-grams and project cues decides the
+    queries it is confident about; the rest fall back to the LLM. Decisions are
+    cached per normalized query.
+
+    Attributes:
+        min_margin (float): Minimum centroid similarity margin for a local decision.
+        cache_size (int): Capacity of the decision cache.
+        local_decisions (int): Queries decided by the local model.
+        llm_decisions (int): Queries that fell back to the LLM.
+        cache_hits (int): Queries answered from the decision cache.
+    """
+
+    def __init__(self, examples: Optional[List[Tuple[str, str]]] = None,
+                 min_margin: Optional[float] = None, cache_size: Optional[int] = None):
+        """
+        Train the local model from labeled examples.
+
+        Args:
+            examples (List[Tuple[str, str]], optional): (question, label) pairs,
+                defaults to the file at QUERY_CLASSIFIER.EXAMPLES_PATH.
+            min_margin (float, optional): Overrides QUERY_CLASSIFIER.MIN_MARGIN.
+            cache_size (int, optional): Overrides QUERY_CLASSIFIER.CACHE_SIZE.
+        """
+        self.enabled = classifier_config.get('ENABLED', True)
+        self.min_margin = classifier_config.get('MIN_MARGIN', 0.05) if min_margin is None else min_margin
+        self.cache_size = cache_size or classifier_config.get('CACHE_SIZE', 4096)
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.local_decisions = 0
+        self.llm_decisions = 0
+        self.cache_hits = 0
+        self.centroids = {}
+        self.fit(load_examples() if examples is None else examples)
+
+    def fit(self, examples: List[Tuple[str, str]]) -> None:
+        """
+        Compute one centroid per label.
+
+        Args:
+            examples (List[Tuple[str, str]]): (question, label) pairs.
+        """
+        sums, counts = {}, {}
+        for question, label in examples:
+            centroid = sums.setdefault(label, {})
+            for index, value in extract_features(question).items():
+                centroid[index] = centroid.get(index, 0.0) + value
+            counts[label] = counts.get(label, 0) + 1
+        self.centroids = {}
+        for label, centroid in sums.items():
+            norm = math.sqrt(sum(value * value for value in centroid.values())) or 1.0
+            self.centroids[label] = {index: value / norm for index, value in centroid.items()}
+        logger.info(f"Query classifier trained on {sum(counts.values())} examples: {counts}")
+
+    def predict(self, query: str) -> Tuple[Optional[bool], float]:
+        """
+        Classify a query with the local model only.
+
+        Args:
+            query (str): The user query.
+
+        Returns:
+            Tuple[Optional[bool], float]: Whether the query is generic (None when
+            the model is untrained) and the similarity margin between the labels.
+        """
+        if GENERIC_LABEL not in self.centroids or PROJECT_LABEL not in self.centroids:
+            return None, 0.0
+        features = extract_features(query)
+        margin = _dot(features, self.centroids[GENERIC_LABEL]) - _dot(features, self.centroids[PROJECT_LABEL])
+        return margin > 0, abs(margin)
+
+    def _cached(self, key: str) -> Optional[OpenAIResponseModel]:
+        with self._lock:
+            decision = self._cache.get(key)
+            if decision is not None:
+                self._cache.move_to_end(key)
+                self.cache_hits += 1
+            return decision
+
+    def _remember(self, key: str, decision: OpenAIResponseModel) -> None:
+        with self._lock:
+            self._cache[key] = decision
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _local_decision(self, query: str) -> Optional[OpenAIResponseModel]:
+        """Return the local decision when it clears the confidence margin, otherwise None."""
+        if not self.enabled:
+            return None
+        start = time.perf_counter()
+        is_generic, margin = self.predict(query)
+        elapsed_us = (time.perf_counter() - start) * 1e6
+        if is_generic is None or margin < self.min_margin:
+            logger.info("Query classifier unsure (margin %.3f), falling back to the LLM", margin)
+            return None
+        self.local_decisions += 1
+        logger.info("Query classified locally as %s (margin %.3f) in %.0f us",
+                    GENERIC_LABEL if is_generic else PROJECT_LABEL, margin, elapsed_us)
+        return OpenAIResponseModel(is_generic=is_generic)
+
+    def classify(self, query: str) -> OpenAIResponseModel:
+        """
+        Classify a query, calling the LLM only when the local model is unsure.
+
+        Args:
+            query (str): The user query.
+
+        Returns:
+            OpenAIResponseModel: Model indicating if the query is generic.
+        """
+        key = normalize_text(query)
+        decision = self._cached(key)
+        if decision is None:
+            decision = self._local_decision(query)
+            if decision is None:
+                decision = get_openai_response(query)
+                self.llm_decisions += 1
+            self._remember(key, decision)
+        return decision
+
+    async def aclassify(self, query: str) -> OpenAIResponseModel:
+        """
+        Classify a query, awaiting the LLM only when the local model is unsure.
+
+        Args:
+            query (str): The user query.
+
+        Returns:
+            OpenAIResponseModel: Model indicating if the query is generic.
+        """
+        key = normalize_text(query)
+        decision = self._cached(key)
+        if decision is None:
+            decision = self._local_decision(query)
+            if decision is None:
+                decision = await aget_openai_response(query)
+                self.llm_decisions += 1
+            self._remember(key, decision)
+        return decision
+
+    def stats(self) -> dict:
+        """
+        Return how queries were decided so far.
+
+        Returns:
+            dict: Counts of local, LLM and cached decisions.
+        """
+        return {"local": self.local_decisions, "llm": self.llm_decisions, "cached": self.cache_hits}
+
+
+_query_classifier = None
+_query_classifier_lock = threading.Lock()
+
+
+def get_query_classifier() -> QueryClassifier:
+    """
+    Return the process-wide query classifier, training it on first use.
+
+    Returns:
+        QueryClassifier: The shared classifier.
+    """
+    global _query_classifier
+    if _query_classifier is None:
+        with _query_classifier_lock:
+            if _query_classifier is None:
+                _query_classifier = QueryClassifier()
+    return _query_classifier
+
+
+def classify_query(prompt: str) -> OpenAIResponseModel:
+    """
+    Classify the query as generic or project specific.
+
+    Returns:
+    OpenAIResponseModel: Model indicating if the query is generic.
+    """
+    return get_query_classifier().classify(prompt)
+
+
+async def aclassify_query(prompt: str) -> OpenAIResponseModel:
+    """
+    Classify the query as generic or project specific without blocking the event loop.
+
+    Returns:
+    OpenAIResponseModel: Model indicating if the query is generic.
+    """
+    return await get_query_classifier().aclassify(prompt)
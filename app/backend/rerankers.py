@@ -0,0 +1,189 @@
+import os
+import sys
+import math
+import re
+import threading
+from collections import Counter
+from typing import Optional, Sequence
+from langchain_core.callbacks import Callbacks
+from langchain_core.documents import BaseDocumentCompressor, Document
+from app.backend.utils import get_hyperparameters_from_file
+from custom_logger import logger
+from custom_exceptions import CustomException
+
+# Loading hyper parameters from the yaml file
+config = get_hyperparameters_from_file()
+reranker_config = config.get('RERANKER', {})
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:\.[a-z0-9]+)*%?")
+
+# Serializes cross-encoder loads so concurrent reranks load the model once
+_cross_encoder_lock = threading.Lock()
+
+
+def tokenize(text: str) -> list:
+    """
+    Split text into lower-cased terms, keeping tokens such as '4%' or '42.1' intact.
+
+    Args:
+        text (str): The text to tokenize.
+
+    Returns:
+        list: The terms.
+    """
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class LexicalReranker(BaseDocumentCompressor):
+    """
+    In-process BM25 reranker over the retrieved candidates.
+
+    Scores are computed against the candidate set only, so no network round
+    trip or model download is needed.
+    """
+    top_n: int = 5
+    k1: float = 1.5
+    b: float = 0.75
+
+    def compress_documents(
+        self,
+        documents: Sequence[Document],
+        query: str,
+        callbacks: Optional[Callbacks] = None,
+    ) -> Sequence[Document]:
+        """
+        Rerank the documents by BM25 score against the query.
+
+        Args:
+            documents (Sequence[Document]): Candidate documents.
+            query (str): The query.
+            callbacks (Callbacks, optional): Unused, kept for interface compatibility.
+
+        Returns:
+            Sequence[Document]: The top_n documents with a relevance_score in their metadata.
+        """
+        if not documents:
+            return []
+        doc_terms = [Counter(tokenize(doc.page_content)) for doc in documents]
+        avg_length = sum(sum(terms.values()) for terms in doc_terms) / len(doc_terms) or 1.0
+        query_terms = set(tokenize(query))
+        doc_freq = {term: sum(1 for terms in doc_terms if term in terms) for term in query_terms}
+
+        scored = []
+        for doc, terms in zip(documents, doc_terms):
+            length = sum(terms.values())
+            score = 0.0
+            for term in query_terms:
+                freq = terms.get(term, 0)
+                if not freq:
+                    continue
+                idf = math.log(1 + (len(documents) - doc_freq[term] + 0.5) / (doc_freq[term] + 0.5))
+                score += idf * freq * (self.k1 + 1) / (freq + self.k1 * (1 - self.b + self.b * length / avg_length))
+            scored.append((score, doc))
+
+        scored.sort(key=lambda item: item[0], reverse=True)
+        results = []
+        for score, doc in scored[:self.top_n]:
+            results.append(Document(page_content=doc.page_content, metadata={**doc.metadata, "relevance_score": score}))
+        return results
+
+
+class CrossEncoderReranker(BaseDocumentCompressor):
+    """
+    In-process reranker scoring query/document pairs with a small CPU cross-encoder.
+
+    Requires the optional ``sentence-transformers`` package.
+    """
+    model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    top_n: int = 5
+    model: object = None
+
+    def _load_model(self):
+        """Return the cross-encoder, loading it on first use."""
+        if self.model is None:
+            with _cross_encoder_lock:
+                if self.model is None:
+                    try:
+                        from sentence_transformers import CrossEncoder
+                    except ImportError:
+                        raise CustomException(
+                            "The cross_encoder reranker requires the sentence-transformers package", sys
+                        )
+                    self.model = CrossEncoder(self.model_name, device="cpu")
+        return self.model
+
+    def compress_documents(
+        self,
+        documents: Sequence[Document],
+        query: str,
+        callbacks: Optional[Callbacks] = None,
+    ) -> Sequence[Document]:
+        """
+        Rerank the documents by cross-encoder score against the query.
+
+        Args:
+            documents (Sequence[Document]): Candidate documents.
+            query (str): The query.
+            callbacks (Callbacks, optional): Unused, kept for interface compatibility.
+
+        Returns:
+            Sequence[Document]: The top_n documents with a relevance_score in their metadata.
+        """
+        if not documents:
+            return []
+        scores = self._load_model().predict([(query, doc.page_content) for doc in documents])
+        ranked = sorted(zip(scores, documents), key=lambda item: item[0], reverse=True)
+        return [
+            Document(page_content=doc.page_content, metadata={**doc.metadata, "relevance_score": float(score)})
+            for score, doc in ranked[:self.top_n]
+        ]
+
+
+def get_reranker(provider: Optional[str] = None, top_n: Optional[int] = None):
+    """
+    Build the reranker selected in hyper-parameters.yaml.
+
+    Args:
+        provider (str, optional): Overrides RERANKER.PROVIDER, one of
+            'cohere', 'jina', 'lexical' or 'cross_encoder'.
+        top_n (int, optional): Overrides RERANKER.TOP_N.
+
+    Returns:
+        BaseDocumentCompressor: The reranker.
+
+    Raises:
+        CustomException: If the provider is unknown or its API key is missing.
+    """
+    provider = (provider or reranker_config.get('PROVIDER', "cohere")).lower()
+    top_n = top_n or reranker_config.get('TOP_N', 5)
+    models = reranker_config.get('MODELS', {}) or {}
+    logger.info(f"Creating '{provider}' reranker with top_n={top_n}")
+
+    if provider == "cohere":
+        from langchain_cohere import CohereRerank
+        cohere_api_key = os.getenv('COHERE_API_KEY')
+        if not cohere_api_key:
+            raise CustomException("Missing environment variables: COHERE_API_KEY", sys)
+        return CohereRerank(
+            model=models.get('cohere', "rerank-english-v3.0"),
+            cohere_api_key=cohere_api_key,
+            top_n=top_n,
+        )
+    if provider == "jina":
+        from langchain_community.document_compressors import JinaRerank
+        jina_api_key = os.getenv('JINA_API_KEY')
+        if not jina_api_key:
+            raise CustomException("Missing environment variables: JINA_API_KEY", sys)
+        return JinaRerank(
+            model=models.get('jina', "jina-reranker-v1-base-en"),
+            jina_api_key=jina_api_key,
+            top_n=top_n,
+        )
+    if provider == "lexical":
+        return LexicalReranker(top_n=top_n)
+    if provider == "cross_encoder":
+        return CrossEncoderReranker(
+            model_name=models.get('cross_encoder', "cross-encoder/ms-marco-MiniLM-L-6-v2"),
+            top_n=top_n,
+        )
+    raise CustomException(f"Unknown reranker provider: {provider}", sys)
@@ -0,0 +1,516 @@
+import os
+import sys
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+from dotenv import load_dotenv
+from qdrant_client import QdrantClient, AsyncQdrantClient, models
+from langchain_core.documents import Document
+from langchain_community.embeddings import OpenAIEmbeddings
+from langchain_community.vectorstores import Qdrant
+from langchain_openai import ChatOpenAI
+from langchain_core.runnables import RunnableLambda, RunnablePassthrough
+from langchain_core.output_parsers import StrOutputParser
+from langchain.prompts import PromptTemplate
+from app.backend.utils import get_hyperparameters_from_file
+from app.backend.embedding_cache import CachedEmbeddings
+from app.backend.rerankers import get_reranker
+from app.backend.collection_schema import build_filter, search_params
+from app.backend.corpora import (
+    DEFAULT_CORPUS, collection_for, corpus_path, get_corpus_index, known_corpora, resolve_corpora, routing_config,
+)
+from app.backend.sparse_index import SparseIndex, is_keyword_query, reciprocal_rank_fusion
+from custom_logger import logger
+from custom_exceptions import CustomException
+
+# Load environment variables
+load_dotenv()
+# Loading hyper parameters from the yaml file
+config = get_hyperparameters_from_file()
+retrieval_config = config.get('RETRIEVAL', {})
+hybrid_config = config.get('HYBRID_SEARCH', {})
+
+
+def format_docs(docs):
+    """
+    Format the documents by combining page content with its metadata.
+
+    Args:
+        docs (list): List of documents to format.
+
+    Returns:
+        str: Formatted documents as a string.
+    """
+    formatted_docs = []
+    for doc in docs:
+        metadata_str = ', '.join(f"{key}: {value}" for key, value in doc.metadata.items())
+        doc_str = f"{doc.page_content}\nMetadata: {metadata_str}"
+        formatted_docs.append(doc_str)
+    return "\n\n".join(formatted_docs)
+
+
+class RetrievalResources:
+    """
+    Process-wide holder of the clients used by the retrieval tools.
+
+    Every client is created on first use and then reused by all callers, so the
+    Qdrant channel, the embeddings client, the reranker and the LLM keep their
+    connections open across requests instead of being rebuilt on every call.
+
+    Attributes:
+        collection_name (str): Name of the Qdrant collection of the default corpus.
+        embedding_model_name (str): Name of the OpenAI embedding model.
+    """
+
+    def __init__(self):
+        """
+        Initialize the registry without creating any client.
+        """
+        self.collection_name = collection_for(DEFAULT_CORPUS)
+        self.embedding_model_name = retrieval_config.get('EMBEDDING_MODEL', "text-embedding-ada-002")
+        self._lock = threading.RLock()
+        self._embeddings = None
+        self._qdrant_client = None
+        self._async_qdrant_client = None
+        self._vectorstore = None
+        self._reranker = None
+        self._llm = None
+        self._prompt = None
+        self._rag_chain = None
+        self._sparse_indexes = {}
+        self._executor = None
+
+    def _get_or_create(self, attribute, factory):
+        """
+        Return a cached attribute, creating it under the lock on first access.
+
+        Args:
+            attribute (str): Name of the private attribute holding the resource.
+            factory (callable): Zero-argument callable building the resource.
+
+        Returns:
+            Any: The shared resource.
+        """
+        value = getattr(self, attribute)
+        if value is not None:
+            return value
+        with self._lock:
+            value = getattr(self, attribute)
+            if value is None:
+                value = factory()
+                setattr(self, attribute, value)
+                logger.info("Retrieval resource initialized: %s", attribute.lstrip('_'))
+            return value
+
+    @staticmethod
+    def _require_env(*names):
+        """
+        Read the given environment variables, failing if any of them is missing.
+
+        Args:
+            *names (str): Environment variable names.
+
+        Returns:
+            list: The values in the order requested.
+
+        Raises:
+            CustomException: If one of the variables is not set.
+        """
+        values = [os.getenv(name) for name in names]
+        missing = [name for name, value in zip(names, values) if not value]
+        if missing:
+            raise CustomException(f"Missing environment variables: {', '.join(missing)}", sys)
+        return values
+
+    @property
+    def embeddings(self):
+        """CachedEmbeddings: Shared embeddings client behind the query-embedding cache."""
+        def factory():
+            (openai_api_key,) = self._require_env('OPENAI_API_KEY')
+            return CachedEmbeddings(
+                OpenAIEmbeddings(model=self.embedding_model_name, openai_api_key=openai_api_key),
+                model_name=self.embedding_model_name,
+            )
+        return self._get_or_create('_embeddings', factory)
+
+    @property
+    def qdrant_client(self):
+        """QdrantClient: Shared Qdrant client keeping a persistent channel open."""
+        def factory():
+            qdrant_url, qdrant_api_key = self._require_env('QDRANT_URL', 'QDRANT_API_KEY')
+            return QdrantClient(
+                url=qdrant_url,
+                api_key=qdrant_api_key,
+                prefer_grpc=retrieval_config.get('PREFER_GRPC', True),
+            )
+        return self._get_or_create('_qdrant_client', factory)
+
+    @property
+    def async_qdrant_client(self):
+        """AsyncQdrantClient: Shared asyncio Qdrant client used by the async RAG path."""
+        def factory():
+            qdrant_url, qdrant_api_key = self._require_env('QDRANT_URL', 'QDRANT_API_KEY')
+            return AsyncQdrantClient(
+                url=qdrant_url,
+                api_key=qdrant_api_key,
+                prefer_grpc=retrieval_config.get('PREFER_GRPC', True),
+            )
+        return self._get_or_create('_async_qdrant_client', factory)
+
+    @property
+    def vectorstore(self):
+        """Qdrant: Shared LangChain vectorstore over the policy collection."""
+        def factory():
+            return Qdrant(
+                client=self.qdrant_client,
+                async_client=self.async_qdrant_client,
+                collection_name=self.collection_name,
+                embeddings=self.embeddings,
+            )
+        return self._get_or_create('_vectorstore', factory)
+
+    @property
+    def reranker(self):
+        """BaseDocumentCompressor: Shared reranker selected by the RERANKER settings."""
+        return self._get_or_create('_reranker', get_reranker)
+
+    @property
+    def llm(self):
+        """ChatOpenAI: Shared chat model answering RAG questions."""
+        def factory():
+            (openai_api_key,) = self._require_env('OPENAI_API_KEY')
+            return ChatOpenAI(
+                model_name=config['LLM_NAME'],
+                temperature=retrieval_config.get('LLM_TEMPERATURE', 0.2),
+                openai_api_key=openai_api_key,
+            )
+        return self._get_or_create('_llm', factory)
+
+    @property
+    def prompt(self):
+        """PromptTemplate: RAG prompt built from the configured template."""
+        def factory():
+            return PromptTemplate(
+                template=config['PROMPT_TEMPLATE'],
+                input_variables=["context", "question"],
+            )
+        return self._get_or_create('_prompt', factory)
+
+    def build_rag_chain(self, filters: Optional[dict] = None, corpora: Optional[List[str]] = None):
+        """
+        Build a question-answering chain over the shared retrieval path.
+
+        Args:
+            filters (dict, optional): Metadata filter applied to retrieval, see build_filter.
+            corpora (List[str], optional): Corpora to search, routed per question when omitted.
+
+        Returns:
+            Runnable: The chain, taking the question as input.
+        """
+        k = retrieval_config.get('RAG_TOP_K', 10)
+
+        def retrieve(query):
+            return self.batch_retrieve([query], k, filters=filters, corpora=corpora)[0]
+
+        async def aretrieve(query):
+            return (await self.abatch_retrieve([query], k, filters=filters, corpora=corpora))[0]
+
+        return (
+            {"context": RunnableLambda(retrieve, afunc=aretrieve) | format_docs, "question": RunnablePassthrough()}
+            | self.prompt
+            | self.llm
+            | StrOutputParser()
+        )
+
+    @property
+    def rag_chain(self):
+        """Runnable: Compiled question-answering chain over the whole collection."""
+        return self._get_or_create('_rag_chain', self.build_rag_chain)
+
+    @property
+    def sparse_index(self):
+        """SparseIndex: Keyword index of the default corpus, or None when hybrid search is disabled."""
+        return self.sparse_index_for(DEFAULT_CORPUS)
+
+    def sparse_index_for(self, corpus: str):
+        """
+        Return the keyword index built at ingestion for a corpus.
+
+        Args:
+            corpus (str): The corpus name.
+
+        Returns:
+            SparseIndex or None: The index, or None when hybrid search is disabled.
+        """
+        if not hybrid_config.get('ENABLED', False):
+            return None
+        with self._lock:
+            sparse_index = self._sparse_indexes.get(corpus)
+            if sparse_index is None:
+                sparse_index = SparseIndex(corpus_path(
+                    corpus, hybrid_config.get('INDEX_PATH', "data/sparse_index.sqlite")
+                ))
+                self._sparse_indexes[corpus] = sparse_index
+            return sparse_index
+
+    @property
+    def executor(self):
+        """ThreadPoolExecutor: Bounded pool used to fan out reranking calls."""
+        def factory():
+            return ThreadPoolExecutor(
+                max_workers=retrieval_config.get('MAX_CONCURRENCY', 8),
+                thread_name_prefix="retrieval",
+            )
+        return self._get_or_create('_executor', factory)
+
+    @staticmethod
+    def _document_from_point(point) -> Document:
+        """
+        Convert a Qdrant point stored by the LangChain vectorstore into a Document.
+
+        Args:
+            point (ScoredPoint): The search hit.
+
+        Returns:
+            Document: The document with its stored metadata.
+        """
+        payload = point.payload or {}
+        metadata = dict(payload.get(Qdrant.METADATA_KEY) or {})
+        metadata["_id"] = point.id
+        return Document(page_content=payload.get(Qdrant.CONTENT_KEY, ""), metadata=metadata)
+
+    @staticmethod
+    def _search_requests(vectors, k: int, filters: Optional[dict] = None):
+        """Build one Qdrant query request per query vector with the configured search parameters."""
+        params = search_params()
+        query_filter = build_filter(filters)
+        return [
+            models.QueryRequest(query=vector, limit=k, with_payload=True, params=params, filter=query_filter)
+            for vector in vectors
+        ]
+
+    def route(self, vectors, corpora: Optional[List[str]] = None) -> List[List[str]]:
+        """
+        Pick the corpora searched for every query.
+
+        Args:
+            vectors (List[List[float]]): The query embeddings.
+            corpora (List[str], optional): Corpora requested explicitly for every query.
+
+        Returns:
+            List[List[str]]: The corpora of each query.
+
+        Raises:
+            CustomException: If a requested corpus does not exist.
+        """
+        corpora = resolve_corpora(corpora)
+        if corpora:
+            return [corpora for _ in vectors]
+        if not routing_config.get('ENABLED', True):
+            return [known_corpora() for _ in vectors]
+        return get_corpus_index().route(vectors)
+
+    @staticmethod
+    def _group_by_corpus(routes: List[List[str]]) -> dict:
+        """Map every routed corpus to the indices of the queries searching it."""
+        groups = {}
+        for index, corpora in enumerate(routes):
+            for corpus in corpora:
+                groups.setdefault(corpus, []).append(index)
+        return groups
+
+    def _merge_dense(self, routes: List[List[str]], responses: dict, k: int) -> List[List[Document]]:
+        """
+        Merge the hits of every corpus searched by a query into one ranking by score.
+
+        Args:
+            routes (List[List[str]]): The corpora of each query.
+            responses (dict): Corpus to the query indices and the Qdrant responses of that corpus.
+            k (int): Number of candidates kept per query.
+
+        Returns:
+            List[List[Document]]: The dense candidates per query, tagged with their corpus.
+        """
+        scored = [[] for _ in routes]
+        for corpus, (indices, hits) in responses.items():
+            for index, response in zip(indices, hits):
+                for point in response.points:
+                    doc = self._document_from_point(point)
+                    doc.metadata["corpus"] = corpus
+                    scored[index].append((point.score, doc))
+        return [
+            [doc for _, doc in sorted(items, key=lambda item: item[0], reverse=True)[:k]]
+            for items in scored
+        ]
+
+    def _merge_sparse(self, queries: List[str], candidates: List[List[Document]], k: int,
+                      filters: Optional[dict] = None, routes: Optional[List[List[str]]] = None):
+        """
+        Fuse the dense candidates of every query with keyword matches from the sparse indexes.
+
+        Args:
+            queries (List[str]): The queries.
+            candidates (List[List[Document]]): Dense candidates per query.
+            k (int): Number of fused candidates kept per query.
+            filters (dict, optional): Metadata filter applied to the keyword matches.
+            routes (List[List[str]], optional): The corpora of each query, the default corpus when omitted.
+
+        Returns:
+            tuple: The fused candidates (the dense ones when hybrid search is off) and, per query,
+                whether the keyword indexes of its corpora contributed any match.
+        """
+        if not hybrid_config.get('ENABLED', False):
+            return candidates, [False for _ in queries]
+        routes = routes or [[DEFAULT_CORPUS] for _ in queries]
+        sparse_k = hybrid_config.get('SPARSE_K', k)
+        rrf_k = hybrid_config.get('RRF_K', 60)
+        fused, lexical = [], []
+        for query, dense, corpora in zip(queries, candidates, routes):
+            rankings = [dense]
+            for corpus in corpora:
+                matches = self.sparse_index_for(corpus).search(query, sparse_k, filters=filters)
+                for doc in matches:
+                    doc.metadata["corpus"] = corpus
+                if matches:
+                    rankings.append(matches)
+            fused.append(reciprocal_rank_fusion(rankings, k, rrf_k))
+            lexical.append(len(rankings) > 1)
+        return fused, lexical
+
+    def _should_rerank(self, query: str, rerank: bool, lexical: bool) -> bool:
+        """
+        Decide whether a query's candidates go through the reranker.
+
+        Keyword-heavy queries are already ordered well by the fused lexical
+        ranking, so reranking them can be skipped, but only when the keyword
+        indexes of the searched corpora actually matched the query.
+        """
+        if not rerank:
+            return False
+        if lexical and hybrid_config.get('SKIP_RERANK_FOR_KEYWORD_QUERIES', False):
+            return not is_keyword_query(query)
+        return True
+
+    def _rerank_top_n(self) -> int:
+        return config.get('RERANKER', {}).get('TOP_N', 5)
+
+    def batch_retrieve(self, queries: List[str], k: int, rerank: bool = True,
+                       filters: Optional[dict] = None, corpora: Optional[List[str]] = None) -> List[List[Document]]:
+        """
+        Retrieve documents for several queries with one embedding call and one Qdrant call per corpus.
+
+        All queries are embedded in a single request, routed to their corpora,
+        searched with one Qdrant batch search per corpus collection, fused with
+        the keyword indexes when hybrid search is enabled, and reranked concurrently.
+
+        Args:
+            queries (List[str]): The queries to process.
+            k (int): Number of documents fetched from Qdrant per query.
+            rerank (bool): Whether to compress the candidates with the reranker.
+            filters (dict, optional): Metadata filter such as ``{"source": "a.pdf", "page": {"lte": 10}}``.
+            corpora (List[str], optional): Corpora to search, routed per query by document
+                similarity when omitted.
+
+        Returns:
+            List[List[Document]]: The retrieved documents, one list per query.
+        """
+        if not queries:
+            return []
+
+        vectors = self.embeddings.embed_documents(queries)
+        routes = self.route(vectors, corpora)
+        searches = {
+            corpus: (indices, self.executor.submit(
+                self.qdrant_client.query_batch_points,
+                collection_name=collection_for(corpus),
+                requests=self._search_requests([vectors[index] for index in indices], k, filters),
+            ))
+            for corpus, indices in self._group_by_corpus(routes).items()
+        }
+        responses = {corpus: (indices, future.result()) for corpus, (indices, future) in searches.items()}
+        candidates = self._merge_dense(routes, responses, k)
+        candidates, lexical = self._merge_sparse(queries, candidates, k, filters, routes)
+
+        reranker = self.reranker if rerank else None
+        futures = [
+            self.executor.submit(reranker.compress_documents, docs, query)
+            if self._should_rerank(query, rerank, matched) else None
+            for query, docs, matched in zip(queries, candidates, lexical)
+        ]
+        results = []
+        for future, docs in zip(futures, candidates):
+            if future is not None:
+                results.append(list(future.result()))
+            elif rerank:
+                # Keyword queries skip the reranker but keep the same result size
+                results.append(docs[:self._rerank_top_n()])
+            else:
+                results.append(docs)
+        return results
+
+    async def abatch_retrieve(self, queries: List[str], k: int, rerank: bool = True,
+                              filters: Optional[dict] = None,
+                              corpora: Optional[List[str]] = None) -> List[List[Document]]:
+        """
+        Asynchronous counterpart of batch_retrieve using the asyncio Qdrant client.
+
+        Args:
+            queries (List[str]): The queries to process.
+            k (int): Number of documents fetched from Qdrant per query.
+            rerank (bool): Whether to compress the candidates with the reranker.
+            filters (dict, optional): Metadata filter such as ``{"source": "a.pdf", "page": {"lte": 10}}``.
+            corpora (List[str], optional): Corpora to search, routed per query by document
+                similarity when omitted.
+
+        Returns:
+            List[List[Document]]: The retrieved documents, one list per query.
+        """
+        if not queries:
+            return []
+
+        loop = asyncio.get_running_loop()
+        vectors = await self.embeddings.aembed_documents(queries)
+        # Routing and keyword fusion read SQLite, so they run on the retrieval executor
+        routes = await loop.run_in_executor(self.executor, self.route, vectors, corpora)
+        groups = self._group_by_corpus(routes)
+        hits = await asyncio.gather(*(
+            self.async_qdrant_client.query_batch_points(
+                collection_name=collection_for(corpus),
+                requests=self._search_requests([vectors[index] for index in indices], k, filters),
+            )
+            for corpus, indices in groups.items()
+        ))
+        responses = {corpus: (indices, response) for (corpus, indices), response in zip(groups.items(), hits)}
+        candidates = self._merge_dense(routes, responses, k)
+        candidates, lexical = await loop.run_in_executor(
+            self.executor, self._merge_sparse, queries, candidates, k, filters, routes
+        )
+
+        async def finalize(query, docs, matched):
+            if self._should_rerank(query, rerank, matched):
+                return list(await self.reranker.acompress_documents(docs, query))
+            return docs[:self._rerank_top_n()] if rerank else docs
+
+        return list(await asyncio.gather(*(
+            finalize(query, docs, matched) for query, docs, matched in zip(queries, candidates, lexical)
+        )))
+
+
+_resources = None
+_resources_lock = threading.Lock()
+
+
+def get_retrieval_resources() -> RetrievalResources:
+    """
+    Return the process-wide retrieval resource registry.
+
+    Returns:
+        RetrievalResources: The shared registry.
+    """
+    global _resources
+    if _resources is None:
+        with _resources_lock:
+            if _resources is None:
+                _resources = RetrievalResources()
+    return _resources
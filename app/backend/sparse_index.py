@@ -0,0 +1,251 @@
+import os
+import re
+import sys
+import json
+import sqlite3
+import hashlib
+import threading
+from typing import List, Optional, Tuple
+from langchain_core.documents import Document
+from app.backend.utils import get_hyperparameters_from_file
+from app.backend.rerankers import tokenize
+from custom_logger import logger
+from custom_exceptions import CustomException
+
+# Loading hyper parameters from the yaml file
+config = get_hyperparameters_from_file()
+hybrid_config = config.get('HYBRID_SEARCH', {})
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+# Maximum number of keys bound in one IN (...) lookup
+QUERY_CHUNK = 500
+
+RANGE_SQL = {"gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+
+# Section references, percentages and quoted phrases; bare acronyms such as HR or PTO
+# appear in most policy questions and are not a reason to skip the reranker
+KEYWORD_PATTERN = re.compile(r'§|\b[Ss]ection\s+\d|\d+(?:\.\d+)?\s?%|"[^"]+"')
+
+
+def chunk_key(doc: Document) -> str:
+    """
+    Identify a chunk by the hash of its source, page and text.
+
+    The page keeps identical text on different pages, such as repeated clauses or
+    table headers, apart so every page stays citable; repeats within one page
+    share their citation and collapse into one chunk.
+
+    Args:
+        doc (Document): The chunk.
+
+    Returns:
+        str: A stable hex digest shared by the dense and sparse indexes.
+    """
+    source = str(doc.metadata.get("source", ""))
+    page = str(doc.metadata.get("page", ""))
+    return hashlib.sha256(f"{source}\x00{page}\x00{doc.page_content}".encode("utf-8")).hexdigest()
+
+
+def is_keyword_query(query: str) -> bool:
+    """
+    Tell whether a query hinges on exact terms that lexical search matches well.
+
+    Args:
+        query (str): The query.
+
+    Returns:
+        bool: True when the query contains section references, percentages or quoted phrases.
+    """
+    return bool(KEYWORD_PATTERN.search(query))
+
+
+def reciprocal_rank_fusion(rankings: List[List[Document]], k: int, rrf_k: int = 60) -> List[Document]:
+    """
+    Fuse several rankings of the same corpus with reciprocal rank fusion.
+
+    Args:
+        rankings (List[List[Document]]): Ranked document lists, best first.
+        k (int): Number of fused documents to return.
+        rrf_k (int): Damping constant of the fusion formula.
+
+    Returns:
+        List[Document]: The fused ranking.
+    """
+    scores, documents = {}, {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking):
+            key = chunk_key(doc)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank + 1)
+            documents.setdefault(key, doc)
+    ordered = sorted(scores, key=scores.get, reverse=True)
+    return [documents[key] for key in ordered[:k]]
+
+
+def metadata_filter_sql(filters: Optional[dict]) -> Tuple[str, list]:
+    """
+    Translate a metadata filter into SQL conditions on the stored chunk metadata.
+
+    Uses the same format as ``collection_schema.build_filter``: a value, a list of
+    accepted values, or a range such as ``{"gte": 2, "lte": 10}`` per field.
+
+    Args:
+        filters (dict, optional): The metadata filter.
+
+    Returns:
+        tuple: The ' AND ...' conditions and their parameters, empty without filters.
+    """
+    clauses, params = [], []
+    for field, value in (filters or {}).items():
+        path = '$."{}"'.format(str(field).replace('"', ''))
+        if isinstance(value, dict):
+            for op, sql in RANGE_SQL.items():
+                if op in value:
+                    clauses.append(f"json_extract(metadata, ?) {sql} ?")
+                    params.extend([path, value[op]])
+        elif isinstance(value, (list, tuple, set)):
+            values = list(value)
+            clauses.append(f"json_extract(metadata, ?) IN ({', '.join('?' * len(values))})")
+            params.extend([path, *values])
+        else:
+            clauses.append("json_extract(metadata, ?) = ?")
+            params.extend([path, value])
+    return "".join(f" AND {clause}" for clause in clauses), params
+
+
+class SparseIndex:
+    """
+    Persistent BM25 keyword index over document chunks, stored in SQLite FTS5.
+
+    Attributes:
+        path (str): Location of the SQLite database.
+    """
+
+    def __init__(self, path: str = None):
+        """
+        Open the index, creating the database on first use.
+
+        Args:
+            path (str, optional): Database path, defaults to HYBRID_SEARCH.INDEX_PATH.
+        """
+        path = path or hybrid_config.get('INDEX_PATH', "data/sparse_index.sqlite")
+        self.path = path if os.path.isabs(path) else os.path.join(PROJECT_ROOT, path)
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS chunks "
+                "USING fts5(content, chunk_key UNINDEXED, source UNINDEXED, metadata UNINDEXED)"
+            )
+            has_keys = connection.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'chunk_keys'"
+            ).fetchone()
+            # FTS5 columns cannot be indexed, so chunk keys are looked up through this table
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS chunk_keys (chunk_key TEXT PRIMARY KEY, chunk_rowid INTEGER NOT NULL)"
+            )
+            if not has_keys:
+                connection.execute(
+                    "INSERT OR IGNORE INTO chunk_keys (chunk_key, chunk_rowid) SELECT chunk_key, rowid FROM chunks"
+                )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def add_documents(self, docs: List[Document]) -> int:
+        """
+        Index chunks, skipping the ones already present.
+
+        Args:
+            docs (List[Document]): The chunks to index.
+
+        Returns:
+            int: Number of newly indexed chunks.
+        """
+        try:
+            with self._lock, self._connect() as connection:
+                added = 0
+                for doc in docs:
+                    key = chunk_key(doc)
+                    # The unique key claims the chunk atomically, even against other ingesting processes
+                    claimed = connection.execute(
+                        "INSERT OR IGNORE INTO chunk_keys (chunk_key, chunk_rowid) VALUES (?, -1)", (key,)
+                    ).rowcount
+                    if not claimed:
+                        continue
+                    cursor = connection.execute(
+                        "INSERT INTO chunks (content, chunk_key, source, metadata) VALUES (?, ?, ?, ?)",
+                        (doc.page_content, key, str(doc.metadata.get("source", "")),
+                         json.dumps(doc.metadata, default=str)),
+                    )
+                    connection.execute(
+                        "UPDATE chunk_keys SET chunk_rowid = ? WHERE chunk_key = ?", (cursor.lastrowid, key)
+                    )
+                    added += 1
+            logger.info(f"Sparse index updated with {added} new chunk(s).")
+            return added
+        except Exception as e:
+            logger.error(f"Error updating the sparse index: {str(e)}")
+            raise CustomException(f"Error updating the sparse index: {str(e)}", sys)
+
+    def delete_source(self, source: str) -> int:
+        """
+        Remove every chunk of a source document.
+
+        Args:
+            source (str): The document source.
+
+        Returns:
+            int: Number of removed chunks.
+        """
+        with self._lock, self._connect() as connection:
+            connection.execute(
+                "DELETE FROM chunk_keys WHERE chunk_rowid IN (SELECT rowid FROM chunks WHERE source = ?)", (source,)
+            )
+            cursor = connection.execute("DELETE FROM chunks WHERE source = ?", (source,))
+            return cursor.rowcount
+
+    def delete_chunks(self, keys: List[str]) -> int:
+        """
+        Remove chunks by key.
+
+        Args:
+            keys (List[str]): Keys as returned by chunk_key.
+
+        Returns:
+            int: Number of removed chunks.
+        """
+        with self._lock, self._connect() as connection:
+            rowids = []
+            for start in range(0, len(keys), QUERY_CHUNK):
+                batch = keys[start:start + QUERY_CHUNK]
+                rowids.extend(row[0] for row in connection.execute(
+                    f"SELECT chunk_rowid FROM chunk_keys WHERE chunk_key IN ({','.join('?' * len(batch))})", batch
+                ))
+            connection.executemany("DELETE FROM chunks WHERE rowid = ?", [(rowid,) for rowid in rowids])
+            connection.executemany("DELETE FROM chunk_keys WHERE chunk_key = ?", [(key,) for key in keys])
+            return len(rowids)
+
+    def search(self, query: str, k: int, filters: Optional[dict] = None) -> List[Document]:
+        """
+        Return the chunks best matching the query terms by BM25.
+
+        Args:
+            query (str): The query.
+            k (int): Number of chunks to return.
+            filters (dict, optional): Metadata filter the chunks must match.
+
+        Returns:
+            List[Document]: The matching chunks, best first.
+        """
+        terms = sorted(set(tokenize(query)))
+        if not terms:
+            return []
+        match = " OR ".join('"{}"'.format(term.replace('"', '""')) for term in terms)
+        conditions, params = metadata_filter_sql(filters)
+        with self._connect() as connection:
+            rows = connection.execute(
+                f"SELECT content, metadata FROM chunks WHERE chunks MATCH ?{conditions} ORDER BY rank LIMIT ?",
+                (match, *params, k),
+            ).fetchall()
+        return [Document(page_content=content, metadata=json.loads(metadata)) for content, metadata in rows]
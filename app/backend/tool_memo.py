@@ -0,0 +1,160 @@
+import json
+import hashlib
+import threading
+from typing import Callable, List, Optional
+from langchain_core.documents import Document
+from app.backend.utils import get_hyperparameters_from_file, get_optional_redis_client
+from app.backend.embedding_cache import normalize_text
+from app.backend.answer_cache import GENERATION_KEY
+from custom_logger import logger
+
+# Loading hyper parameters from the yaml file
+config = get_hyperparameters_from_file()
+memo_config = config.get('TOOL_MEMO', {})
+
+
+class ToolMemo:
+    """
+    Memo of report tool results for one agent run, with an optional shared Redis tier.
+
+    Results are memoized per normalized query, so a repeated, reordered or
+    re-cased query list, or one overlapping an earlier call, only retrieves the
+    queries the run has not seen yet. Shared entries are keyed by the answer
+    cache generation, which ingestion bumps, so they never outlive the corpus.
+
+    Attributes:
+        shared (bool): Whether results are shared across runs through Redis.
+        ttl (int): Expiry of shared entries in seconds.
+        hits (int): Queries served from this run's memo.
+        hits_shared (int): Queries served from the shared tier.
+        misses (int): Queries that had to be retrieved.
+    """
+
+    def __init__(self, shared: Optional[bool] = None, ttl: Optional[int] = None, redis_client=None):
+        """
+        Initialize an empty memo.
+
+        Args:
+            shared (bool, optional): Use the shared tier, defaults to TOOL_MEMO.SHARED.
+            ttl (int, optional): Expiry of shared entries, defaults to TOOL_MEMO.SHARED_TTL_SECONDS.
+            redis_client (redis.Redis, optional): Client of the shared tier, defaults to the shared one.
+        """
+        self.shared = memo_config.get('SHARED', False) if shared is None else shared
+        self.ttl = ttl or memo_config.get('SHARED_TTL_SECONDS', 3600)
+        self._redis = (redis_client or get_optional_redis_client()) if self.shared else None
+        self._generation = None
+        self._results = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.hits_shared = 0
+        self.misses = 0
+
+    def _key(self, query: str, k: int, rerank: bool, filters: Optional[dict],
+             corpora: Optional[List[str]]) -> str:
+        """
+        Build the memo key of one query and its retrieval parameters.
+
+        Returns:
+            str: The key.
+        """
+        signature = json.dumps(
+            [normalize_text(query), k, rerank, filters, sorted(corpora) if corpora else None],
+            sort_keys=True, default=str,
+        )
+        return hashlib.sha256(signature.encode("utf-8")).hexdigest()
+
+    def _shared_key(self, key: str) -> str:
+        if self._generation is None:
+            self._generation = int(self._redis.get(GENERATION_KEY) or 0)
+        return f"tool_memo:{self._generation}:{key}"
+
+    def _lookup_shared(self, keys: List[str]) -> dict:
+        """Return the shared entries found for keys."""
+        if self._redis is None or not keys:
+            return {}
+        try:
+            raw_values = self._redis.mget([self._shared_key(key) for key in keys])
+        except Exception as e:
+            logger.warning(f"Shared tool memo lookup failed: {e}")
+            return {}
+        return {
+            key: [Document(page_content=doc["page_content"], metadata=doc["metadata"]) for doc in json.loads(raw)]
+            for key, raw in zip(keys, raw_values)
+            if raw is not None
+        }
+
+    def _store_shared(self, entries: dict) -> None:
+        """Write freshly retrieved entries to the shared tier."""
+        if self._redis is None or not entries:
+            return
+        try:
+            pipeline = self._redis.pipeline()
+            for key, docs in entries.items():
+                payload = [{"page_content": doc.page_content, "metadata": doc.metadata} for doc in docs]
+                pipeline.set(self._shared_key(key), json.dumps(payload, default=str), ex=self.ttl)
+            pipeline.execute()
+        except Exception as e:
+            logger.warning(f"Shared tool memo write failed: {e}")
+
+    def retrieve(self, queries: List[str], k: int, fetch: Callable[[List[str]], List[List[Document]]],
+                 rerank: bool = True, filters: Optional[dict] = None,
+                 corpora: Optional[List[str]] = None) -> List[List[Document]]:
+        """
+        Return the documents of every query, fetching only the queries not memoized yet.
+
+        Args:
+            queries (List[str]): The tool's queries.
+            k (int): Number of documents fetched per query.
+            fetch (Callable): Retrieves the documents of a list of queries in one batch.
+            rerank (bool): Whether fetch reranks, part of the key.
+            filters (dict, optional): Metadata filter applied by fetch, part of the key.
+            corpora (List[str], optional): Corpora searched by fetch, part of the key.
+
+        Returns:
+            List[List[Document]]: The documents, one list per query.
+        """
+        keys = [self._key(query, k, rerank, filters, corpora) for query in queries]
+        with self._lock:
+            found = {key: self._results[key] for key in keys if key in self._results}
+            self.hits += sum(1 for key in keys if key in found)
+
+        # Deduplicate the remaining queries so a repeated query is looked up and fetched once
+        pending = {}
+        for key, query in zip(keys, queries):
+            if key not in found:
+                pending.setdefault(key, query)
+        shared = self._lookup_shared(list(pending))
+        missing = {key: query for key, query in pending.items() if key not in shared}
+        fetched = dict(zip(missing, fetch(list(missing.values())))) if missing else {}
+        self._store_shared(fetched)
+
+        with self._lock:
+            self.hits_shared += len(shared)
+            self.misses += len(missing)
+            self._results.update(shared)
+            self._results.update(fetched)
+        found.update(shared)
+        found.update(fetched)
+        return [list(found[key]) for key in keys]
+
+    def stats(self) -> dict:
+        """
+        Return the memo counters.
+
+        Returns:
+            dict: Hit and miss counters.
+        """
+        with self._lock:
+            return {"hits": self.hits, "hits_shared": self.hits_shared, "misses": self.misses}
+
+
+def new_tool_memo() -> Optional[ToolMemo]:
+    """
+    Return a memo for a new agent run.
+
+    Returns:
+        ToolMemo or None: An empty memo, or None if TOOL_MEMO is disabled.
+    """
+    if not memo_config.get('ENABLED', True):
+        return None
+    return ToolMemo()
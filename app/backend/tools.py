@@ -1,15 +1,6 @@
 import os
 import sys
 from dotenv import load_dotenv
-from qdrant_client import QdrantClient
-from langchain_community.embeddings import OpenAIEmbeddings
-from langchain_community.vectorstores import Qdrant
-from langchain_openai import ChatOpenAI
-from langchain_core.runnables import RunnablePassthrough
-from langchain_core.output_parsers import StrOutputParser
-from langchain.retrievers import ContextualCompressionRetriever
-from langchain_community.document_compressors import JinaRerank
-from langchain_cohere import CohereRerank
 from llama_index.core import PropertyGraphIndex
 from llama_index.embeddings.openai import OpenAIEmbedding as LlamaindexOpenAIEmbeddings
 from llama_index.llms.openai import OpenAI as LlamaindexOpenAI
@@ -19,10 +10,10 @@ from llama_index.core.indices.property_graph import (
     LLMSynonymRetriever,
     VectorContextRetriever,
 )
-from app.backend.utils import get_hyperparameters_from_file
-from langchain.prompts import PromptTemplate
+from app.backend.utils import get_hyperparameters_from_file, log_latency
+from app.backend.retrieval import get_retrieval_resources, retrieval_config
 from crewai_tools import BaseTool
-from typing import List
+from typing import Any, List, Optional
 from custom_logger import logger
 from custom_exceptions import CustomException
 
@@ -37,16 +28,31 @@ class RAGTool:
 
     Attributes:
         query (str): The query to process using the RAG system.
+        filters (dict): Metadata filter restricting retrieval, e.g. ``{"source": "a.pdf"}``.
+        corpora (List[str]): Corpora to search, routed by the query when None.
     """
 
-    def __init__(self, query: str):
+    def __init__(self, query: str, filters: Optional[dict] = None, corpora: Optional[List[str]] = None):
         """
         Initialize the RAGTool with the given query.
 
         Args:
             query (str): The query to process.
+            filters (dict, optional): Metadata filter on the chunks, e.g. ``{"source": "a.pdf"}``
+                or ``{"page": {"gte": 3, "lte": 10}}``.
+            corpora (List[str], optional): Corpora to search, e.g. ``["policy", "finance"]``,
+                routed by the query when omitted.
         """
         self.query = query
+        self.filters = filters
+        self.corpora = corpora
+
+    def _rag_chain(self):
+        """Return the shared chain, or a chain restricted to the filter and corpora."""
+        resources = get_retrieval_resources()
+        if self.filters or self.corpora:
+            return resources.build_rag_chain(self.filters, self.corpora)
+        return resources.rag_chain
 
     def qa_from_RAG(self) -> str:
         """
@@ -61,70 +67,74 @@ class RAGTool:
         try:
             logger.info("Initializing RAG tool with query: %s", self.query)
 
-            # Setup
-            qdrant_url = os.getenv('QDRANT_URL')
-            qdrant_api_key = os.getenv('QDRANT_API_KEY')
-            openai_api_key = os.getenv('OPENAI_API_KEY')
-            jina_api_key=os.getenv('JINA_API_KEY')
-            cohere_api_key=os.getenv('COHERE_API_KEY')
-
-            if not qdrant_url or not qdrant_api_key or not openai_api_key or not jina_api_key:
-                raise CustomException("Missing environment variables for Qdrant , OpenAI or JINA", sys)
-
-            embeddings_model = OpenAIEmbeddings(model='text-embedding-ada-002', openai_api_key=openai_api_key)
-            qdrant_client = QdrantClient(url=qdrant_url, api_key=qdrant_api_key)
-            qdrant = Qdrant(client=qdrant_client, collection_name="policy-agent", embeddings=embeddings_model)
-            retriever = qdrant.as_retriever(search_kwargs={"k": 10})
-            prompt = PromptTemplate(
-
-            template=config['PROMPT_TEMPLATE'],
-            input_variables=["context","question"]
-    )
-            llm = ChatOpenAI(model_name=config['LLM_NAME'], temperature=0.2, openai_api_key=openai_api_key)
-            # compressor = JinaRerank(jina_api_key=jina_api_key,top_n=5)
-            compressor= CohereRerank(model="rerank-english-v3.0",cohere_api_key=cohere_api_key,top_n=5)
-            compression_retriever = ContextualCompressionRetriever(
-            base_compressor=compressor, base_retriever=retriever
-            )
+            with log_latency("RAGTool.qa_from_RAG"):
+                rag_chain = self._rag_chain()
+                result = rag_chain.invoke(self.query)
+            logger.info("Query processed successfully: %s", self.query)
+            return result
+        except Exception as e:
+            logger.exception("Error processing the query")
+            raise CustomException(f"Error processing the query: {e}", sys)
 
-            def format_docs(docs):
-                """
-                Format the documents by combining page content with its metadata.
-
-                Args:
-                    docs (list): List of documents to format.
-
-                Returns:
-                    str: Formatted documents as a string.
-                """
-                formatted_docs = []
-                for doc in docs:
-                    metadata_str = ', '.join(f"{key}: {value}" for key, value in doc.metadata.items())
-                    doc_str = f"{doc.page_content}\nMetadata: {metadata_str}"
-                    formatted_docs.append(doc_str)
-                return "\n\n".join(formatted_docs)
-
-            rag_chain = (
-                {"context": compression_retriever | format_docs, "question": RunnablePassthrough()}
-                | prompt
-                | llm
-                | StrOutputParser()
-            )
+    async def aqa_from_RAG(self) -> str:
+        """
+        Process the query using the RAG system without blocking the event loop.
 
-            result = rag_chain.invoke(self.query)
+        Returns:
+            str: The result of processing the query.
+
+        Raises:
+            CustomException: If there is an error retrieving or processing the query.
+        """
+        try:
+            logger.info("Initializing async RAG tool with query: %s", self.query)
+
+            with log_latency("RAGTool.aqa_from_RAG"):
+                rag_chain = self._rag_chain()
+                result = await rag_chain.ainvoke(self.query)
             logger.info("Query processed successfully: %s", self.query)
             return result
         except Exception as e:
             logger.exception("Error processing the query")
             raise CustomException(f"Error processing the query: {e}", sys)
 
+    async def astream_RAG(self):
+        """
+        Process the query using the RAG system, yielding answer tokens as the LLM produces them.
+
+        Yields:
+            str: The next chunk of the answer.
+
+        Raises:
+            CustomException: If there is an error retrieving or processing the query.
+        """
+        try:
+            logger.info("Streaming RAG tool answer for query: %s", self.query)
+
+            with log_latency("RAGTool.astream_RAG"):
+                rag_chain = self._rag_chain()
+                async for chunk in rag_chain.astream(self.query):
+                    yield chunk
+            logger.info("Query processed successfully: %s", self.query)
+        except Exception as e:
+            logger.exception("Error processing the query")
+            raise CustomException(f"Error processing the query: {e}", sys)
+
 
 class ReportTool(BaseTool):
     """
     A tool to retrieve relevant documents from the vector database using user queries.
+
+    Attributes:
+        filters (dict): Metadata filter restricting retrieval, e.g. ``{"source": "a.pdf"}``.
+        corpora (List[str]): Corpora to search, routed per query when None.
+        memo (ToolMemo): Memo of the current run's results, None to always retrieve.
     """
     name: str = "Report Tool"
     description: str = "Tool to retrieve relevant documents from the vector database using a list of user queries and return a response."
+    filters: Optional[dict] = None
+    corpora: Optional[List[str]] = None
+    memo: Optional[Any] = None
 
     def _run(self, queries: List[str]) -> List[str]:
         """
@@ -142,32 +152,21 @@ class ReportTool(BaseTool):
         try:
             logger.info("Running report tool with queries: %s", queries)
 
-            # Setup
-            qdrant_url = os.getenv('QDRANT_URL')
-            qdrant_api_key = os.getenv('QDRANT_API_KEY')
-            openai_api_key = os.getenv('OPENAI_API_KEY')
-            jina_api_key=os.getenv('JINA_API_KEY')
-            cohere_api_key=os.getenv('COHERE_API_KEY')
-
-
-            if not qdrant_url or not qdrant_api_key or not openai_api_key:
-                raise CustomException("Missing environment variables for Qdrant or OpenAI", sys)
-
-            embeddings_model = OpenAIEmbeddings(model='text-embedding-ada-002', openai_api_key=openai_api_key)
-            qdrant_client = QdrantClient(url=qdrant_url, api_key=qdrant_api_key)
-            qdrant = Qdrant(client=qdrant_client, collection_name="policy-agent", embeddings=embeddings_model)
-            retriever = qdrant.as_retriever(search_kwargs={"k": 10})
-            compressor= CohereRerank(model="rerank-english-v3.0",cohere_api_key=cohere_api_key,top_n=5)
-            compression_retriever = ContextualCompressionRetriever(
-            base_compressor=compressor, base_retriever=retriever
-            )
-
-
-            responses = []
-            for query in queries:
-                # Embed the input query for vector search
-                query_result = compression_retriever.invoke(query)
-                responses.append(query_result)
+            k = retrieval_config.get('REPORT_TOP_K', 10)
+
+            def fetch(batch):
+                # Embed, search and rerank all queries in one batch
+                return get_retrieval_resources().batch_retrieve(
+                    batch, k, filters=self.filters, corpora=self.corpora
+                )
+
+            with log_latency("ReportTool._run (%d queries)", len(queries)):
+                if self.memo is None:
+                    responses = fetch(queries)
+                else:
+                    responses = self.memo.retrieve(
+                        queries, k, fetch, filters=self.filters, corpora=self.corpora
+                    )
 
             logger.info("Queries processed successfully: %s", queries)
             return responses
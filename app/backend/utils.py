@@ -1,11 +1,13 @@
 import sys
 import os
+import time
+from contextlib import contextmanager
 from typing import Dict
 import yaml
 from custom_logger import logger
 from pydantic import BaseModel
 from custom_exceptions import CustomException
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -33,11 +35,102 @@ def get_hyperparameters_from_file():
 
 config=get_hyperparameters_from_file()
 
+
+@contextmanager
+def log_latency(label: str, *args):
+    """
+    Log the wall-clock time spent inside the block.
+
+    Args:
+        label (str): Logging format string describing the operation.
+        *args: Arguments interpolated into the label.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        logger.info("Latency %s: %.1f ms", label % args if args else label, elapsed_ms)
+
+def get_optional_redis_client():
+    """
+    Return the shared Redis client, or None when Redis is not configured or unreachable.
+
+    Returns:
+        redis.Redis or None: The client from app.backend.database.
+    """
+    try:
+        from app.backend.database import redis_client
+        return redis_client
+    except Exception as e:
+        logger.warning(f"Redis unavailable, continuing without it: {e}")
+        return None
+
+
+def get_optional_async_redis_client():
+    """
+    Return a new asyncio Redis client, or None when Redis is not configured or unreachable.
+
+    Returns:
+        redis.asyncio.Redis or None: The client built by app.backend.database.
+    """
+    try:
+        from app.backend.database import get_async_redis_client
+        return get_async_redis_client()
+    except Exception as e:
+        logger.warning(f"Redis unavailable, continuing without it: {e}")
+        return None
+
+
 # Python class to differentiate between generic or project specific query
 class OpenAIResponseModel(BaseModel):
     """Pydantic model for the OpenAI response."""
     is_generic: bool   
 
+def _classification_messages(prompt) -> list:
+    """
+    Build the chat messages used to classify a query.
+
+    Args:
+        prompt (str): The user query.
+
+    Returns:
+        list: The chat-completion messages.
+    """
+    return [
+        {
+        "role": "system",
+        "content": (
+                    "You are a helpful question classification assistant. You have the following tasks "
+                    "1.Dependent upon user question classify it into 'generic' or 'project specific'. "
+                    "Use these tips to classify:"
+                    "1.A generic question is the one which is a generic question related to any topic "
+                    "e.g 'What are the financial options available in the docs?'"
+                    "2.A project specific question is the one related to ant specific project with some project related details"
+                    "e.g Marbury project plaza is set to begin from april 2024. It is a detailed retrofit project in california which aims to install solar panels"
+                    ),
+                },
+                {
+        "role": "user",
+        "content": (
+                    "As per the following project guide me on the financial options: Al qasim project "
+                    "is a building renovation project starting in the end of december 2024. State some financial options please"
+                    ),
+                },
+        {"role": "assistant", "content": "project specific"},
+        {"role": "user", "content": prompt},
+    ]
+
+
+def _parse_classification(response) -> OpenAIResponseModel:
+    """
+    Convert a classification chat completion into an OpenAIResponseModel.
+    """
+    classification = response.choices[0].message.content.strip().lower()
+    is_generic = classification == "generic"
+    return OpenAIResponseModel(is_generic=is_generic)
+
+
 # Function to differentiate between project specific and generic query
 def get_openai_response(prompt) -> OpenAIResponseModel:
     """
@@ -49,36 +142,34 @@ def get_openai_response(prompt) -> OpenAIResponseModel:
     try:
         client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
         response = client.chat.completions.create(
-        model=config['LLM_NAME'],
-        messages=[
-            {
-            "role": "system",
-            "content": (
-                        "You are a helpful question classification assistant. You have the following tasks "
-                        "1.Dependent upon user question classify it into 'generic' or 'project specific'. "
-                        "Use these tips to classify:"
-                        "1.A generic question is the one which is a generic question related to any topic "
-                        "e.g 'What are the financial options available in the docs?'"
-                        "2.A project specific question is the one related to ant specific project with some project related details"
-                        "e.g Marbury project plaza is set to begin from april 2024. It is a detailed retrofit project in california which aims to install solar panels"
-                        ),
-                    },
-                    {
-            "role": "user",
-            "content": (
-                        "As per the following project guide me on the financial options: Al qasim project "
-                        "is a building renovation project starting in the end of december 2024. State some financial options please"
-                        ),
-                    },
-            {"role": "assistant", "content": "project specific"},
-            {"role": "user", "content": prompt},
-                ],
-            )
-
-        classification = response.choices[0].message.content.strip().lower()
-        is_generic = classification == "generic"
-
-        return OpenAIResponseModel(is_generic=is_generic)
+            model=config['LLM_NAME'],
+            messages=_classification_messages(prompt),
+        )
+        return _parse_classification(response)
+    except Exception as e:
+        logger.error(f"Error getting OpenAI response: {str(e)}")
+        raise CustomException(f"Error getting OpenAI response: {e}", sys)
+
+
+_async_openai_client = None
+
+
+async def aget_openai_response(prompt) -> OpenAIResponseModel:
+    """
+    Classify the query with a non-blocking OpenAI API call.
+
+    Returns:
+    OpenAIResponseModel: Model indicating if the query is generic.
+    """
+    global _async_openai_client
+    try:
+        if _async_openai_client is None:
+            _async_openai_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        response = await _async_openai_client.chat.completions.create(
+            model=config['LLM_NAME'],
+            messages=_classification_messages(prompt),
+        )
+        return _parse_classification(response)
     except Exception as e:
         logger.error(f"Error getting OpenAI response: {str(e)}")
         raise CustomException(f"Error getting OpenAI response: {e}", sys)
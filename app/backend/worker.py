@@ -0,0 +1,235 @@
+import os
+import sys
+import time
+import shutil
+import socket
+import threading
+import multiprocessing
+from dotenv import load_dotenv
+from custom_logger import logger
+from custom_exceptions import CustomException
+from app.backend.utils import get_hyperparameters_from_file
+from app.backend.query_classifier import classify_query
+from app.backend.jobs import JobQueue
+from app.backend.models import QuestionResponse
+from app.backend.answer_cache import AnswerCache, answer_namespace
+
+# Load environment variables
+load_dotenv()
+# Loading hyper parameters from the yaml file
+config = get_hyperparameters_from_file()
+jobs_config = config.get('JOBS', {})
+
+AGENT_NAMES = {
+    "crew": {True: "Crew AI RAG", False: "Crew AI AI agent"},
+    "langraph": {True: "Langraph Graph RAG", False: "Langraph AI agent"},
+}
+
+
+class QueueWorker:
+    """
+    Consumes agent jobs from the Redis queue and records their progress.
+
+    Attributes:
+        worker_id (str): Stable id of the worker, used to recover its jobs after a restart.
+        queue (JobQueue): The job queue.
+        answer_cache (AnswerCache): Cache the finished reports are written to.
+    """
+
+    def __init__(self, worker_id: str):
+        """
+        Initialize the worker.
+
+        Args:
+            worker_id (str): Stable id of the worker.
+        """
+        self.worker_id = worker_id
+        self.queue = JobQueue()
+        self.answer_cache = AnswerCache()
+        self._stopped = threading.Event()
+        self._pdf_processor = None
+
+    @property
+    def pdf_processor(self):
+        """PDF ingestion pipeline, created on the first ingestion job."""
+        if self._pdf_processor is None:
+            from app.backend.load_docs import PDFProcessor
+            self._pdf_processor = PDFProcessor(
+                os.getenv("OPENAI_API_KEY"), os.getenv("QDRANT_URL"), os.getenv("QDRANT_API_KEY")
+            )
+        return self._pdf_processor
+
+    def _heartbeat_loop(self):
+        """
+        Refresh the worker heartbeat until the worker stops.
+
+        Every HEARTBEAT_TTL_SECONDS the jobs held by dead workers are requeued as
+        well, so they are recovered while the remaining workers keep running,
+        including while this worker is busy with a long job.
+        """
+        interval = max(1, self.queue.heartbeat_ttl // 3)
+        next_sweep = time.monotonic() + self.queue.heartbeat_ttl
+        while not self._stopped.wait(interval):
+            try:
+                self.queue.heartbeat(self.worker_id)
+            except Exception as e:
+                logger.warning(f"Worker {self.worker_id} heartbeat failed: {e}")
+            if time.monotonic() >= next_sweep:
+                next_sweep = time.monotonic() + self.queue.heartbeat_ttl
+                try:
+                    self.queue.requeue_orphans()
+                except Exception as e:
+                    logger.warning(f"Worker {self.worker_id} could not requeue orphaned jobs: {e}")
+
+    def process_ingestion(self, job_id: str, payload: dict):
+        """
+        Index the documents of an ingestion job, recording a 'document' event as each one finishes.
+
+        The uploaded files are removed once every document has been processed.
+
+        Args:
+            job_id (str): The job id.
+            payload (dict): The job's 'sources' as kind, location and source, its 'upload_dir'
+                and the 'corpus' the documents are indexed in.
+
+        Returns:
+            str: Summary of the indexed and failed documents.
+        """
+        sources = [(item["kind"], item["location"], item["source"]) for item in payload["sources"]]
+        names = {location: source for _, location, source in sources}
+        failed = 0
+        try:
+            self.queue.update(job_id, progress=f"0/{len(sources)}")
+            for done, (location, stats, error) in enumerate(
+                self.pdf_processor.ingest_sources(sources, payload.get("corpus")), start=1
+            ):
+                if error is not None:
+                    failed += 1
+                    self.queue.add_event(job_id, "document", {
+                        "source": names[location], "status": "failed", "error": str(error),
+                    })
+                else:
+                    self.queue.add_event(job_id, "document", {
+                        "source": names[location], "status": "indexed", "stats": stats,
+                        "summary": self.pdf_processor.describe(stats),
+                    })
+                self.queue.update(job_id, progress=f"{done}/{len(sources)}")
+        finally:
+            if payload.get("upload_dir"):
+                shutil.rmtree(payload["upload_dir"], ignore_errors=True)
+        if failed == len(sources):
+            raise ValueError("No document could be ingested")
+        return f"Indexed {len(sources) - failed} of {len(sources)} document(s)"
+
+    def process(self, job_id: str):
+        """
+        Run a single job and store its partial outputs and final result.
+
+        Args:
+            job_id (str): The job id.
+        """
+        # Imported here so the worker processes load the agent stack after forking
+        from app.backend.main import CrewManager, LangraphManager
+
+        job = self.queue.get(job_id)
+        if job is None:
+            logger.warning(f"Job {job_id} expired before it could run")
+            return
+        attempts = self.queue.record_attempt(job_id)
+        if attempts > self.queue.max_attempts:
+            # Earlier runs never finished: the job keeps crashing or losing its worker
+            logger.error(f"Job {job_id} failed after {attempts - 1} unfinished attempt(s)")
+            if job["payload"].get("upload_dir"):
+                shutil.rmtree(job["payload"]["upload_dir"], ignore_errors=True)
+            self.queue.finish(self.worker_id, job_id, "failed",
+                              error=f"Gave up after {attempts - 1} attempt(s) that did not finish")
+            return
+        try:
+            kind = job["kind"]
+            if kind == "ingest":
+                self.queue.clear_events(job_id)
+                self.queue.update(job_id, status="running", worker=self.worker_id)
+                result = self.process_ingestion(job_id, job["payload"])
+                self.queue.finish(self.worker_id, job_id, "completed", result=result)
+                logger.info(f"Job {job_id} completed by worker {self.worker_id}")
+                return
+            query = job["payload"]["query"]
+            corpora = job["payload"].get("corpora")
+            if kind not in AGENT_NAMES:
+                raise ValueError(f"Unknown job kind: {kind}")
+            self.queue.clear_events(job_id)
+            self.queue.update(job_id, status="running", worker=self.worker_id)
+
+            def emit(event, data):
+                self.queue.add_event(job_id, event, data)
+
+            classification = classify_query(query)
+            agent_name = AGENT_NAMES[kind][classification.is_generic]
+            self.queue.update(job_id, agent=agent_name)
+            if kind == "crew":
+                manager = CrewManager(query, corpora=corpora)
+                if classification.is_generic:
+                    result = str(manager.start_crew(True))
+                else:
+                    result = manager.run_crew_with_events(emit)
+            else:
+                manager = LangraphManager(query, openai_response=classification, corpora=corpora)
+                if classification.is_generic:
+                    result = manager.rag_tool.qa_from_RAG()
+                else:
+                    result = manager.run_langgraph_with_events(emit)
+
+            self.queue.finish(self.worker_id, job_id, "completed", result=result)
+            self.answer_cache.set(
+                query, answer_namespace(kind, corpora), QuestionResponse(question=query, response=result, agent=agent_name)
+            )
+            logger.info(f"Job {job_id} completed by worker {self.worker_id}")
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {str(e)}")
+            self.queue.finish(self.worker_id, job_id, "failed", error=str(e))
+
+    def run(self):
+        """
+        Recover jobs left by previous runs, then consume the queue until stopped.
+        """
+        try:
+            self.queue.heartbeat(self.worker_id)
+            self.queue.requeue(self.worker_id)
+            self.queue.requeue_orphans()
+            threading.Thread(target=self._heartbeat_loop, daemon=True).start()
+            # Build the shared agent templates before taking the first job
+            from app.backend.main import prebuild_agents
+            prebuild_agents()
+            logger.info(f"Worker {self.worker_id} started")
+            while not self._stopped.is_set():
+                job_id = self.queue.reserve(self.worker_id, timeout=jobs_config.get('POLL_TIMEOUT_SECONDS', 5))
+                if job_id:
+                    self.process(job_id)
+        except Exception as e:
+            logger.error(f"Worker {self.worker_id} stopped: {str(e)}")
+            raise CustomException(f"Worker {self.worker_id} stopped: {e}", sys)
+        finally:
+            self._stopped.set()
+
+
+def run_worker(worker_id: str):
+    """
+    Entry point of a worker process.
+
+    Args:
+        worker_id (str): Stable id of the worker.
+    """
+    QueueWorker(worker_id).run()
+
+
+if __name__ == "__main__":
+    # Worker ids are stable per host so a restarted worker reclaims its own jobs
+    host = os.getenv("WORKER_HOST_ID", socket.gethostname())
+    processes = [
+        multiprocessing.Process(target=run_worker, args=(f"{host}:{index}",), daemon=False)
+        for index in range(jobs_config.get('WORKER_PROCESSES', 2))
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
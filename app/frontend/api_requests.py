@@ -1,3 +1,4 @@
+import json
 import requests
 import streamlit as st
 import os
@@ -8,15 +9,64 @@ import sys
 from custom_logger import logger
 from custom_exceptions import CustomException
 
+def iter_sse_events(response):
+    """
+    Parse a server-sent events response into (event, data) pairs.
+
+    Args:
+        response (requests.Response): A streamed response from the backend.
+
+    Yields:
+        tuple: The event name and its JSON-decoded data.
+    """
+    event, data_lines = "message", []
+    for line in response.iter_lines(decode_unicode=True):
+        if not line:
+            if data_lines:
+                yield event, json.loads("\n".join(data_lines))
+            event, data_lines = "message", []
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data_lines.append(line[len("data:"):].strip())
+    if data_lines:
+        yield event, json.loads("\n".join(data_lines))
+
 def send_query(query_key, endpoint):
     if st.session_state[query_key]:
         try:
             response = requests.post(
-                endpoint, json={"query": st.session_state[query_key]}
+                endpoint,
+                json={
+                    "query": st.session_state[query_key],
+                    "corpora": st.session_state.get("search_corpora") or None,
+                },
+                headers={"Accept": "text/event-stream"},
+                stream=True,
             )
             response.raise_for_status()
 
-            result = response.json().get("result", "No result found")
+            # Render tokens and agent progress as they arrive
+            answer_placeholder = st.empty()
+            tokens = []
+            result = "No result found"
+            for event, data in iter_sse_events(response):
+                if event == "agent":
+                    st.caption(f"Answering with: {data['name']}")
+                elif event == "token":
+                    tokens.append(data["text"])
+                    answer_placeholder.markdown("".join(tokens))
+                elif event in ("node", "task"):
+                    step = data.get("name") or data.get("agent") or event
+                    with st.expander(f"{step} finished"):
+                        st.write(data.get("content") or data.get("output"))
+                elif event == "result":
+                    result = data["result"]
+                    answer_placeholder.markdown(result)
+                elif event == "error":
+                    logger.error(f"Error from backend: {data['detail']}")
+                    st.error(f"Error: {data['detail']}")
+                    return
 
             st.session_state.chat_history.append(f"User: {st.session_state[query_key]}")
             st.session_state.chat_history.append(f"Bot: {result}")
@@ -31,3 +81,83 @@ def send_query(query_key, endpoint):
         except Exception as e:
             logger.exception("Unexpected error occurred while sending query")
             st.error("Internal server error")
+
+def submit_ingestion(endpoint, uploaded_files, urls, corpus=None):
+    """
+    Send PDF uploads and URLs to the backend for background indexing.
+
+    Args:
+        endpoint (str): URL of the backend /ingest/ endpoint.
+        uploaded_files (list): Streamlit uploaded files, streamed as multipart parts.
+        urls (list): URLs of PDFs to index.
+        corpus (str, optional): Corpus the documents are indexed in, defaults to the backend's default corpus.
+
+    Returns:
+        dict: The job id and the queued document names.
+    """
+    files = [
+        ("files", (uploaded_file.name, uploaded_file, "application/pdf"))
+        for uploaded_file in uploaded_files
+    ]
+    response = requests.post(endpoint, files=files or None, data={"urls": urls, "corpus": corpus}, timeout=300)
+    response.raise_for_status()
+    return response.json()
+
+def get_job(endpoint):
+    """
+    Fetch the status and events of a background job.
+
+    Args:
+        endpoint (str): URL of the backend /jobs/{job_id} endpoint.
+
+    Returns:
+        dict: The job.
+    """
+    response = requests.get(endpoint, timeout=30)
+    response.raise_for_status()
+    return response.json()
+
+def get_corpora(endpoint):
+    """
+    Fetch the searchable corpora and the default corpus.
+
+    Args:
+        endpoint (str): URL of the backend /corpora/ endpoint.
+
+    Returns:
+        dict: The corpus names and the default corpus.
+    """
+    response = requests.get(endpoint, timeout=30)
+    response.raise_for_status()
+    return response.json()
+
+def list_documents(endpoint, corpus):
+    """
+    Fetch the documents indexed in a corpus.
+
+    Args:
+        endpoint (str): URL of the backend /documents/ endpoint.
+        corpus (str): The corpus.
+
+    Returns:
+        dict: Source to number of chunks.
+    """
+    response = requests.get(endpoint, params={"corpus": corpus}, timeout=30)
+    response.raise_for_status()
+    return response.json()["documents"]
+
+def remove_document(endpoint, source, corpus):
+    """
+    Remove a document from the indexes of a corpus.
+
+    Args:
+        endpoint (str): URL of the backend /documents/ endpoint.
+        source (str): The document source.
+        corpus (str): The corpus.
+
+    Returns:
+        int: Number of removed chunks.
+    """
+    response = requests.delete(endpoint, params={"source": source, "corpus": corpus}, timeout=300)
+    response.raise_for_status()
+    return response.json()["removed"]
@@ -35,8 +35,8 @@ tab1, tab2 = st.tabs(["Crew AI", "Langraph Agent/Graph RAG"])
 
 # Crew AI tab
 with tab1:
-    render_chat_interface("query_crew_ai", f"{FASTAPI_URL}/process_query/")
+    render_chat_interface("query_crew_ai", f"{FASTAPI_URL}/process_query/stream")
 
 # Langraph Agent/Graph RAG tab
 with tab2:
-    render_chat_interface("query_langraph", f"{FASTAPI_URL}/process_query_langraph/")
+    render_chat_interface("query_langraph", f"{FASTAPI_URL}/process_query_langraph/stream")
@@ -1,30 +1,116 @@
 import os
-import tempfile
+import time
+import requests
 import streamlit as st
 import sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
-from app.frontend.load_docs import PDFProcessor
+from app.frontend.api_requests import submit_ingestion, get_job, get_corpora, list_documents, remove_document
 from custom_logger import logger
-from custom_exceptions import CustomException
-# Ensure the backend module is found
 
-# Initialize PDFProcessor
-openai_api_key = os.getenv("OPENAI_API_KEY")
-qdrant_url = os.getenv("QDRANT_URL")
-qdrant_api_key = os.getenv("QDRANT_API_KEY")
-pdf_processor = PDFProcessor(openai_api_key, qdrant_url, qdrant_api_key)
+# URL of the FastAPI backend, which queues indexing on the ingestion workers
+FASTAPI_URL = os.getenv("FASTAPI_URL", "http://backend:8000")
+INGESTION_POLL_SECONDS = 1.0
+# Longest time the page follows an ingestion job before handing control back to the user
+INGESTION_TRACK_SECONDS = 120
 
-def save_uploaded_files(uploaded_files):
-    files_info = []
-    for uploaded_file in uploaded_files:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmpfile:
-            tmpfile.write(uploaded_file.getvalue())
-            files_info.append((tmpfile.name, uploaded_file.name))
-    return files_info
+def track_ingestion(job_id, documents, reported=0):
+    """
+    Poll an ingestion job and report each document as the worker finishes it.
+
+    Polling stops after INGESTION_TRACK_SECONDS; the job is then kept in the session
+    state so the user can check back on it instead of the page blocking until it ends.
+
+    Args:
+        job_id (str): The id returned by the backend /ingest/ endpoint.
+        documents (list): Names of the queued documents.
+        reported (int): Number of document events already shown to the user.
+    """
+    progress = st.sidebar.progress(0.0, text=f"Indexing {len(documents)} document(s)")
+    deadline = time.monotonic() + INGESTION_TRACK_SECONDS
+    while True:
+        try:
+            job = get_job(f"{FASTAPI_URL}/jobs/{job_id}")
+        except requests.exceptions.HTTPError as e:
+            if e.response is not None and e.response.status_code == 404:
+                st.session_state.pop("pending_ingestion", None)
+                st.sidebar.error("The ingestion job no longer exists, resubmit the documents.")
+                return
+            raise
+        events = [event for event in job.get("events", []) if event.get("event") == "document"]
+        for event in events[reported:]:
+            if event["status"] == "indexed":
+                st.sidebar.success(f"Loaded and processed: {event['source']}")
+                st.sidebar.write(event["summary"])
+            else:
+                logger.error(f"Ingestion of {event['source']} failed: {event['error']}")
+                st.sidebar.error(f"{event['source']}: {event['error']}")
+        reported = len(events)
+        progress.progress(min(1.0, reported / max(1, len(documents))),
+                          text=f"Indexed {reported} of {len(documents)} document(s)")
+        if job["status"] in ("completed", "failed"):
+            st.session_state.pop("pending_ingestion", None)
+            if job["status"] == "failed" and not events:
+                st.sidebar.error(job.get("error", "Ingestion failed"))
+            return
+        if time.monotonic() >= deadline:
+            st.session_state["pending_ingestion"] = {"job_id": job_id, "documents": documents, "reported": reported}
+            status = "waiting for a worker" if job["status"] == "queued" else "still running"
+            st.sidebar.info(f"Indexing is {status} ({reported} of {len(documents)} done), check back later.")
+            return
+        time.sleep(INGESTION_POLL_SECONDS)
+
+def ingest(uploaded_files, urls, corpus=None):
+    """
+    Queue the uploads and URLs for indexing on the backend and follow the job.
+
+    Args:
+        uploaded_files (list): Streamlit uploaded files.
+        urls (list): URLs of PDFs to index.
+        corpus (str, optional): Corpus the documents are indexed in.
+    """
+    try:
+        submitted = submit_ingestion(f"{FASTAPI_URL}/ingest/", uploaded_files, urls, corpus)
+        track_ingestion(submitted["job_id"], submitted["documents"])
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Error submitting documents for ingestion: {e}")
+        st.sidebar.error(f"Error: {e}")
+    except Exception:
+        logger.exception("Unexpected error occurred during ingestion")
+        st.sidebar.error("Internal server error")
+
+def check_pending_ingestion():
+    """Resume following the ingestion job that was still running when polling stopped."""
+    pending = st.session_state["pending_ingestion"]
+    try:
+        track_ingestion(pending["job_id"], pending["documents"], pending["reported"])
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Error checking ingestion job {pending['job_id']}: {e}")
+        st.sidebar.error(f"Error: {e}")
+
+def request_error(action, error):
+    """Log a failed backend request and show its detail in the sidebar."""
+    detail = str(error)
+    response = getattr(error, "response", None)
+    if response is not None:
+        try:
+            detail = response.json().get("detail", detail)
+        except ValueError:
+            pass
+    logger.error(f"Error {action}: {detail}")
+    st.sidebar.error(f"Error {action}: {detail}")
 
 def render_pdf_management():
     st.sidebar.title("PDF Management")
+    try:
+        corpora = get_corpora(f"{FASTAPI_URL}/corpora/")
+    except requests.exceptions.RequestException as e:
+        request_error("listing the corpora", e)
+        corpora = {"corpora": [], "default": ""}
+    default_corpus = corpora["default"]
+    corpus = st.sidebar.text_input("Corpus", value=default_corpus,
+                                   help="Documents are indexed in and listed from this corpus, e.g. policy or finance.")
+    corpus = corpus.strip().lower() or default_corpus
     uploaded_files = st.sidebar.file_uploader(
         "Upload PDF files", type=["pdf"], accept_multiple_files=True
     )
@@ -32,39 +118,39 @@ def render_pdf_management():
     url_input = st.sidebar.text_input("Enter PDF URL (separate multiple URLs with commas):")
     if st.sidebar.button("Load PDF from URL"):
         urls = [url.strip() for url in url_input.split(",") if url.strip()]
-        for url in urls:
-            try:
-                data = pdf_processor.load_from_url(url)
-                if data:
-                    pdf_processor.split_and_store(data)
-                    result = pdf_processor.create_rag_system()
-                    st.sidebar.success(f"Loaded and processed URL: {url}")
-                    st.sidebar.write(result)
-                else:
-                    st.sidebar.error(f"Failed to load data from URL: {url}")
-            except CustomException as ce:
-                logger.error(f"CustomException: {str(ce)}")
-                st.sidebar.error(str(ce))
-            except Exception as e:
-                logger.exception(f"Unexpected error: {str(e)}")
-                st.sidebar.error("Internal server error")
+        if urls:
+            ingest([], urls, corpus)
 
     if uploaded_files:
         if st.sidebar.button("Process Uploaded PDFs"):
-            files_info = save_uploaded_files(uploaded_files)
-            for temp_path, original_name in files_info:
-                try:
-                    data = pdf_processor.load_from_file(temp_path)
-                    if data:
-                        pdf_processor.split_and_store(data)
-                        result = pdf_processor.create_rag_system()
-                        st.sidebar.success(f"Processed file: {original_name}")
-                        st.sidebar.write(result)
-                    else:
-                        st.sidebar.error(f"Failed to load data from file: {original_name}")
-                except CustomException as ce:
-                    logger.error(f"CustomException: {str(ce)}")
-                    st.sidebar.error(str(ce))
-                except Exception as e:
-                    logger.exception(f"Unexpected error: {str(e)}")
-                    st.sidebar.error("Internal server error")
+            ingest(uploaded_files, [], corpus)
+
+    if "pending_ingestion" in st.session_state and st.sidebar.button("Check ingestion status"):
+        check_pending_ingestion()
+
+    try:
+        indexed_sources = list_documents(f"{FASTAPI_URL}/documents/", corpus)
+    except requests.exceptions.RequestException as e:
+        request_error("listing the documents", e)
+        indexed_sources = {}
+    if indexed_sources:
+        st.sidebar.subheader("Indexed documents")
+        source = st.sidebar.selectbox(
+            "Select a document",
+            list(indexed_sources),
+            format_func=lambda name: f"{name} ({indexed_sources[name]} chunks)",
+        )
+        if st.sidebar.button("Remove document"):
+            try:
+                removed = remove_document(f"{FASTAPI_URL}/documents/", source, corpus)
+                st.sidebar.success(f"Removed {removed} chunk(s) of {source}")
+            except requests.exceptions.RequestException as e:
+                request_error(f"removing {source}", e)
+
+    st.sidebar.subheader("Search")
+    st.sidebar.multiselect(
+        "Search corpora",
+        corpora["corpora"],
+        key="search_corpora",
+        help="Leave empty to route every question to the corpora closest to it.",
+    )
@@ -9,3 +9,7 @@ def initialize_state():
 
     if "query_langraph" not in st.session_state:
         st.session_state["query_langraph"] = ""
+
+    # Corpora searched by both agents, empty to let the backend route every query
+    if "search_corpora" not in st.session_state:
+        st.session_state["search_corpora"] = []
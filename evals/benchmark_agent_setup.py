@@ -0,0 +1,73 @@
+import os
+import sys
+import time
+import argparse
+import statistics
+
+# Ensure the project root is at the top of sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+sys.path.insert(0, project_root)
+
+from dotenv import load_dotenv
+from custom_logger import logger
+from custom_exceptions import CustomException
+from app.backend.main import (
+    CrewManager,
+    build_crew_template,
+    crew_config,
+    get_crew_template,
+    get_workflow_manager,
+)
+from app.backend.langgraph_agent.langraph import WorkflowManager
+
+load_dotenv()
+
+
+def time_setup(label, func, runs):
+    """
+    Time a setup callable and print latency statistics.
+
+    Args:
+        label (str): Name of the measured setup.
+        func (callable): Callable without arguments.
+        runs (int): Number of calls.
+
+    Returns:
+        list: Per-call latencies in milliseconds.
+    """
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        latencies.append((time.perf_counter() - start) * 1000)
+    print(
+        f"{label:>34}: mean={statistics.mean(latencies):8.1f} ms "
+        f"p50={statistics.median(latencies):8.1f} ms max={max(latencies):8.1f} ms (n={runs})"
+    )
+    return latencies
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Measure startup and per-request setup cost of the crew and LangGraph workflow."
+    )
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--query", default="I have started a retrofit project related to solar in california")
+    args = parser.parse_args()
+
+    try:
+        process = crew_config.get('PROCESS', "sequential")
+        openai_api_key = os.getenv("OPENAI_API_KEY")
+
+        print("Startup (paid once per process)")
+        time_setup("crew template", get_crew_template, 1)
+        time_setup("compiled LangGraph workflow", get_workflow_manager, 1)
+
+        print("Per request")
+        time_setup("crew built from scratch", lambda: build_crew_template(process), args.runs)
+        time_setup("crew copied from template", lambda: CrewManager(args.query).build_crew(), args.runs)
+        time_setup("LangGraph workflow from scratch", lambda: WorkflowManager(openai_api_key), args.runs)
+        time_setup("LangGraph workflow reused", get_workflow_manager, args.runs)
+    except CustomException as e:
+        logger.error(f"An error occurred during the agent setup benchmark: {e}")
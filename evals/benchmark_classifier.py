@@ -0,0 +1,84 @@
+import os
+import sys
+import time
+import argparse
+import statistics
+
+# Ensure the project root is at the top of sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+sys.path.insert(0, project_root)
+
+from dotenv import load_dotenv
+from custom_logger import logger
+from custom_exceptions import CustomException
+from app.backend.query_classifier import (
+    QueryClassifier,
+    load_examples,
+    classifier_config,
+    GENERIC_LABEL,
+)
+from app.backend.utils import get_openai_response
+
+load_dotenv()
+
+
+def leave_one_out(examples, min_margin):
+    """
+    Evaluate the local model on every example with a model trained on the others.
+
+    Args:
+        examples (list): (question, label) pairs.
+        min_margin (float): Confidence margin required for a local decision.
+
+    Returns:
+        list: (is_generic, predicted_is_generic or None when unsure, latency in microseconds) per example.
+    """
+    results = []
+    for i, (question, label) in enumerate(examples):
+        classifier = QueryClassifier(examples[:i] + examples[i + 1:], min_margin=min_margin)
+        start = time.perf_counter()
+        predicted, margin = classifier.predict(question)
+        latency_us = (time.perf_counter() - start) * 1e6
+        results.append((label == GENERIC_LABEL, predicted if margin >= min_margin else None, latency_us))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure accuracy and latency of the query classifier.")
+    parser.add_argument("--examples", default=os.path.join(current_dir, "classifier-set.jsonl"))
+    parser.add_argument("--min-margin", type=float, default=None, help="Overrides QUERY_CLASSIFIER.MIN_MARGIN.")
+    parser.add_argument("--with-llm", action="store_true",
+                        help="Also classify every example with the LLM to compare accuracy and latency.")
+    args = parser.parse_args()
+
+    try:
+        examples = load_examples(args.examples)
+        min_margin = classifier_config.get('MIN_MARGIN', 0.05) if args.min_margin is None else args.min_margin
+        results = leave_one_out(examples, min_margin)
+        confident = [(truth, predicted) for truth, predicted, _ in results if predicted is not None]
+        latencies = [latency for _, _, latency in results]
+        local_accuracy = statistics.mean(truth == predicted for truth, predicted in confident) if confident else 0.0
+        print(f"Examples: {len(examples)} (leave-one-out, min_margin={min_margin})")
+        print(f"Local coverage: {len(confident) / len(examples):.2%} "
+              f"accuracy on covered: {local_accuracy:.2%}")
+        print(f"Local latency: mean={statistics.mean(latencies):.0f} us "
+              f"p50={statistics.median(latencies):.0f} us max={max(latencies):.0f} us")
+
+        if args.with_llm:
+            llm_results, llm_latencies = [], []
+            for question, _ in examples:
+                start = time.perf_counter()
+                llm_results.append(get_openai_response(question).is_generic)
+                llm_latencies.append((time.perf_counter() - start) * 1000)
+            truths = [truth for truth, _, _ in results]
+            combined = [
+                predicted if predicted is not None else llm
+                for (_, predicted, _), llm in zip(results, llm_results)
+            ]
+            print(f"LLM only: accuracy={statistics.mean(t == p for t, p in zip(truths, llm_results)):.2%} "
+                  f"mean={statistics.mean(llm_latencies):.0f} ms p50={statistics.median(llm_latencies):.0f} ms")
+            print(f"Local with LLM fallback: "
+                  f"accuracy={statistics.mean(t == p for t, p in zip(truths, combined)):.2%}")
+    except CustomException as e:
+        logger.error(f"An error occurred during the classifier benchmark: {e}")
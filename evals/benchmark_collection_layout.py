@@ -0,0 +1,198 @@
+import os
+import sys
+import copy
+import time
+import argparse
+import statistics
+
+# Ensure the project root is at the top of sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+sys.path.insert(0, project_root)
+
+import numpy as np
+from dotenv import load_dotenv
+from qdrant_client import QdrantClient, models
+from custom_logger import logger
+from custom_exceptions import CustomException
+from app.backend.collection_schema import collection_config, ensure_collection, search_params
+from app.backend.embedding_store import EmbeddingStore, retrieval_config
+
+load_dotenv()
+
+
+def layout(**overrides):
+    """Copy the configured COLLECTION section with nested overrides."""
+    settings = copy.deepcopy(collection_config)
+    for section, values in overrides.items():
+        if isinstance(values, dict):
+            settings[section] = {**(settings.get(section) or {}), **values}
+        else:
+            settings[section] = values
+    # Small benchmark collections would otherwise be searched by full scan
+    settings['HNSW'] = {**(settings.get('HNSW') or {}), 'FULL_SCAN_THRESHOLD': 1}
+    settings['PAYLOAD_INDEXES'] = {}
+    return settings
+
+
+LAYOUTS = {
+    "configured": layout(),
+    "m8-ef64": layout(HNSW={"M": 8, "EF_CONSTRUCT": 64}, QUANTIZATION={"TYPE": "none"}),
+    "m16-ef100": layout(HNSW={"M": 16, "EF_CONSTRUCT": 100}, QUANTIZATION={"TYPE": "none"}),
+    "m32-ef256": layout(HNSW={"M": 32, "EF_CONSTRUCT": 256}, QUANTIZATION={"TYPE": "none"}),
+    "scalar": layout(QUANTIZATION={"TYPE": "scalar", "RESCORE": True, "OVERSAMPLING": 2.0}),
+    "scalar-on-disk": layout(ON_DISK=True, QUANTIZATION={"TYPE": "scalar", "RESCORE": True, "OVERSAMPLING": 2.0}),
+    "binary": layout(QUANTIZATION={"TYPE": "binary", "RESCORE": True, "OVERSAMPLING": 3.0}),
+    "binary-no-rescore": layout(QUANTIZATION={"TYPE": "binary", "RESCORE": False, "OVERSAMPLING": 3.0}),
+}
+
+
+def load_vectors(model, limit, synthetic, dim, seed=0):
+    """
+    Load chunk embeddings from the embedding store, or generate clustered unit vectors.
+
+    Args:
+        model (str): Embedding model whose stored vectors are used.
+        limit (int): Maximum number of vectors.
+        synthetic (bool): Skip the embedding store.
+        dim (int): Dimension of synthetic vectors.
+        seed (int): Random seed of the synthetic data.
+
+    Returns:
+        np.ndarray: Unit-length vectors, one per row.
+    """
+    vectors = []
+    if not synthetic:
+        for batch in EmbeddingStore().iter_points(model, batch_size=1024):
+            vectors.extend(vector for _, vector, _ in batch)
+            if len(vectors) >= limit:
+                break
+    if vectors:
+        data = np.asarray(vectors[:limit], dtype=np.float32)
+    else:
+        rng = np.random.default_rng(seed)
+        centers = rng.normal(size=(max(1, limit // 200), dim))
+        data = centers[rng.integers(0, len(centers), limit)] + 0.35 * rng.normal(size=(limit, dim))
+        data = data.astype(np.float32)
+    return data / np.linalg.norm(data, axis=1, keepdims=True)
+
+
+def make_queries(data, count, noise=0.05, seed=1):
+    """Perturb a sample of the indexed vectors into unit-length queries."""
+    rng = np.random.default_rng(seed)
+    queries = data[rng.choice(len(data), size=min(count, len(data)), replace=False)]
+    queries = queries + noise * rng.normal(size=queries.shape).astype(np.float32) / np.sqrt(data.shape[1])
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+
+def estimated_ram_mb(settings, count, dim):
+    """
+    Estimate the resident memory of a collection layout.
+
+    Original vectors are float32, scalar quantization keeps one byte and binary
+    one bit per dimension, and the HNSW base layer holds 2*m links of 4 bytes per point.
+    """
+    quantization = settings.get('QUANTIZATION', {}) or {}
+    hnsw = settings.get('HNSW', {}) or {}
+    kind = str(quantization.get('TYPE') or "none").lower()
+    total = 0 if settings.get('ON_DISK', False) else count * dim * 4
+    if kind != "none" and quantization.get('ALWAYS_RAM', True):
+        total += count * (dim if kind == "scalar" else (dim + 7) // 8)
+    if not hnsw.get('ON_DISK', False):
+        total += count * 2 * hnsw.get('M', 16) * 4
+    return total / 2 ** 20
+
+
+def wait_until_indexed(client, collection_name, count, timeout):
+    """Wait for the optimizer to build the HNSW index over every point."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        info = client.get_collection(collection_name)
+        if info.status == models.CollectionStatus.GREEN and (info.indexed_vectors_count or 0) >= count:
+            return True
+        time.sleep(1)
+    logger.warning(f"{collection_name} was not fully indexed after {timeout}s")
+    return False
+
+
+def benchmark_layout(client, name, settings, data, queries, truth, k, ef_values, timeout):
+    """
+    Build one collection layout and measure recall and latency for every search ef.
+
+    Returns:
+        list: One result row per ef value.
+    """
+    collection_name = f"benchmark-layout-{name}"
+    ensure_collection(client, collection_name, data.shape[1], settings=settings, recreate=True)
+    client.update_collection(collection_name, optimizers_config=models.OptimizersConfigDiff(indexing_threshold=1))
+    start = time.perf_counter()
+    client.upload_points(
+        collection_name,
+        (models.PointStruct(id=index, vector=vector.tolist()) for index, vector in enumerate(data)),
+        batch_size=256,
+        wait=True,
+    )
+    wait_until_indexed(client, collection_name, len(data), timeout)
+    build_seconds = time.perf_counter() - start
+
+    rows = []
+    for ef in ef_values:
+        params = search_params({**settings, 'SEARCH_EF': ef})
+        latencies, recalls = [], []
+        for query, expected in zip(queries, truth):
+            started = time.perf_counter()
+            hits = client.query_points(collection_name, query=query.tolist(), limit=k, search_params=params).points
+            latencies.append((time.perf_counter() - started) * 1000)
+            recalls.append(len({hit.id for hit in hits} & expected) / k)
+        latencies.sort()
+        rows.append({
+            "layout": name,
+            "ef": ef,
+            "recall": statistics.mean(recalls),
+            "p50_ms": statistics.median(latencies),
+            "p95_ms": latencies[int(0.95 * (len(latencies) - 1))],
+            "ram_mb": estimated_ram_mb(settings, len(data), data.shape[1]),
+            "build_s": build_seconds,
+        })
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare recall, latency and memory of Qdrant collection layouts. "
+                    "Needs a Qdrant server, the local in-memory mode has no HNSW or quantization."
+    )
+    parser.add_argument("--url", default=os.getenv("QDRANT_URL", "http://localhost:6333"))
+    parser.add_argument("--api-key", default=os.getenv("QDRANT_API_KEY"))
+    parser.add_argument("--model", default=retrieval_config.get('EMBEDDING_MODEL', "text-embedding-ada-002"))
+    parser.add_argument("--vectors", type=int, default=20000, help="Number of indexed vectors.")
+    parser.add_argument("--synthetic", action="store_true", help="Use synthetic vectors, not the embedding store.")
+    parser.add_argument("--dim", type=int, default=1536, help="Dimension of synthetic vectors.")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--ef", default="32,64,128,256", help="Comma-separated search ef values.")
+    parser.add_argument("--layouts", default=",".join(LAYOUTS), help="Comma-separated layouts to compare.")
+    parser.add_argument("--index-timeout", type=int, default=600)
+    parser.add_argument("--keep", action="store_true", help="Keep the benchmark collections.")
+    args = parser.parse_args()
+
+    try:
+        client = QdrantClient(url=args.url, api_key=args.api_key, timeout=120)
+        data = load_vectors(args.model, args.vectors, args.synthetic, args.dim)
+        queries = make_queries(data, args.queries)
+        # Exact neighbours by brute force are the recall reference
+        truth = [set(row.tolist()) for row in np.argsort(-(queries @ data.T), axis=1)[:, :args.k]]
+        ef_values = [int(value) for value in args.ef.split(",")]
+        print(f"{len(data)} vectors of dimension {data.shape[1]}, {len(queries)} queries, recall@{args.k}")
+        print(f"{'layout':>18} {'ef':>5} {'recall':>7} {'p50 ms':>8} {'p95 ms':>8} {'est. RAM MB':>12} {'build s':>8}")
+        for name in args.layouts.split(","):
+            try:
+                for row in benchmark_layout(client, name, LAYOUTS[name], data, queries, truth,
+                                            args.k, ef_values, args.index_timeout):
+                    print(f"{row['layout']:>18} {row['ef']:>5} {row['recall']:>7.3f} {row['p50_ms']:>8.2f} "
+                          f"{row['p95_ms']:>8.2f} {row['ram_mb']:>12.1f} {row['build_s']:>8.1f}")
+            finally:
+                if not args.keep:
+                    client.delete_collection(f"benchmark-layout-{name}")
+    except CustomException as e:
+        logger.error(f"An error occurred during the collection layout benchmark: {e}")
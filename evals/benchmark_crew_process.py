@@ -0,0 +1,98 @@
+import os
+import sys
+import time
+import argparse
+import statistics
+
+# Ensure the project root is at the top of sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+sys.path.insert(0, project_root)
+
+from dotenv import load_dotenv
+from custom_logger import logger
+from custom_exceptions import CustomException
+from app.backend.main import CrewManager, CREW_PROCESSES
+
+load_dotenv()
+
+# Project-specific queries that go through the full report crew
+PROJECT_QUERIES = [
+    "I have started a retrofit project related to solar in california",
+    "We are building a 60-unit affordable housing project for seniors with a $12M budget starting in March 2024",
+    "Our non-profit plans a mixed-income rental development with 9% tax credits and a community solar array",
+    "I am rehabilitating a 1950s apartment building into 24 supportive housing units for formerly homeless veterans",
+]
+
+
+def load_queries(path, limit):
+    """
+    Load one query per line, or the built-in project queries.
+
+    Args:
+        path (str, optional): Text file with one query per line.
+        limit (int): Maximum number of queries.
+
+    Returns:
+        list: The queries.
+    """
+    if not path:
+        return PROJECT_QUERIES[:limit]
+    with open(path, 'r') as file:
+        return [line.strip() for line in file if line.strip()][:limit]
+
+
+def time_crew(query, process):
+    """
+    Run the report crew once and time it.
+
+    Args:
+        query (str): The project-specific query.
+        process (str): "sequential" or "parallel".
+
+    Returns:
+        tuple: Wall-clock seconds and per-task finishing offsets in seconds.
+    """
+    finished = []
+    start = time.perf_counter()
+
+    def task_callback(output):
+        finished.append((str(getattr(output, "agent", "")).strip(), time.perf_counter() - start))
+
+    CrewManager(query).build_crew(task_callback=task_callback, process=process).kickoff(inputs={"query": query})
+    return time.perf_counter() - start, finished
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare the wall-clock time of the sequential and parallel report crews."
+    )
+    parser.add_argument("--queries", help="Text file with one project query per line.")
+    parser.add_argument("--limit", type=int, default=len(PROJECT_QUERIES))
+    parser.add_argument("--runs", type=int, default=1, help="Runs per query and process.")
+    parser.add_argument("--processes", default=",".join(CREW_PROCESSES))
+    args = parser.parse_args()
+
+    try:
+        queries = load_queries(args.queries, args.limit)
+        processes = args.processes.split(",")
+        timings = {process: [] for process in processes}
+        for run in range(args.runs):
+            for index, query in enumerate(queries):
+                # Alternate the order so neither process always benefits from warm caches
+                ordered = processes if (run + index) % 2 == 0 else processes[::-1]
+                for process in ordered:
+                    seconds, finished = time_crew(query, process)
+                    timings[process].append(seconds)
+                    steps = ", ".join(f"{agent} @{offset:.1f}s" for agent, offset in finished)
+                    print(f"[{process}] query {index + 1} run {run + 1}: {seconds:.1f} s ({steps})")
+
+        print(f"{'process':>12} {'mean s':>8} {'p50 s':>8} {'max s':>8} {'n':>4}")
+        for process, values in timings.items():
+            print(f"{process:>12} {statistics.mean(values):>8.1f} {statistics.median(values):>8.1f} "
+                  f"{max(values):>8.1f} {len(values):>4}")
+        if "sequential" in timings and "parallel" in timings:
+            speedup = statistics.mean(timings["sequential"]) / statistics.mean(timings["parallel"])
+            print(f"parallel speedup over sequential: {speedup:.2f}x")
+    except CustomException as e:
+        logger.error(f"An error occurred during the crew process benchmark: {e}")
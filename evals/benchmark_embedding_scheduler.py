@@ -0,0 +1,69 @@
+import os
+import sys
+import time
+import argparse
+
+# Ensure the project root is at the top of sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+sys.path.insert(0, project_root)
+
+from custom_logger import logger
+from custom_exceptions import CustomException
+from app.backend.embedding_scheduler import EmbeddingScheduler
+from evals.fake_embeddings_server import start_server
+
+
+def synthetic_chunks(count, length):
+    """Build distinct chunk-sized texts."""
+    filler = "affordable housing tax credit compliance period "
+    return [f"chunk {i}: " + filler * (length // len(filler)) for i in range(count)]
+
+
+def run(label, scheduler, texts):
+    """Embed the texts and print the scheduler throughput."""
+    start = time.perf_counter()
+    vectors = scheduler.embed_documents(texts)
+    elapsed = time.perf_counter() - start
+    stats = scheduler.throughput()
+    assert len(vectors) == len(texts) and all(vectors)
+    print(
+        f"{label:>10}: {elapsed:6.2f} s, {stats['chunks_per_second']:7.1f} chunks/s, "
+        f"{stats['tokens_per_second']:9.0f} tokens/s, requests={stats['requests']} "
+        f"retries={stats['retries']} 429s={stats['rate_limited']} "
+        f"final batch={stats['batch_size']} concurrency={stats['concurrency']}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure embedding throughput against a local fake server.")
+    parser.add_argument("--base-url", default=None, help="Use a running endpoint instead of starting the fake server.")
+    parser.add_argument("--chunks", type=int, default=1000)
+    parser.add_argument("--chunk-chars", type=int, default=2000)
+    parser.add_argument("--rpm", type=int, default=300)
+    parser.add_argument("--tpm", type=int, default=1_000_000)
+    parser.add_argument("--dimensions", type=int, default=256,
+                        help="Vector size returned by the fake server, smaller keeps its CPU cost out of the measurement.")
+    parser.add_argument("--model", default="text-embedding-ada-002")
+    args = parser.parse_args()
+
+    try:
+        def endpoint():
+            # A fresh fake server per run so that every run starts with the full budget
+            if args.base_url:
+                return args.base_url
+            return start_server(rpm=args.rpm, tpm=args.tpm, dimensions=args.dimensions)[1]
+
+        texts = synthetic_chunks(args.chunks, args.chunk_chars)
+        print(f"Embedding {len(texts)} chunks of ~{args.chunk_chars} chars "
+              f"({'fake server, rpm=%d tpm=%d' % (args.rpm, args.tpm) if not args.base_url else args.base_url})")
+
+        # Baseline: fixed batches sent one after another, like OpenAIEmbeddings
+        sequential = EmbeddingScheduler(args.model, api_key="fake", base_url=endpoint())
+        sequential.concurrency = sequential.max_concurrency = 1
+        sequential.batch_size = sequential.min_batch_size = sequential.max_batch_size = 64
+        run("sequential", sequential, texts)
+
+        run("scheduler", EmbeddingScheduler(args.model, api_key="fake", base_url=endpoint()), texts)
+    except CustomException as e:
+        logger.error(f"An error occurred during the embedding scheduler benchmark: {e}")
@@ -0,0 +1,43 @@
+import os
+import sys
+import glob
+import time
+import argparse
+
+# Ensure the project root is at the top of sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+sys.path.insert(0, project_root)
+
+from custom_logger import logger
+from custom_exceptions import CustomException
+from app.backend.pdf_parsing import ParallelPDFParser, PARSER_BACKENDS
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure PDF parsing throughput per backend and worker count.")
+    parser.add_argument("--pdfs", default=os.path.join(project_root, "data", "*.pdf"), help="Glob of PDFs to parse.")
+    parser.add_argument("--backends", default=",".join(PARSER_BACKENDS))
+    parser.add_argument("--workers", default="1,2,4,8", help="Comma separated worker counts, 1 parses serially.")
+    parser.add_argument("--pages-per-task", type=int, default=8)
+    args = parser.parse_args()
+
+    try:
+        paths = sorted(glob.glob(args.pdfs))
+        if not paths:
+            raise CustomException(f"No PDFs match {args.pdfs}", sys)
+        print(f"Parsing {len(paths)} PDF(s): {', '.join(os.path.basename(path) for path in paths)}")
+        for backend in [name.strip() for name in args.backends.split(",") if name.strip()]:
+            for workers in [int(count) for count in args.workers.split(",")]:
+                pdf_parser = ParallelPDFParser(max_workers=workers, pages_per_task=args.pages_per_task)
+                if workers > 1:
+                    # Start the worker processes outside the timed region
+                    list(pdf_parser.pool.map(abs, range(workers)))
+                start = time.perf_counter()
+                pages = sum(len(pdf_parser.parse(path, backend)) for path in paths)
+                elapsed = time.perf_counter() - start
+                pdf_parser.shutdown()
+                print(f"{backend:>10} workers={workers:<2} pages={pages:<4} "
+                      f"time={elapsed:7.2f} s pages/s={pages / elapsed:7.1f}")
+    except CustomException as e:
+        logger.error(f"An error occurred during the parsing benchmark: {e}")
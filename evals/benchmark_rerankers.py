@@ -0,0 +1,90 @@
+import os
+import sys
+import time
+import argparse
+import statistics
+
+# Ensure the project root is at the top of sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+sys.path.insert(0, project_root)
+
+from dotenv import load_dotenv
+from custom_logger import logger
+from custom_exceptions import CustomException
+from app.backend.rerankers import get_reranker
+from app.backend.retrieval import get_retrieval_resources
+from evals.benchmark_retrieval import load_questions
+
+load_dotenv()
+
+
+def doc_key(doc):
+    """Identify a chunk by its Qdrant id, falling back to its text."""
+    return doc.metadata.get("_id") or doc.page_content
+
+
+def rank_agreement(reference, candidate, top_n):
+    """
+    Compare a ranking against the reference ranking.
+
+    Args:
+        reference (list): Documents ranked by the reference reranker.
+        candidate (list): Documents ranked by the evaluated reranker.
+        top_n (int): Cut-off used for the overlap.
+
+    Returns:
+        tuple: Overlap@top_n as a fraction and whether the top-1 documents match.
+    """
+    reference_keys = [doc_key(doc) for doc in reference[:top_n]]
+    candidate_keys = [doc_key(doc) for doc in candidate[:top_n]]
+    overlap = len(set(reference_keys) & set(candidate_keys)) / max(len(reference_keys), 1)
+    top1 = bool(reference_keys and candidate_keys and reference_keys[0] == candidate_keys[0])
+    return overlap, top1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare reranker latency and ranking agreement.")
+    parser.add_argument("--testset", default=os.path.join(current_dir, "test-set.jsonl"))
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10, help="Candidates retrieved from Qdrant per question.")
+    parser.add_argument("--top-n", type=int, default=5)
+    parser.add_argument("--providers", default="cohere,jina,lexical,cross_encoder",
+                        help="Comma separated providers, the first one is the reference ranking.")
+    args = parser.parse_args()
+
+    try:
+        questions = load_questions(args.testset, args.limit)
+        resources = get_retrieval_resources()
+        candidates = resources.batch_retrieve(questions, args.k, rerank=False)
+
+        providers = [provider.strip() for provider in args.providers.split(",") if provider.strip()]
+        rankings, latencies = {}, {}
+        for provider in providers:
+            try:
+                reranker = get_reranker(provider, top_n=args.top_n)
+            except Exception as e:
+                logger.warning(f"Skipping reranker '{provider}': {e}")
+                continue
+            rankings[provider], latencies[provider] = [], []
+            for question, docs in zip(questions, candidates):
+                start = time.perf_counter()
+                rankings[provider].append(list(reranker.compress_documents(docs, question)))
+                latencies[provider].append((time.perf_counter() - start) * 1000)
+
+        reference = next(iter(rankings), None)
+        print(f"Reference ranking: {reference} ({len(questions)} questions, k={args.k}, top_n={args.top_n})")
+        for provider, provider_latencies in latencies.items():
+            agreements = [
+                rank_agreement(ref, cand, args.top_n)
+                for ref, cand in zip(rankings[reference], rankings[provider])
+            ]
+            print(
+                f"{provider:>14}: mean={statistics.mean(provider_latencies):8.1f} ms "
+                f"p50={statistics.median(provider_latencies):8.1f} ms "
+                f"max={max(provider_latencies):8.1f} ms "
+                f"overlap@{args.top_n}={statistics.mean(a[0] for a in agreements):.2f} "
+                f"top1={statistics.mean(a[1] for a in agreements):.2f}"
+            )
+    except CustomException as e:
+        logger.error(f"An error occurred during the reranker benchmark: {e}")
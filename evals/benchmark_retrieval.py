@@ -0,0 +1,88 @@
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+
+# Ensure the project root is at the top of sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+sys.path.insert(0, project_root)
+
+from dotenv import load_dotenv
+from custom_logger import logger
+from custom_exceptions import CustomException
+from app.backend.tools import RAGTool, ReportTool
+from app.backend.retrieval import get_retrieval_resources
+
+load_dotenv()
+
+
+def load_questions(testset_path, limit):
+    """
+    Load questions from a Giskard test set.
+
+    Args:
+        testset_path (str): Path to the jsonl test set.
+        limit (int): Maximum number of questions to return.
+
+    Returns:
+        list: The questions.
+    """
+    questions = []
+    with open(testset_path, 'r') as file:
+        for line in file:
+            if line.strip():
+                questions.append(json.loads(line)["question"])
+            if len(questions) >= limit:
+                break
+    return questions
+
+
+def time_calls(label, func, inputs):
+    """
+    Time a callable over every input and print latency statistics.
+
+    Args:
+        label (str): Name of the measured operation.
+        func (callable): Callable taking a single input.
+        inputs (list): Inputs to feed the callable.
+
+    Returns:
+        list: Per-call latencies in milliseconds.
+    """
+    latencies = []
+    for item in inputs:
+        start = time.perf_counter()
+        func(item)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    warm = latencies[1:] or latencies
+    print(
+        f"{label}: first={latencies[0]:.1f} ms "
+        f"warm_mean={statistics.mean(warm):.1f} ms "
+        f"warm_p50={statistics.median(warm):.1f} ms "
+        f"warm_max={max(warm):.1f} ms (n={len(latencies)})"
+    )
+    return latencies
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure per-request latency of the retrieval tools.")
+    parser.add_argument("--testset", default=os.path.join(current_dir, "test-set.jsonl"))
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--skip-llm", action="store_true", help="Only time ReportTool retrieval.")
+    args = parser.parse_args()
+
+    try:
+        questions = load_questions(args.testset, args.limit)
+        report_tool = ReportTool()
+        time_calls("ReportTool._run", lambda q: report_tool._run([q]), questions)
+        batches = [questions[i:i + 4] for i in range(0, len(questions), 4)]
+        time_calls("ReportTool._run (4 queries)", report_tool._run, batches)
+        if not args.skip_llm:
+            time_calls("RAGTool.qa_from_RAG", lambda q: RAGTool(q).qa_from_RAG(), questions)
+        print(f"Embedding cache: {get_retrieval_resources().embeddings.stats()}")
+    except CustomException as e:
+        logger.error(f"An error occurred during the retrieval benchmark: {e}")
@@ -0,0 +1,145 @@
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class TokenBucket:
+    """Per-minute budget refilled continuously, like the OpenAI request and token limits."""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.available = float(per_minute)
+        self.updated = time.monotonic()
+
+    def refill(self):
+        now = time.monotonic()
+        self.available = min(self.capacity, self.available + (now - self.updated) * self.capacity / 60.0)
+        self.updated = now
+
+    def seconds_until(self, amount):
+        return max(0.0, (amount - self.available) * 60.0 / self.capacity)
+
+
+class FakeEmbeddingsServer(ThreadingHTTPServer):
+    """
+    Local stand-in for the OpenAI embeddings endpoint with rate limits and latency.
+
+    Responses carry the x-ratelimit-* headers, requests beyond the budget get a
+    429 with retry-after, and latency grows with the batch size.
+    """
+
+    def __init__(self, address, rpm=500, tpm=1_000_000, dimensions=1536, base_latency=0.05,
+                 latency_per_text=0.002):
+        super().__init__(address, FakeEmbeddingsHandler)
+        self.requests_bucket = TokenBucket(rpm)
+        self.tokens_bucket = TokenBucket(tpm)
+        self.dimensions = dimensions
+        self.base_latency = base_latency
+        self.latency_per_text = latency_per_text
+        self.lock = threading.Lock()
+
+    def admit(self, tokens):
+        """Consume budget for a request, or return the seconds to wait before retrying."""
+        with self.lock:
+            self.requests_bucket.refill()
+            self.tokens_bucket.refill()
+            wait = max(self.requests_bucket.seconds_until(1), self.tokens_bucket.seconds_until(tokens))
+            if wait > 0:
+                return wait
+            self.requests_bucket.available -= 1
+            self.tokens_bucket.available -= tokens
+            return 0.0
+
+    def rate_limit_headers(self):
+        with self.lock:
+            return {
+                "x-ratelimit-limit-requests": str(int(self.requests_bucket.capacity)),
+                "x-ratelimit-remaining-requests": str(int(self.requests_bucket.available)),
+                "x-ratelimit-limit-tokens": str(int(self.tokens_bucket.capacity)),
+                "x-ratelimit-remaining-tokens": str(int(self.tokens_bucket.available)),
+                "x-ratelimit-reset-requests": f"{self.requests_bucket.seconds_until(self.requests_bucket.capacity):.3f}s",
+                "x-ratelimit-reset-tokens": f"{self.tokens_bucket.seconds_until(self.tokens_bucket.capacity):.3f}s",
+            }
+
+    def embed(self, text):
+        """Deterministic unit-length pseudo-embedding of a text."""
+        rng = random.Random(hashlib.sha256(text.encode("utf-8")).digest())
+        vector = [rng.gauss(0.0, 1.0) for _ in range(self.dimensions)]
+        norm = sum(value * value for value in vector) ** 0.5
+        return [value / norm for value in vector]
+
+
+class FakeEmbeddingsHandler(BaseHTTPRequestHandler):
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, payload, headers):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/embeddings"):
+            self.send_json(404, {"error": {"message": "Not found"}}, {})
+            return
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        texts = request["input"] if isinstance(request["input"], list) else [request["input"]]
+        tokens = sum(max(1, len(text) // 4) for text in texts)
+
+        wait = self.server.admit(tokens)
+        if wait > 0:
+            headers = self.server.rate_limit_headers()
+            headers["retry-after"] = f"{wait:.3f}"
+            self.send_json(429, {"error": {"message": "Rate limit reached", "type": "requests",
+                                           "code": "rate_limit_exceeded"}}, headers)
+            return
+
+        time.sleep(self.server.base_latency + self.server.latency_per_text * len(texts))
+        self.send_json(200, {
+            "object": "list",
+            "data": [
+                {"object": "embedding", "index": index, "embedding": self.server.embed(text)}
+                for index, text in enumerate(texts)
+            ],
+            "model": request.get("model", "fake"),
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        }, self.server.rate_limit_headers())
+
+
+def start_server(port=0, **kwargs):
+    """
+    Start the fake server on a background thread.
+
+    Args:
+        port (int): Port to bind, 0 picks a free one.
+        **kwargs: Limits and latency passed to FakeEmbeddingsServer.
+
+    Returns:
+        tuple: The server and its base URL for the OpenAI client.
+    """
+    server = FakeEmbeddingsServer(("127.0.0.1", port), **kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a rate-limited fake OpenAI embeddings endpoint.")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--rpm", type=int, default=500)
+    parser.add_argument("--tpm", type=int, default=1_000_000)
+    parser.add_argument("--dimensions", type=int, default=1536)
+    args = parser.parse_args()
+
+    server = FakeEmbeddingsServer(("0.0.0.0", args.port), rpm=args.rpm, tpm=args.tpm, dimensions=args.dimensions)
+    print(f"Fake embeddings server on http://0.0.0.0:{args.port}/v1")
+    server.serve_forever()
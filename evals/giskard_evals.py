@@ -12,9 +12,10 @@ import pandas as pd
 from giskard.rag import evaluate, KnowledgeBase, generate_testset, QATestset
 from giskard.llm.client.openai import OpenAIClient
 from dotenv import load_dotenv
-from langchain_community.document_loaders import PyPDFLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from app.backend.utils import get_hyperparameters_from_file
+from app.backend.parsed_cache import get_parsed_cache
+from app.backend.pdf_parsing import parser_for
 from custom_logger import logger
 from custom_exceptions import CustomException
 from app.backend.tools import RAGTool
@@ -34,42 +35,42 @@ giskard.llm.set_default_client(oc)
 class GiskardEvals:
     def __init__(self):
         self.file_path = project_root
-        self.pdf_paths = self.load_paths()
+        self.documents = self.load_documents()
         self.text_chunks, self.knowledge_base = self.load_and_split_docs()
         self.testset_path = os.path.join(self.file_path, "test-set.jsonl")
         self.testset = self.load_or_generate_testset()
 
-    def load_paths(self):
+    def load_documents(self):
         """
-        Load paths of PDF files from the specified directory.
+        Load the pages of every ingested PDF from the parsed-document cache.
+
+        Ingestion writes each document it parses to the cache, uploads included, so the
+        evals see the same documents as the indexes without searching the tree for PDFs.
         """
-        pdf_paths = []
+        documents = []
         try:
-            for root, _, files in os.walk(self.file_path):
-                for file in files:
-                    if file.lower().endswith('.pdf'):
-                        full_path = os.path.join(root, file)
-                        pdf_paths.append(full_path)
-            if pdf_paths:
-                logger.info("PDF paths loaded successfully.")
+            parsed_cache = get_parsed_cache()
+            if parsed_cache is None:
+                raise CustomException("PARSED_CACHE is disabled, the evals read the ingested documents from it", sys)
+            preferred = parser_for("file")
+            for digest, backends in parsed_cache.documents().items():
+                backend = preferred if preferred in backends else backends[0]
+                documents.extend(parsed_cache.read(digest, backend, source=digest))
+            if documents:
+                logger.info("Ingested documents loaded successfully.")
             else:
-                logger.warning("No PDF files found in the specified directory.")
+                logger.warning("No ingested documents found in the parsed-document cache.")
         except Exception as e:
-            logger.error(f"Error loading paths: {e}")
+            logger.error(f"Error loading documents: {e}")
             raise CustomException(e, sys)
-        return pdf_paths
-    
+        return documents
+
     def load_and_split_docs(self):
         """
-        Load and split documents into text chunks.
+        Split the ingested documents into text chunks and build the knowledge base.
         """
-        documents = []
         try:
-            for file_path in self.pdf_paths:
-                loader = PyPDFLoader(file_path)
-                loaded_documents = loader.load()
-                documents.extend(loaded_documents)
-
+            documents = self.documents
             text_splitter = RecursiveCharacterTextSplitter(chunk_size=2000, chunk_overlap=200)
             text_chunks = text_splitter.split_documents(documents)
 